@@ -1,14 +1,22 @@
+from django.db.models import Prefetch
 from .models import Application
-from jobs.views import get_profile_photo
-from matching.utils import calculate_match_percentage
+from users.photos import profile_photo_url, LIST_THUMBNAIL_SIZE
+from matching.utils import calculate_match_percentages
+from users.models import UserSkill
 
 def get_job_listing_applications(job_listing):
-    applications = Application.objects.filter(job_listing=job_listing).select_related('candidate__user')
+    applications = list(
+        Application.objects.filter(job_listing=job_listing)
+        .select_related('candidate__user')
+        .prefetch_related(Prefetch('candidate__userskill_set', queryset=UserSkill.objects.select_related('skill')))
+    )
+    # Score all applicants against the listing in one batch
+    match_percentages = calculate_match_percentages(job_listing, [app.candidate for app in applications])
     data = []
     for app in applications:
         candidate = app.candidate
         user = candidate.user
-        skills = candidate.userskill_set.select_related('skill').all()
+        skills = candidate.userskill_set.all()
         skills_data = sorted(
             [{'name': s.skill.name, 'level': s.level} for s in skills],
             key=lambda x: x['level'], reverse=True
@@ -20,8 +28,8 @@ def get_job_listing_applications(job_listing):
             'position': candidate.position,
             'skills': skills_data,
             'status': app.status,
-            'profile_photo': get_profile_photo(candidate.id),
-            'match_percentage': calculate_match_percentage(job_listing, candidate)
+            'profile_photo': profile_photo_url(candidate, LIST_THUMBNAIL_SIZE),
+            'match_percentage': match_percentages[candidate.id]
         })
     data.sort(key=lambda x: x['match_percentage'], reverse=True)
     return data 
\ No newline at end of file
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.test.signals import setting_changed
 
 
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        # Rebuild the shared event broker when tests override its settings
+        from .events import reset_event_broker_on_setting_change
+        setting_changed.connect(reset_event_broker_on_setting_change, dispatch_uid='chat_reset_event_broker')
@@ -1,4 +1,4 @@
-from .models import Conversation
+from .utils import get_unread_total, side_for_role
 
 def message_notifications(request):
     """
@@ -7,21 +7,10 @@ def message_notifications(request):
     """
     if request.user.is_authenticated:
         try:
-            # Get user role to determine which conversations to check
+            # Only conversations on the side of the user's role count;
+            # the total is a cached counter, so most renders run no COUNT query
             user_role = request.user.appuser.role
-            
-            total_unread = 0
-            
-            if user_role == 'recruiter':
-                # Recruiter: check conversations where they are the recruiter
-                conversations = Conversation.objects.filter(recruiter=request.user)
-            elif user_role == 'worker':
-                # Worker: check conversations where they are the candidate
-                conversations = Conversation.objects.filter(candidate=request.user)
-            
-            # Count unread messages in relevant conversations
-            for conversation in conversations:
-                total_unread += conversation.get_unread_count(request.user)
+            total_unread = get_unread_total(request.user, side_for_role(user_role))
             
             return {
                 'unread_messages_count': total_unread,
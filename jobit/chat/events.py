@@ -0,0 +1,252 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class ChatEventBroker:
+    """
+    Fan-out of chat events to the open event streams of a user.
+
+    ``publish`` is called from regular (sync) views after commit and must be
+    thread safe; ``listen`` is an async generator used by the ASGI event stream.
+    It yields event dicts and None whenever ``heartbeat`` seconds pass without
+    an event, so the stream can send a keep-alive.
+    """
+
+    def publish(self, user_id, event):
+        raise NotImplementedError
+
+    async def listen(self, user_id, heartbeat):
+        raise NotImplementedError
+        yield
+
+
+class InMemoryChatEventBroker(ChatEventBroker):
+    """
+    Process-local broker: one asyncio queue per open stream.
+
+    Only streams served by the same process receive the events, so this is
+    enough for a single ASGI worker; use the redis broker with several workers.
+    A stream that does not keep up loses its oldest events (CHAT_EVENT_QUEUE_SIZE).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The stream's event loop is already closed
+                pass
+
+    @staticmethod
+    def _deliver(queue, event):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    async def listen(self, user_id, heartbeat):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=settings.CHAT_EVENT_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(user_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscribers.get(user_id, ()))
+
+
+class RedisChatEventBroker(ChatEventBroker):
+    """
+    Broker over Redis pub/sub (CHAT_EVENT_REDIS_URL), one channel per user,
+    so events reach streams held by any worker process or host.
+    """
+
+    def __init__(self, url=None):
+        self._url = url
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return self._url or settings.CHAT_EVENT_REDIS_URL
+
+    @staticmethod
+    def channel(user_id):
+        return f"chat_events:{user_id}"
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import redis
+                    self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def publish(self, user_id, event):
+        self.client.publish(self.channel(user_id), json.dumps(event))
+
+    async def listen(self, user_id, heartbeat):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(self.channel(user_id))
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+                yield json.loads(message['data']) if message else None
+        finally:
+            await pubsub.unsubscribe(self.channel(user_id))
+            await pubsub.close()
+            await client.close()
+
+
+CHAT_EVENT_BROKERS = {
+    'memory': InMemoryChatEventBroker,
+    'redis': RedisChatEventBroker,
+}
+
+_event_broker = None
+_event_broker_lock = threading.Lock()
+
+
+def get_event_broker():
+    """
+    The process-wide chat event broker selected by CHAT_EVENT_BROKER
+    ('memory', 'redis' or a dotted path to a ChatEventBroker subclass).
+    """
+    global _event_broker
+    if _event_broker is None:
+        with _event_broker_lock:
+            if _event_broker is None:
+                backend = settings.CHAT_EVENT_BROKER
+                broker_class = CHAT_EVENT_BROKERS.get(backend) or import_string(backend)
+                _event_broker = broker_class()
+    return _event_broker
+
+
+def reset_event_broker():
+    """Drop the shared broker so it is rebuilt from the current settings."""
+    global _event_broker
+    with _event_broker_lock:
+        _event_broker = None
+
+
+def reset_event_broker_on_setting_change(setting, **kwargs):
+    if setting.startswith('CHAT_EVENT_'):
+        reset_event_broker()
+
+
+def publish_event(user_id, event_type, data):
+    """Send an event to the user's open streams once the current transaction commits."""
+    event = {'type': event_type, 'data': data}
+
+    def publish():
+        try:
+            get_event_broker().publish(user_id, event)
+        except Exception as e:
+            # Clients still catch up through the regular endpoints
+            print(f"❌ Error publishing chat event {event_type} to user {user_id}: {str(e)}")
+    transaction.on_commit(publish)
+
+
+def publish_unread_total(user):
+    """Publish the user's unread total, in the same shape as the notifications endpoint."""
+    from .utils import get_unread_total, side_for_role
+
+    def publish():
+        total = get_unread_total(user, side_for_role(user.appuser.role))
+        publish_event(user.id, 'unread', {
+            'unread_messages_count': total,
+            'has_unread_messages': total > 0
+        })
+    # Counted after commit, when the cached counter is already bumped or cleared
+    transaction.on_commit(publish)
+
+
+def notify_message_sent(conversation, message):
+    """Push a new message to both participants and the new unread total to the recipient."""
+    for user_id in (conversation.recruiter_id, conversation.candidate_id):
+        publish_event(user_id, 'message', {
+            'conversation_id': conversation.id,
+            'message': {
+                'id': message.id,
+                'content': message.content,
+                'sender_id': message.sender_id,
+                'is_sent_by_me': message.sender_id == user_id,
+                'created_at': message.created_at.isoformat(),
+                'read_at': None
+            }
+        })
+    recipient = conversation.candidate if message.sender_id == conversation.recruiter_id else conversation.recruiter
+    publish_unread_total(recipient)
+
+
+def notify_conversation_read(conversation, reader):
+    """
+    Push a read receipt (the reader's new read mark) to the other participant
+    and the new unread total to the reader.
+    """
+    is_recruiter = reader.id == conversation.recruiter_id
+    other_user_id = conversation.candidate_id if is_recruiter else conversation.recruiter_id
+    read_at = conversation.recruiter_last_read_at if is_recruiter else conversation.candidate_last_read_at
+    publish_event(other_user_id, 'read', {
+        'conversation_id': conversation.id,
+        'reader_id': reader.id,
+        'last_read_message_id': getattr(conversation, conversation.last_read_field(reader)),
+        'read_at': read_at.isoformat() if read_at else None
+    })
+    publish_unread_total(reader)
+
+
+def format_sse(event):
+    """Encode an event as a Server-Sent Events frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def event_stream(user_id, initial_events=()):
+    """
+    Body of the text/event-stream response of one client.
+    The stream ends after CHAT_EVENT_STREAM_TIMEOUT seconds and the browser
+    reconnects, which bounds how long a stream of a vanished client is kept.
+    """
+    yield f"retry: {settings.CHAT_EVENT_RETRY_MS}\n\n"
+    for event in initial_events:
+        yield format_sse(event)
+
+    deadline = time.monotonic() + settings.CHAT_EVENT_STREAM_TIMEOUT
+    events = get_event_broker().listen(user_id, settings.CHAT_EVENT_HEARTBEAT)
+    try:
+        async for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_sse(event)
+            if time.monotonic() >= deadline:
+                break
+    finally:
+        await events.aclose()
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chat.utils import archive_messages
+
+
+class Command(BaseCommand):
+    help = 'Move old read chat messages to the archive table (run periodically, e.g. nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHAT_ARCHIVE_AFTER_DAYS,
+                            help='Archive read messages older than this many days')
+        parser.add_argument('--batch-size', type=int, default=settings.CHAT_ARCHIVE_BATCH_SIZE,
+                            help='Messages moved per transaction')
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        archived = archive_messages(older_than, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {archived} messages older than {older_than:%Y-%m-%d}.')
+        )
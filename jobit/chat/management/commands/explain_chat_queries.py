@@ -0,0 +1,146 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from chat import views
+from chat.models import Conversation
+from chat.utils import get_unread_counts, inbox_version, mark_conversation_messages_read
+
+# Table accesses in EXPLAIN QUERY PLAN (SQLite) and EXPLAIN (PostgreSQL) output: full
+# scans and index (or primary key) lookups. Aliased tables show up under their alias.
+SQLITE_ACCESS = re.compile(
+    r'^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+)| USING (INTEGER PRIMARY KEY))?'
+)
+POSTGRES_ACCESS = re.compile(
+    r'(Seq Scan) on (\w+)|Index(?: Only)? Scan(?: Backward)? using (\w+) on (\w+)|Bitmap Index Scan on (\w+)'
+)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries of the chat hot paths and report which indexes they use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversation', type=int,
+                            help='Conversation to run the queries for (default: the one with the most messages)')
+        parser.add_argument('--no-seqscan', action='store_true',
+                            help='PostgreSQL: discourage sequential scans, to check that an index is usable on small tables')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Exit with an error if a chat table is fully scanned')
+        parser.add_argument('--show-plans', action='store_true', help='Print the full plans')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN is only supported on SQLite and PostgreSQL, not {connection.vendor}.')
+
+        conversation = self.get_conversation(options['conversation'])
+        user = conversation.candidate
+
+        scans = []
+        for name, statements in self.capture_hot_paths(conversation, user).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for sql in statements:
+                plan = self.explain(sql, options['no_seqscan'])
+                full_scans, indexes = self.summarize(plan)
+                if full_scans:
+                    scans.append((name, full_scans))
+                    self.stdout.write(self.style.WARNING(f"  ⚠️ full scan of {', '.join(full_scans)}"))
+                elif indexes:
+                    self.stdout.write(self.style.SUCCESS(f"  ✅ {', '.join(indexes)}"))
+                else:
+                    self.stdout.write('  no chat table read')
+                if options['show_plans']:
+                    self.stdout.write(f"    {sql}")
+                    for line in plan:
+                        self.stdout.write(f"      {line}")
+
+        if scans and options['fail_on_scan']:
+            raise CommandError(f'{len(scans)} chat queries scan a whole table.')
+        self.stdout.write(self.style.SUCCESS(f'Explained chat queries of conversation {conversation.id}.'))
+
+    def get_conversation(self, conversation_id):
+        conversations = Conversation.objects.select_related('recruiter', 'candidate')
+        if conversation_id is not None:
+            conversation = conversations.filter(id=conversation_id).first()
+        else:
+            conversation = conversations.annotate(message_count=Count('messages')).order_by('-message_count').first()
+        if conversation is None:
+            raise CommandError('No conversation to explain the queries for.')
+        return conversation
+
+    def capture_hot_paths(self, conversation, user):
+        """
+        Run the chat hot paths and collect the chat statements they execute.
+        Everything runs in a transaction that is rolled back, so marking messages
+        read leaves no trace.
+        """
+        factory = RequestFactory()
+
+        def call_view(view, path, *args, **params):
+            request = factory.get(path, params)
+            request.user = user
+            return view(request, *args)
+
+        paths = {
+            'inbox (get_conversations)': lambda: call_view(views.get_conversations, '/messages/conversations/'),
+            'inbox version (ETag)': lambda: inbox_version(user),
+            'latest messages (get_messages)': lambda: call_view(
+                views.get_messages, '/messages/', conversation.id
+            ),
+            'new messages (get_messages?after_id=)': lambda: call_view(
+                views.get_messages, '/messages/', conversation.id, after_id=conversation.last_message_id or 0
+            ),
+            'unread counts (get_unread_counts)': lambda: get_unread_counts(user),
+            'unread count of a conversation': lambda: conversation.get_unread_count(user),
+            'last message': lambda: conversation.get_last_message(),
+            'mark read': lambda: mark_conversation_messages_read(conversation, user),
+        }
+
+        statements = {}
+        with transaction.atomic():
+            for name, run in paths.items():
+                with CaptureQueriesContext(connection) as queries:
+                    run()
+                statements[name] = [
+                    query['sql'] for query in queries
+                    if query['sql'].lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')) and '"chat_' in query['sql']
+                ]
+            transaction.set_rollback(True)
+        return statements
+
+    def explain(self, sql, no_seqscan=False):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                # Rows are (id, parent, notused, detail)
+                return [row[-1] for row in cursor.fetchall()]
+
+            if no_seqscan:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [row[0] for row in cursor.fetchall()]
+
+    def summarize(self, plan):
+        """Tables read in full and indexes used, from the plan lines."""
+        full_scans, indexes = [], []
+        for line in plan:
+            line = line.strip().lstrip('->').strip()
+            if connection.vendor == 'sqlite':
+                match = SQLITE_ACCESS.match(line)
+                if not match or match.group(2) == 'CONSTANT':
+                    continue
+                if match.group(1) == 'SCAN' and not match.group(3):
+                    full_scans.append(match.group(2))
+                else:
+                    indexes.append(match.group(3) or f"{match.group(2)} primary key")
+            else:
+                match = POSTGRES_ACCESS.search(line)
+                if not match:
+                    continue
+                if match.group(1):
+                    full_scans.append(match.group(2))
+                else:
+                    indexes.append(match.group(3) or match.group(5))
+        return full_scans, [index for index in indexes if index.startswith('chat_')]
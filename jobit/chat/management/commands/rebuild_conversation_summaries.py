@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from chat.models import Conversation
+from chat.utils import rebuild_conversation_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill in the last message, read marks and unread counters of conversations that have messages '
+        'but no summary yet (created before summaries existed). Safe to run on every start; '
+        '--all recomputes every conversation.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rebuild all conversations, not only missing summaries')
+
+    def handle(self, *args, **options):
+        conversations = Conversation.objects.all()
+        if not options['all']:
+            # create_message keeps summaries up to date, so only legacy conversations lack a last message
+            conversations = conversations.filter(last_message__isnull=True, messages__isnull=False).distinct()
+
+        rebuilt = 0
+        for conversation in conversations.iterator():
+            rebuild_conversation_summary(conversation)
+            rebuilt += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt summaries of {rebuilt} conversations.')
+        )
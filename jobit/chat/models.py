@@ -9,22 +9,55 @@ class Conversation(models.Model):
         on_delete=models.CASCADE,
         related_name='conversations'
     )
+    # Indexed together with updated_at in Meta.indexes
     recruiter = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='recruiter_conversations'
+        related_name='recruiter_conversations',
+        db_index=False
     )
     candidate = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='candidate_conversations'
+        related_name='candidate_conversations',
+        db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Inbox summary, maintained by send_message and mark_conversation_read
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_preview = models.CharField(max_length=255, blank=True, default='')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    recruiter_unread_count = models.PositiveIntegerField(default=0)
+    candidate_unread_count = models.PositiveIntegerField(default=0)
+
+    # Read state of each participant: every message of the other participant up to
+    # this id is read (high-water mark), as of *_last_read_at
+    recruiter_last_read_message_id = models.BigIntegerField(default=0)
+    candidate_last_read_message_id = models.BigIntegerField(default=0)
+    recruiter_last_read_at = models.DateTimeField(null=True, blank=True)
+    candidate_last_read_at = models.DateTimeField(null=True, blank=True)
+
+    # Highest id of the conversation's messages moved to ArchivedMessage (0: none)
+    archived_message_id = models.BigIntegerField(default=0)
+
+    PREVIEW_LENGTH = 255
+
     class Meta:
         ordering = ['-updated_at']
         unique_together = ['job_listing', 'recruiter', 'candidate']
+        indexes = [
+            # Inbox of each participant, most recent first (get_conversations)
+            models.Index(fields=['recruiter', '-updated_at'], name='chat_conv_recruiter_updated'),
+            models.Index(fields=['candidate', '-updated_at'], name='chat_conv_candidate_updated'),
+        ]
 
     def __str__(self):
         return f"Conversation about {self.job_listing.job_title} - {self.candidate.username}"
@@ -32,19 +65,40 @@ class Conversation(models.Model):
     def get_last_message(self):
         return self.messages.order_by('-created_at').first()
 
+    def unread_count_field(self, user):
+        """Name of the denormalized unread counter of a participant."""
+        return 'recruiter_unread_count' if user.id == self.recruiter_id else 'candidate_unread_count'
+
+    def last_read_field(self, user):
+        """Name of the read high-water mark (message id) of a participant."""
+        return 'recruiter_last_read_message_id' if user.id == self.recruiter_id else 'candidate_last_read_message_id'
+
     def get_unread_count(self, user):
-        # Count messages sent by the other person that haven't been read
-        other_user = self.candidate if user == self.recruiter else self.recruiter
+        # Count messages sent by the other person after the user's last read message
+        other_user_id = self.candidate_id if user.id == self.recruiter_id else self.recruiter_id
         return self.messages.filter(
-            sender=other_user,
-            read_at__isnull=True
+            sender_id=other_user_id,
+            id__gt=getattr(self, self.last_read_field(user))
         ).count()
 
+    def message_read_at(self, message):
+        """When the recipient read a message of this conversation, or None while it is unread."""
+        if message.read_at:
+            # Read before read state was tracked per participant
+            return message.read_at
+        if message.sender_id == self.recruiter_id:
+            last_read_id, last_read_at = self.candidate_last_read_message_id, self.candidate_last_read_at
+        else:
+            last_read_id, last_read_at = self.recruiter_last_read_message_id, self.recruiter_last_read_at
+        return last_read_at if message.id <= last_read_id else None
+
 class Message(models.Model):
     conversation = models.ForeignKey(
         Conversation,
         on_delete=models.CASCADE,
-        related_name='messages'
+        related_name='messages',
+        # Covered by the composite indexes below, which all start with the conversation
+        db_index=False
     )
     sender = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -57,18 +111,61 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination of a conversation's messages (get_message_page) and
+            # unread counting against the read marks (get_unread_counts)
+            models.Index(fields=['conversation', 'id'], name='chat_msg_conversation_id'),
+            # Messages of one participant after a read mark (Conversation.get_unread_count)
+            models.Index(fields=['conversation', 'sender', 'id'], name='chat_msg_conv_sender_id'),
+            # Chronological order within a conversation (default ordering, get_last_message)
+            models.Index(fields=['conversation', 'created_at'], name='chat_msg_conv_created'),
+        ]
 
     def __str__(self):
         return f"Message in {self.conversation}"
 
     def mark_as_read(self):
-        """Mark the message as read."""
-        if not self.read_at:
-            self.read_at = timezone.now()
-            self.save()
+        """
+        Mark the message, and the recipient's earlier unread messages in the
+        conversation, as read by moving the recipient's read high-water mark.
+        """
+        from .utils import mark_conversations_read
+        mark_conversations_read(self.recipient, {self.conversation_id: self.id})
 
     @property
     def recipient(self):
         if self.sender == self.conversation.recruiter:
             return self.conversation.candidate
-        return self.conversation.recruiter
\ No newline at end of file
+        return self.conversation.recruiter
+
+
+class ArchivedMessage(models.Model):
+    """
+    Old, read message moved out of the chat_message table by archive_messages.
+    It keeps the id it had as a Message, so pages read through both tables stay in order.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='archived_messages',
+        # Covered by the (conversation, id) index
+        db_index=False
+    )
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='chat_archmsg_conversation_id'),
+        ]
+
+    def __str__(self):
+        return f"Archived message in {self.conversation}"
@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -352,6 +353,925 @@ class ChatUtilsTest(TestCase):
         pass
 
 
+class UnreadCountsTest(TestCase):
+    """Test the aggregated, cached unread message counts"""
+    
+    def setUp(self):
+        """Set up a candidate with two conversations with the same recruiter"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        
+        self.conversations = []
+        for title in ("Backend Developer", "Frontend Developer"):
+            job_listing = JobListing.objects.create(
+                job_title=title,
+                company_name="Tech Corp",
+                about_company="About company",
+                job_description="Job description",
+                owner=recruiter_app_user
+            )
+            self.conversations.append(Conversation.objects.create(
+                job_listing=job_listing,
+                candidate=self.candidate_user,
+                recruiter=self.recruiter_user
+            ))
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def send(self, sender, conversation, content="Hello"):
+        import json
+        self.client.force_login(sender)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('chat:send_message'),
+                json.dumps({'conversation_id': conversation.id, 'content': content}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201)
+    
+    def notifications(self, user):
+        self.client.force_login(user)
+        return self.client.get(reverse('chat:get_notifications')).json()['data']['unread_messages_count']
+    
+    def test_get_unread_counts_single_query(self):
+        """Test that per-conversation counts take one query"""
+        from chat.utils import get_unread_counts
+        for conversation, count in zip(self.conversations, (2, 1)):
+            for _ in range(count):
+                Message.objects.create(conversation=conversation, sender=self.recruiter_user, content="Hi")
+        Message.objects.create(conversation=self.conversations[0], sender=self.candidate_user, content="Own")
+        
+        with self.assertNumQueries(1):
+            counts = get_unread_counts(self.candidate_user)
+        
+        self.assertEqual(counts, {self.conversations[0].id: 2, self.conversations[1].id: 1})
+        for conversation in self.conversations:
+            self.assertEqual(counts.get(conversation.id, 0), conversation.get_unread_count(self.candidate_user))
+    
+    def test_counter_is_bumped_by_send_message(self):
+        """Test that sending keeps the cached counter current without recounting"""
+        from chat.utils import get_unread_total, CANDIDATE_SIDE
+        self.assertEqual(self.notifications(self.candidate_user), 0)
+        
+        self.send(self.recruiter_user, self.conversations[0])
+        self.send(self.recruiter_user, self.conversations[1])
+        
+        with patch('chat.utils.get_unread_counts') as mock_counts:
+            self.assertEqual(get_unread_total(self.candidate_user, CANDIDATE_SIDE), 2)
+            mock_counts.assert_not_called()
+        self.assertEqual(self.notifications(self.candidate_user), 2)
+        # The sender's own counter is not affected
+        self.assertEqual(self.notifications(self.recruiter_user), 0)
+    
+    def test_counter_is_cleared_by_mark_read(self):
+        """Test that marking a conversation read updates the total"""
+        self.send(self.recruiter_user, self.conversations[0])
+        self.send(self.recruiter_user, self.conversations[1])
+        self.assertEqual(self.notifications(self.candidate_user), 2)
+        
+        self.client.force_login(self.candidate_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('chat:mark_conversation_read', args=[self.conversations[0].id]))
+        
+        self.assertEqual(self.notifications(self.candidate_user), 1)
+    
+    def test_conversations_include_unread_counts(self):
+        """Test that the inbox reports per-conversation unread counts"""
+        self.send(self.recruiter_user, self.conversations[1])
+        self.client.force_login(self.candidate_user)
+        
+        data = self.client.get(reverse('chat:get_conversations')).json()['data']
+        
+        counts = {conversation['id']: conversation['unread_count'] for conversation in data}
+        self.assertEqual(counts, {self.conversations[0].id: 0, self.conversations[1].id: 1})
+
+
+
+class ConversationSummaryTest(TestCase):
+    """Test the denormalized conversation summary used by the inbox"""
+    
+    def setUp(self):
+        """Set up a recruiter and a candidate with one conversation"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123",
+            first_name="Cand"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        self.recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        self.conversation = self.create_conversation("Backend Developer")
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def create_conversation(self, title):
+        job_listing = JobListing.objects.create(
+            job_title=title,
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter_app_user
+        )
+        return Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+    
+    def test_create_message_updates_summary(self):
+        """Test that a new message updates the last message and the recipient's counter"""
+        from chat.utils import create_message
+        create_message(self.conversation, self.recruiter_user, "Hello")
+        message = create_message(self.conversation, self.recruiter_user, "x" * 300)
+        
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message, message)
+        self.assertEqual(self.conversation.last_message_preview, "x" * Conversation.PREVIEW_LENGTH)
+        self.assertEqual(self.conversation.last_message_at, message.created_at)
+        self.assertEqual(self.conversation.updated_at, message.created_at)
+        self.assertEqual(self.conversation.candidate_unread_count, 2)
+        self.assertEqual(self.conversation.recruiter_unread_count, 0)
+    
+    def test_mark_read_resets_counter(self):
+        """Test that marking read resets only the reader's counter"""
+        from chat.utils import create_message, mark_conversation_messages_read
+        create_message(self.conversation, self.recruiter_user, "Hello")
+        create_message(self.conversation, self.candidate_user, "Hi")
+        
+        self.assertEqual(mark_conversation_messages_read(self.conversation, self.candidate_user), 1)
+        
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.candidate_unread_count, 0)
+        self.assertEqual(self.conversation.recruiter_unread_count, 1)
+    
+    def test_rebuild_summary(self):
+        """Test that rebuilding from messages matches the maintained summary"""
+        from chat.utils import create_message, rebuild_conversation_summary
+        create_message(self.conversation, self.recruiter_user, "Hello")
+        last = create_message(self.conversation, self.candidate_user, "Hi")
+        Conversation.objects.filter(id=self.conversation.id).update(
+            last_message=None, last_message_preview='', recruiter_unread_count=0, candidate_unread_count=0
+        )
+        
+        rebuild_conversation_summary(self.conversation)
+        
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message, last)
+        self.assertEqual(self.conversation.last_message_preview, "Hi")
+        self.assertEqual(self.conversation.recruiter_unread_count, 1)
+        self.assertEqual(self.conversation.candidate_unread_count, 1)
+    
+    def test_backfill_legacy_conversations(self):
+        """Test that the startup backfill only rebuilds conversations with messages but no summary"""
+        import io
+        from django.core.management import call_command
+        from chat.utils import create_message, mark_conversation_messages_read
+        Message.objects.create(conversation=self.conversation, sender=self.recruiter_user, content="Old", read_at=timezone.now())
+        legacy = Message.objects.create(conversation=self.conversation, sender=self.recruiter_user, content="Older")
+        current = self.create_conversation("Frontend Developer")
+        create_message(current, self.recruiter_user, "Hello")
+        self.create_conversation("Empty")
+        
+        output = io.StringIO()
+        call_command('rebuild_conversation_summaries', stdout=output)
+        self.assertIn('Rebuilt summaries of 1 conversations.', output.getvalue())
+        
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message, legacy)
+        self.assertEqual(self.conversation.get_unread_count(self.candidate_user), 1)
+        self.assertEqual(mark_conversation_messages_read(self.conversation, self.candidate_user), 1)
+        self.assertEqual(self.conversation.get_unread_count(self.candidate_user), 0)
+        
+        # Idempotent: a second run has nothing left to do
+        output = io.StringIO()
+        call_command('rebuild_conversation_summaries', stdout=output)
+        self.assertIn('Rebuilt summaries of 0 conversations.', output.getvalue())
+    
+    def test_inbox_queries_do_not_grow_with_conversations(self):
+        """Test that the inbox is served from one query regardless of its size"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from chat.utils import create_message
+        create_message(self.conversation, self.recruiter_user, "Hello")
+        self.client.force_login(self.candidate_user)
+        
+        with CaptureQueriesContext(connection) as one_conversation:
+            self.client.get(reverse('chat:get_conversations'))
+        for i in range(5):
+            create_message(self.create_conversation(f"Job {i}"), self.recruiter_user, f"Message {i}")
+        with CaptureQueriesContext(connection) as six_conversations:
+            response = self.client.get(reverse('chat:get_conversations'))
+        
+        self.assertEqual(len(six_conversations), len(one_conversation))
+        data = response.json()['data']
+        self.assertEqual(len(data), 6)
+        # Most recent first, with the summary fields
+        self.assertEqual(data[0]['last_message']['content'], "Message 4")
+        self.assertEqual(data[0]['last_message']['sender_id'], self.recruiter_user.id)
+        self.assertEqual(data[0]['unread_count'], 1)
+        self.assertEqual(data[0]['role'], 'candidate')
+
+
+class MessagePaginationTest(TestCase):
+    """Test the cursor-based paging of conversation messages"""
+    
+    def setUp(self):
+        """Set up a conversation with ten messages"""
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=recruiter_app_user
+        )
+        self.conversation = Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+        self.messages = [
+            Message.objects.create(
+                conversation=self.conversation,
+                sender=self.recruiter_user if i % 2 else self.candidate_user,
+                content=f"Message {i}"
+            )
+            for i in range(10)
+        ]
+        self.client.force_login(self.candidate_user)
+    
+    def get_page(self, **params):
+        response = self.client.get(reverse('chat:get_messages', args=[self.conversation.id]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+    
+    def test_latest_page(self):
+        """Test that without a cursor the latest messages are returned, oldest first"""
+        data = self.get_page(limit=4)
+        
+        self.assertEqual([m['content'] for m in data['messages']], [f"Message {i}" for i in range(6, 10)])
+        self.assertTrue(data['has_more'])
+        self.assertTrue(data['messages'][0]['is_sent_by_me'])
+        self.assertFalse(data['messages'][1]['is_sent_by_me'])
+    
+    def test_after_id_returns_only_new_messages(self):
+        """Test that polling with after_id returns only newer messages"""
+        data = self.get_page(after_id=self.messages[7].id)
+        self.assertEqual([m['id'] for m in data['messages']], [self.messages[8].id, self.messages[9].id])
+        self.assertFalse(data['has_more'])
+        
+        data = self.get_page(after_id=self.messages[9].id)
+        self.assertEqual(data['messages'], [])
+    
+    def test_before_id_pages_back(self):
+        """Test that before_id walks back through the history without gaps"""
+        data = self.get_page(limit=4)
+        seen = [m['id'] for m in data['messages']]
+        while data['has_more']:
+            data = self.get_page(before_id=seen[0], limit=4)
+            seen = [m['id'] for m in data['messages']] + seen
+        
+        self.assertEqual(seen, [message.id for message in self.messages])
+    
+    def test_queries_do_not_load_senders(self):
+        """Test that a page is served without fetching sender rows"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page()
+        
+        sql = [q['sql'] for q in queries]
+        conversation_query = next(i for i, q in enumerate(sql) if 'FROM "chat_conversation"' in q)
+        # Only the conversation (ETag and view) and one page of messages; no user rows after the session lookup
+        self.assertEqual(len(sql) - conversation_query, 3)
+        self.assertIn('FROM "chat_message"', sql[-1])
+        self.assertFalse(any('"auth_user"' in q for q in sql[conversation_query:]))
+    
+    def test_invalid_cursor(self):
+        """Test that malformed or conflicting cursors are rejected"""
+        url = reverse('chat:get_messages', args=[self.conversation.id])
+        self.assertEqual(self.client.get(url, {'after_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'after_id': 1, 'before_id': 5}).status_code, 400)
+
+
+class ConditionalPollingTest(TestCase):
+    """Test the ETags of the polled chat endpoints"""
+    
+    def setUp(self):
+        """Set up a recruiter and a candidate with one conversation"""
+        from django.core.cache import cache
+        cache.clear()
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=recruiter_app_user
+        )
+        self.conversation = Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+        self.urls = [
+            reverse('chat:get_conversations'),
+            reverse('chat:get_messages', args=[self.conversation.id]),
+            reverse('chat:get_notifications'),
+        ]
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def send(self, sender, content="Hello"):
+        from chat.utils import create_message, bump_unread_total, CANDIDATE_SIDE, RECRUITER_SIDE
+        with self.captureOnCommitCallbacks(execute=True):
+            create_message(self.conversation, sender, content)
+            if sender == self.recruiter_user:
+                bump_unread_total(self.candidate_user.id, CANDIDATE_SIDE)
+            else:
+                bump_unread_total(self.recruiter_user.id, RECRUITER_SIDE)
+    
+    def etags(self, user):
+        self.client.force_login(user)
+        etags = []
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            etags.append(response['ETag'])
+        return etags
+    
+    def test_unchanged_poll_is_not_modified(self):
+        """Test that repeating a poll with its ETag returns 304 without reading messages"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.send(self.recruiter_user)
+        etags = self.etags(self.candidate_user)
+        
+        for url, etag in zip(self.urls, etags):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertFalse(any('"chat_message"' in query['sql'] for query in queries))
+    
+    def test_new_message_changes_etags(self):
+        """Test that a new message invalidates every polled response of the recipient"""
+        before = self.etags(self.candidate_user)
+        self.send(self.recruiter_user)
+        after = self.etags(self.candidate_user)
+        
+        for old, new in zip(before, after):
+            self.assertNotEqual(old, new)
+    
+    def test_read_receipt_changes_sender_messages_etag(self):
+        """Test that the sender's messages poll changes when the recipient reads them"""
+        self.send(self.recruiter_user)
+        conversations_etag, messages_etag, notifications_etag = self.etags(self.recruiter_user)
+        
+        self.client.force_login(self.candidate_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('chat:mark_conversation_read', args=[self.conversation.id]))
+        
+        after = self.etags(self.recruiter_user)
+        self.assertNotEqual(after[1], messages_etag)
+        # The recruiter's own unread state did not change
+        self.assertEqual(after[2], notifications_etag)
+    
+    def test_etags_are_per_user_and_page(self):
+        """Test that ETags differ between participants and between message pages"""
+        self.send(self.recruiter_user)
+        self.assertNotEqual(self.etags(self.candidate_user)[1], self.etags(self.recruiter_user)[1])
+        
+        response = self.client.get(self.urls[1], {'after_id': 0})
+        self.assertNotEqual(response['ETag'], self.etags(self.recruiter_user)[1])
+    
+    def test_outsider_gets_no_etag(self):
+        """Test that a user outside the conversation always gets a 403 without an ETag"""
+        self.send(self.recruiter_user)
+        candidate_etag = self.etags(self.candidate_user)[1]
+        outsider = User.objects.create_user(username="outsider", email="outsider@example.com", password="pass")
+        AppUser.objects.create(user=outsider, role="worker")
+        self.client.force_login(outsider)
+        
+        for headers in [{}, {'HTTP_IF_NONE_MATCH': '*'}, {'HTTP_IF_NONE_MATCH': candidate_etag}]:
+            response = self.client.get(self.urls[1], **headers)
+            self.assertEqual(response.status_code, 403)
+            self.assertFalse(response.has_header('ETag'))
+
+
+class BulkReadStateTest(TestCase):
+    """Test the batched read marks"""
+    
+    def setUp(self):
+        """Set up a candidate with two conversations with the same recruiter"""
+        from django.core.cache import cache
+        from chat.utils import create_message
+        cache.clear()
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        
+        self.conversations = []
+        self.messages = []
+        for title in ("Backend Developer", "Frontend Developer"):
+            job_listing = JobListing.objects.create(
+                job_title=title,
+                company_name="Tech Corp",
+                about_company="About company",
+                job_description="Job description",
+                owner=recruiter_app_user
+            )
+            conversation = Conversation.objects.create(
+                job_listing=job_listing,
+                candidate=self.candidate_user,
+                recruiter=self.recruiter_user
+            )
+            self.conversations.append(conversation)
+            self.messages.append([
+                create_message(conversation, self.recruiter_user, f"{title} {i}") for i in range(3)
+            ])
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def test_moved_mark_clears_drifted_unread_total(self):
+        """Test that the cached badge total is cleared whenever a mark moves, even if no message counted as unread"""
+        import json
+        from django.core.cache import cache
+        from chat.utils import unread_total_cache_key, get_unread_total, CANDIDATE_SIDE
+        key = unread_total_cache_key(self.candidate_user.id, CANDIDATE_SIDE)
+        self.client.force_login(self.candidate_user)
+        # Counters that drifted from the read marks
+        Conversation.objects.filter(id__in=[c.id for c in self.conversations]).update(candidate_unread_count=0)
+        
+        cache.set(key, 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('chat:mark_conversation_read', args=[self.conversations[0].id]))
+        self.assertEqual(response.json()['data']['messages_marked'], 0)
+        self.assertEqual(get_unread_total(self.candidate_user, CANDIDATE_SIDE), 3)
+        
+        cache.set(key, 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('chat:mark_read'),
+                data=json.dumps({'conversations': [{'conversation_id': self.conversations[1].id}]}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.json()['data']['conversations'][0]['messages_marked'], 0)
+        self.assertEqual(get_unread_total(self.candidate_user, CANDIDATE_SIDE), 0)
+    
+    def test_batch_marks_without_writing_messages(self):
+        """Test that a batch of read marks is applied without touching message rows"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from chat.utils import mark_conversations_read, get_unread_counts
+        marks = {
+            self.conversations[0].id: self.messages[0][1].id,
+            self.conversations[1].id: None
+        }
+        
+        with CaptureQueriesContext(connection) as queries:
+            newly_read = mark_conversations_read(self.candidate_user, marks)
+        
+        self.assertEqual({conversation.id: count for conversation, count in newly_read.items()}, {
+            self.conversations[0].id: 2,
+            self.conversations[1].id: 3
+        })
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"chat_conversation"', updates[0])
+        self.assertEqual(get_unread_counts(self.candidate_user), {self.conversations[0].id: 1})
+        self.conversations[0].refresh_from_db()
+        self.assertEqual(self.conversations[0].candidate_last_read_message_id, self.messages[0][1].id)
+        self.assertEqual(self.conversations[0].candidate_unread_count, 1)
+        self.assertIsNotNone(self.conversations[0].candidate_last_read_at)
+    
+    def test_marks_only_move_forward(self):
+        """Test that stale, out of range and foreign marks are ignored or clamped"""
+        from chat.utils import mark_conversations_read
+        mark_conversations_read(self.candidate_user, {self.conversations[0].id: self.messages[0][2].id})
+        
+        self.assertEqual(mark_conversations_read(self.candidate_user, {self.conversations[0].id: self.messages[0][0].id}), {})
+        newly_read = mark_conversations_read(self.candidate_user, {self.conversations[1].id: 10 ** 9})
+        self.assertEqual(list(newly_read.values()), [3])
+        self.conversations[1].refresh_from_db()
+        self.assertEqual(self.conversations[1].candidate_last_read_message_id, self.messages[1][2].id)
+        
+        stranger = User.objects.create_user(username="stranger", password="testpass123")
+        self.assertEqual(mark_conversations_read(stranger, {self.conversations[0].id: None}), {})
+    
+    def test_mark_read_endpoint(self):
+        """Test the batch endpoint and the read state reported with messages"""
+        import json
+        self.client.force_login(self.candidate_user)
+        self.assertEqual(self.client.get(reverse('chat:get_notifications')).json()['data']['unread_messages_count'], 6)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('chat:mark_read'),
+                json.dumps({'conversations': [
+                    {'conversation_id': self.conversations[0].id, 'last_read_message_id': self.messages[0][0].id},
+                    {'conversation_id': self.conversations[1].id}
+                ]}),
+                content_type='application/json'
+            )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['data']['conversations']), 2)
+        self.assertEqual(self.client.get(reverse('chat:get_notifications')).json()['data']['unread_messages_count'], 2)
+        
+        self.client.force_login(self.recruiter_user)
+        messages = self.client.get(reverse('chat:get_messages', args=[self.conversations[0].id])).json()['data']['messages']
+        self.assertEqual([message['read_at'] is not None for message in messages], [True, False, False])
+    
+    def test_mark_read_endpoint_validation(self):
+        """Test that malformed batches are rejected"""
+        import json
+        self.client.force_login(self.candidate_user)
+        for body in ({}, {'conversations': [{'last_read_message_id': 1}]},
+                     {'conversations': [{'conversation_id': 'x'}]}):
+            response = self.client.post(reverse('chat:mark_read'), json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+    
+    def test_rebuild_moves_marks_past_legacy_reads(self):
+        """Test that messages read before read marks existed stay read after a rebuild"""
+        from chat.utils import rebuild_conversation_summary
+        Message.objects.filter(id__in=[m.id for m in self.messages[0][:2]]).update(read_at=timezone.now())
+        
+        rebuild_conversation_summary(self.conversations[0])
+        
+        self.conversations[0].refresh_from_db()
+        self.assertEqual(self.conversations[0].candidate_last_read_message_id, self.messages[0][1].id)
+        self.assertEqual(self.conversations[0].candidate_unread_count, 1)
+        self.assertEqual(self.conversations[0].get_unread_count(self.candidate_user), 1)
+
+
+class ExplainChatQueriesTest(TestCase):
+    """Test the explain_chat_queries management command"""
+    
+    def setUp(self):
+        """Set up a conversation with a few messages"""
+        from chat.utils import create_message
+        self.candidate_user = User.objects.create_user(username="candidate", password="testpass123")
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(username="recruiter", password="recruiterpass123")
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=recruiter_app_user
+        )
+        self.conversation = Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+        for i in range(5):
+            create_message(self.conversation, self.recruiter_user if i % 2 else self.candidate_user, f"Message {i}")
+    
+    def test_hot_paths_use_indexes(self):
+        """Test that every chat hot path is answered from an index"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        
+        call_command('explain_chat_queries', fail_on_scan=True, stdout=out)
+        
+        output = out.getvalue()
+        self.assertNotIn('full scan', output)
+        for index in ('chat_msg_conversation_id', 'chat_msg_conv_sender_id', 'chat_msg_conv_created'):
+            self.assertIn(index, output)
+    
+    def test_mark_read_is_rolled_back(self):
+        """Test that explaining the mark read path does not change the read state"""
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('explain_chat_queries', conversation=self.conversation.id, stdout=StringIO())
+        
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.candidate_last_read_message_id, 0)
+        self.assertEqual(self.conversation.candidate_unread_count, 2)
+
+
+class MessageArchiveTest(TestCase):
+    """Test the archival of old messages and the read-through from get_messages"""
+    
+    def setUp(self):
+        """Set up a conversation with ten messages, the first eight of them old"""
+        from datetime import timedelta
+        from chat.utils import create_message, mark_conversations_read
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(username="candidate", password="testpass123")
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(username="recruiter", password="recruiterpass123")
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=recruiter_app_user
+        )
+        self.conversation = Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+        self.messages = [
+            create_message(self.conversation, self.recruiter_user if i % 2 else self.candidate_user, f"Message {i}")
+            for i in range(10)
+        ]
+        Message.objects.filter(id__in=[m.id for m in self.messages[:8]]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        # The candidate read the recruiter's messages up to message 5; the recruiter read everything
+        mark_conversations_read(self.candidate_user, {self.conversation.id: self.messages[5].id})
+        mark_conversations_read(self.recruiter_user, {self.conversation.id: None})
+        self.client.force_login(self.candidate_user)
+    
+    def archive(self):
+        from datetime import timedelta
+        from chat.utils import archive_messages
+        return archive_messages(timezone.now() - timedelta(days=180), batch_size=3)
+    
+    def get_page(self, **params):
+        response = self.client.get(reverse('chat:get_messages', args=[self.conversation.id]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+    
+    def test_archives_only_old_read_messages(self):
+        """Test that unread, recent and last messages stay in the hot table"""
+        from chat.models import ArchivedMessage
+        self.conversation.refresh_from_db()
+        unread_before = self.conversation.get_unread_count(self.candidate_user)
+        self.assertEqual(unread_before, 2)
+        
+        # Messages 0-6 are old and read (message 7 is old but unread by the candidate)
+        self.assertEqual(self.archive(), 7)
+        
+        self.assertEqual(
+            list(Message.objects.filter(conversation=self.conversation).values_list('id', flat=True)),
+            [m.id for m in self.messages[7:]]
+        )
+        self.assertEqual(
+            list(ArchivedMessage.objects.values_list('id', flat=True)), [m.id for m in self.messages[:7]]
+        )
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.archived_message_id, self.messages[6].id)
+        self.assertEqual(self.conversation.last_message_id, self.messages[9].id)
+        self.assertEqual(self.conversation.get_unread_count(self.candidate_user), unread_before)
+        self.assertEqual(self.archive(), 0)
+    
+    def test_pages_read_through_the_archive(self):
+        """Test that scrolling back returns archived messages in order without gaps"""
+        self.archive()
+        
+        data = self.get_page(limit=4)
+        seen = [m['id'] for m in data['messages']]
+        while data['has_more']:
+            data = self.get_page(before_id=seen[0], limit=4)
+            seen = [m['id'] for m in data['messages']] + seen
+        
+        self.assertEqual(seen, [m.id for m in self.messages])
+        data = self.get_page(after_id=self.messages[4].id, limit=3)
+        self.assertEqual([m['id'] for m in data['messages']], [m.id for m in self.messages[5:8]])
+        self.assertTrue(data['has_more'])
+    
+    def test_polling_does_not_read_the_archive(self):
+        """Test that polls for new messages only query the hot table"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.archive()
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(after_id=self.messages[8].id)
+        
+        self.assertFalse(any('chat_archivedmessage' in query['sql'] for query in queries))
+    
+    def test_command(self):
+        """Test the archive_messages management command"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        
+        call_command('archive_messages', days=180, stdout=out)
+        
+        self.assertIn('Archived 7 messages', out.getvalue())
+
+
+class RecordingEventBroker:
+    """Event broker that keeps published events in memory (see ChatEventsTest)"""
+    published = []
+    
+    def publish(self, user_id, event):
+        self.published.append((user_id, event))
+
+
+class ChatEventsTest(TestCase):
+    """Test the server push of chat events"""
+    
+    def setUp(self):
+        """Set up a recruiter and a candidate with one conversation"""
+        from django.core.cache import cache
+        cache.clear()
+        RecordingEventBroker.published = []
+        self.client = Client()
+        self.candidate_user = User.objects.create_user(
+            username="candidate",
+            email="candidate@example.com",
+            password="testpass123"
+        )
+        AppUser.objects.create(user=self.candidate_user, role="worker")
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        recruiter_app_user = AppUser.objects.create(user=self.recruiter_user, role="recruiter")
+        job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=recruiter_app_user
+        )
+        self.conversation = Conversation.objects.create(
+            job_listing=job_listing,
+            candidate=self.candidate_user,
+            recruiter=self.recruiter_user
+        )
+    
+    def tearDown(self):
+        from django.core.cache import cache
+        cache.clear()
+    
+    def test_in_memory_broker_fan_out(self):
+        """Test that events published from another thread reach every stream of the user"""
+        import asyncio
+        import threading
+        from chat.events import InMemoryChatEventBroker
+        broker = InMemoryChatEventBroker()
+        
+        async def receive():
+            first = broker.listen(1, heartbeat=5)
+            second = broker.listen(1, heartbeat=5)
+            other_user = broker.listen(2, heartbeat=0.05)
+            # Subscriptions are registered when the generators start waiting
+            tasks = [asyncio.ensure_future(events.__anext__()) for events in (first, second, other_user)]
+            await asyncio.sleep(0.01)
+            self.assertEqual(broker.subscriber_count(1), 2)
+            
+            publisher = threading.Thread(target=broker.publish, args=(1, {'type': 'unread', 'data': {}}))
+            publisher.start()
+            publisher.join()
+            results = await asyncio.gather(*tasks)
+            for events in (first, second, other_user):
+                await events.aclose()
+            return results
+        
+        first, second, other_user = asyncio.run(receive())
+        
+        self.assertEqual(first, {'type': 'unread', 'data': {}})
+        self.assertEqual(second, first)
+        # No event for the other user, only a heartbeat
+        self.assertIsNone(other_user)
+        self.assertEqual(broker.subscriber_count(1), 0)
+    
+    @override_settings(CHAT_EVENT_BROKER='chat.tests.RecordingEventBroker')
+    def test_send_message_publishes_events(self):
+        """Test that a sent message is pushed to both participants with the recipient's unread total"""
+        import json
+        self.client.force_login(self.recruiter_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('chat:send_message'),
+                json.dumps({'conversation_id': self.conversation.id, 'content': 'Hello'}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 201)
+        
+        events = RecordingEventBroker.published
+        message_events = {user_id: event['data'] for user_id, event in events if event['type'] == 'message'}
+        self.assertEqual(set(message_events), {self.recruiter_user.id, self.candidate_user.id})
+        self.assertEqual(message_events[self.candidate_user.id]['message']['content'], 'Hello')
+        self.assertFalse(message_events[self.candidate_user.id]['message']['is_sent_by_me'])
+        self.assertTrue(message_events[self.recruiter_user.id]['message']['is_sent_by_me'])
+        unread_events = [(user_id, event['data']) for user_id, event in events if event['type'] == 'unread']
+        self.assertEqual(unread_events, [
+            (self.candidate_user.id, {'unread_messages_count': 1, 'has_unread_messages': True})
+        ])
+    
+    @override_settings(CHAT_EVENT_BROKER='chat.tests.RecordingEventBroker')
+    def test_mark_read_publishes_read_receipt(self):
+        """Test that reading a conversation notifies the sender and resets the reader's total"""
+        from chat.utils import create_message
+        create_message(self.conversation, self.recruiter_user, "Hello")
+        self.client.force_login(self.candidate_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('chat:mark_conversation_read', args=[self.conversation.id]))
+        
+        events = [(user_id, event['type']) for user_id, event in RecordingEventBroker.published]
+        self.assertEqual(events, [(self.recruiter_user.id, 'read'), (self.candidate_user.id, 'unread')])
+        self.assertEqual(RecordingEventBroker.published[0][1]['data']['reader_id'], self.candidate_user.id)
+        self.assertEqual(RecordingEventBroker.published[1][1]['data']['unread_messages_count'], 0)
+    
+    def test_event_stream_requires_login_and_asgi(self):
+        """Test that the stream is refused to anonymous users and under WSGI"""
+        response = self.client.get(reverse('chat:events'))
+        self.assertEqual(response.status_code, 401)
+        
+        self.client.force_login(self.candidate_user)
+        response = self.client.get(reverse('chat:events'))
+        self.assertEqual(response.status_code, 503)
+    
+    async def test_event_stream_delivers_events(self):
+        """Test that the ASGI stream starts with the unread total and forwards published events"""
+        from asgiref.sync import sync_to_async
+        from chat.events import get_event_broker
+        from chat.utils import create_message
+        await sync_to_async(create_message)(self.conversation, self.recruiter_user, "Hello")
+        await sync_to_async(self.async_client.force_login)(self.candidate_user)
+        
+        response = await self.async_client.get(reverse('chat:events'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        
+        chunks = response.streaming_content
+        self.assertTrue((await chunks.__anext__()).startswith(b'retry: '))
+        self.assertEqual(
+            await chunks.__anext__(),
+            b'event: unread\ndata: {"unread_messages_count": 1, "has_unread_messages": true}\n\n'
+        )
+        next_chunk = asyncio.ensure_future(chunks.__anext__())
+        await asyncio.sleep(0.01)
+        get_event_broker().publish(self.candidate_user.id, {'type': 'read', 'data': {'conversation_id': 1}})
+        self.assertEqual(await next_chunk, b'event: read\ndata: {"conversation_id": 1}\n\n')
+        await chunks.aclose()
+
 
 @pytest.mark.django_db
 class TestChatModels:
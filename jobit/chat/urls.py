@@ -10,5 +10,7 @@ urlpatterns = [
     path('conversations/', views.get_conversations, name='get_conversations'),
     path('conversations/<int:conversation_id>/messages/', views.get_messages, name='get_messages'),
     path('conversations/<int:conversation_id>/mark-read/', views.mark_conversation_read, name='mark_conversation_read'),
+    path('mark-read/', views.mark_read, name='mark_read'),
     path('notifications/', views.get_notifications, name='get_notifications'),
+    path('events/', views.events, name='events'),
 ] 
\ No newline at end of file
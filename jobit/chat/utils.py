@@ -0,0 +1,351 @@
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Max, PositiveIntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import ArchivedMessage, Conversation, Message
+
+RECRUITER_SIDE = 'recruiter'
+CANDIDATE_SIDE = 'candidate'
+
+
+def side_for_role(role):
+    """Conversation side whose messages count for a user role ('recruiter' or 'worker')."""
+    return RECRUITER_SIDE if role == 'recruiter' else CANDIDATE_SIDE
+
+
+def unread_total_cache_key(user_id, side):
+    return f"chat_unread:{user_id}:{side}"
+
+
+def get_unread_counts(user, side=None):
+    """
+    Unread messages per conversation for a user, as {conversation_id: count}, in one grouped query.
+    Only conversations where the user is on the given side are counted (both sides if None);
+    conversations without unread messages are left out.
+    """
+    # Unread messages are the ones after the user's read high-water mark
+    as_recruiter = Q(conversation__recruiter=user, id__gt=F('conversation__recruiter_last_read_message_id'))
+    as_candidate = Q(conversation__candidate=user, id__gt=F('conversation__candidate_last_read_message_id'))
+    messages = Message.objects.exclude(sender=user)
+    if side == RECRUITER_SIDE:
+        messages = messages.filter(as_recruiter)
+    elif side == CANDIDATE_SIDE:
+        messages = messages.filter(as_candidate)
+    else:
+        messages = messages.filter(as_recruiter | as_candidate)
+
+    rows = messages.order_by().values('conversation_id').annotate(count=Count('id'))
+    return {row['conversation_id']: row['count'] for row in rows}
+
+
+def get_unread_total(user, side):
+    """
+    Total unread messages of a user on one conversation side.
+    Served from a per-user cached counter that send_message bumps and
+    mark_conversation_read clears; a miss is recomputed with get_unread_counts.
+    """
+    key = unread_total_cache_key(user.id, side)
+    total = cache.get(key)
+    if total is None:
+        total = sum(get_unread_counts(user, side).values())
+        # add() keeps a counter that was bumped meanwhile
+        cache.add(key, total, settings.CHAT_UNREAD_CACHE_TIMEOUT)
+    return total
+
+
+def bump_unread_total(user_id, side, amount=1):
+    """Increment a cached unread counter after the current transaction commits."""
+    def bump():
+        try:
+            cache.incr(unread_total_cache_key(user_id, side), amount)
+        except ValueError:
+            # Not cached; the next read recomputes it
+            pass
+    transaction.on_commit(bump)
+
+
+def clear_unread_total(user_id, side):
+    """
+    Drop a cached unread counter so it is recomputed on the next read.
+    It is dropped again after commit in case a read re-cached the old count meanwhile.
+    """
+    key = unread_total_cache_key(user_id, side)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def make_etag(*parts):
+    """Compact ETag value from the parts a response depends on."""
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def inbox_version(user):
+    """
+    Version token of a user's conversation list, read from the conversation
+    summaries only. It changes with every new conversation or message and when
+    the user's unread counters change; no message rows are read.
+    """
+    summary = Conversation.objects.filter(Q(recruiter=user) | Q(candidate=user)).aggregate(
+        count=Count('id'),
+        last_message_id=Max('last_message_id'),
+        updated_at=Max('updated_at'),
+        recruiter_unread=Sum('recruiter_unread_count', filter=Q(recruiter=user)),
+        candidate_unread=Sum('candidate_unread_count', filter=Q(candidate=user))
+    )
+    return '-'.join(str(summary[key]) for key in sorted(summary))
+
+
+def conversation_version(conversation):
+    """
+    Version token of a conversation's messages: the last message and both read
+    marks, so new messages and read receipts of either side change it.
+    """
+    return (
+        f"{conversation.last_message_id}-{conversation.recruiter_last_read_message_id}"
+        f"-{conversation.candidate_last_read_message_id}"
+    )
+
+
+def create_message(conversation, sender, content):
+    """
+    Store a message and update the conversation summary (last message, the
+    recipient's unread counter, updated_at) in the same transaction.
+    """
+    with transaction.atomic():
+        message = Message.objects.create(
+            conversation=conversation,
+            sender=sender,
+            content=content,
+            created_at=timezone.now()
+        )
+        recipient_field = 'candidate_unread_count' if sender.id == conversation.recruiter_id else 'recruiter_unread_count'
+        Conversation.objects.filter(id=conversation.id).update(
+            last_message=message,
+            last_message_preview=content[:Conversation.PREVIEW_LENGTH],
+            last_message_at=message.created_at,
+            updated_at=message.created_at,
+            **{recipient_field: F(recipient_field) + 1}
+        )
+    return message
+
+
+def mark_conversations_read(user, read_marks):
+    """
+    Apply the read marks of a user, {conversation_id: last read message id}, in bulk.
+    A mark of None means everything up to the conversation's last message.
+
+    Marks only move forward and never past the last message; conversations the
+    user is not part of are skipped. The read state lives on the conversation
+    rows (read high-water mark, time and unread counter), so no message rows are
+    written: one query counts what stays unread and one UPDATE per conversation
+    side stores the new state.
+
+    Returns {conversation: number of messages newly read} for the conversations
+    whose mark moved; the conversation objects carry the new read state.
+    """
+    read_marks = {int(conversation_id): mark for conversation_id, mark in read_marks.items()}
+    if not read_marks:
+        return {}
+
+    with transaction.atomic():
+        # Rows are locked in id order so concurrent batches cannot deadlock, and a
+        # message sent meanwhile is counted against the new mark
+        conversations = list(
+            Conversation.objects.select_for_update().filter(
+                Q(recruiter=user) | Q(candidate=user), id__in=read_marks
+            ).only(
+                'id', 'recruiter_id', 'candidate_id', 'last_message_id',
+                'recruiter_last_read_message_id', 'candidate_last_read_message_id',
+                'recruiter_unread_count', 'candidate_unread_count'
+            ).order_by('id')
+        )
+
+        new_marks = {}
+        for conversation in conversations:
+            last_message_id = conversation.last_message_id or 0
+            mark = read_marks[conversation.id]
+            mark = last_message_id if mark is None else min(int(mark), last_message_id)
+            if mark > getattr(conversation, conversation.last_read_field(user)):
+                new_marks[conversation] = mark
+        if not new_marks:
+            return {}
+
+        still_unread = Message.objects.filter(
+            reduce(or_, (Q(conversation_id=conversation.id, id__gt=mark) for conversation, mark in new_marks.items()))
+        ).exclude(sender=user).order_by().values('conversation_id').annotate(count=Count('id'))
+        still_unread = {row['conversation_id']: row['count'] for row in still_unread}
+
+        now = timezone.now()
+        newly_read = {}
+        for side in (RECRUITER_SIDE, CANDIDATE_SIDE):
+            side_marks = {
+                conversation: mark for conversation, mark in new_marks.items()
+                if (conversation.recruiter_id == user.id) == (side == RECRUITER_SIDE)
+            }
+            if not side_marks:
+                continue
+            for conversation, mark in side_marks.items():
+                unread = still_unread.get(conversation.id, 0)
+                newly_read[conversation] = max(getattr(conversation, f'{side}_unread_count') - unread, 0)
+                setattr(conversation, f'{side}_last_read_message_id', mark)
+                setattr(conversation, f'{side}_last_read_at', now)
+                setattr(conversation, f'{side}_unread_count', unread)
+            Conversation.objects.filter(id__in=[conversation.id for conversation in side_marks]).update(**{
+                f'{side}_last_read_message_id': Case(
+                    *[When(id=conversation.id, then=Value(mark)) for conversation, mark in side_marks.items()],
+                    output_field=BigIntegerField()
+                ),
+                f'{side}_unread_count': Case(
+                    *[When(id=conversation.id, then=Value(still_unread.get(conversation.id, 0)))
+                      for conversation in side_marks],
+                    output_field=PositiveIntegerField()
+                ),
+                f'{side}_last_read_at': now
+            })
+    return newly_read
+
+
+def mark_conversation_messages_read(conversation, user):
+    """
+    Mark everything the other participant sent so far as read.
+    Returns the number of messages that were unread.
+    """
+    newly_read = mark_conversations_read(user, {conversation.id: None})
+    for updated in newly_read:
+        for field in (
+            'recruiter_last_read_message_id', 'candidate_last_read_message_id',
+            'recruiter_last_read_at', 'candidate_last_read_at',
+            'recruiter_unread_count', 'candidate_unread_count'
+        ):
+            setattr(conversation, field, getattr(updated, field))
+    return sum(newly_read.values())
+
+
+def get_message_page(conversation, after_id=None, before_id=None, limit=None):
+    """
+    One page of a conversation's messages in chronological order, as (messages, has_more).
+
+    With after_id the page holds the messages newer than after_id (has_more: even newer
+    ones exist); otherwise the latest messages, or the ones older than before_id
+    (has_more: even older ones exist). Pages are cut on the message id, so a page costs
+    the same however long the conversation is.
+
+    Archived messages are read through transparently: the archive is only queried
+    when the page reaches below conversation.archived_message_id, so polling for new
+    messages never touches it.
+    """
+    limit = limit or settings.CHAT_MESSAGES_PAGE_SIZE
+    fields = ('id', 'sender_id', 'content', 'created_at', 'read_at')
+    tables = (
+        Message.objects.filter(conversation_id=conversation.id).only(*fields),
+        ArchivedMessage.objects.filter(conversation_id=conversation.id).only(*fields),
+    )
+    archived_message_id = conversation.archived_message_id
+
+    if after_id is not None:
+        page = list(tables[0].filter(id__gt=after_id).order_by('id')[:limit + 1])
+        if after_id < archived_message_id:
+            page = sorted(
+                page + list(tables[1].filter(id__gt=after_id).order_by('id')[:limit + 1]),
+                key=lambda message: message.id
+            )[:limit + 1]
+        return page[:limit], len(page) > limit
+
+    if before_id is not None:
+        tables = tuple(table.filter(id__lt=before_id) for table in tables)
+    page = list(tables[0].order_by('-id')[:limit + 1])
+    # Archived messages are older than the hot ones unless the hot page reaches below them
+    if archived_message_id and (len(page) <= limit or page[-1].id < archived_message_id):
+        page = sorted(
+            page + list(tables[1].order_by('-id')[:limit + 1]),
+            key=lambda message: message.id, reverse=True
+        )[:limit + 1]
+    has_more = len(page) > limit
+    page = page[:limit]
+    page.reverse()
+    return page, has_more
+
+
+def archive_messages(older_than, batch_size=None):
+    """
+    Move read messages created before older_than from Message to ArchivedMessage,
+    one batch per transaction. Returns the number of messages archived.
+
+    Unread messages and each conversation's last message stay in the hot table,
+    so unread counts and inbox summaries never need the archive.
+    """
+    batch_size = batch_size or settings.CHAT_ARCHIVE_BATCH_SIZE
+    archivable = Message.objects.filter(
+        created_at__lt=older_than,
+        id__lt=F('conversation__last_message_id')
+    ).filter(
+        Q(read_at__isnull=False)
+        | Q(sender_id=F('conversation__recruiter_id'), id__lte=F('conversation__candidate_last_read_message_id'))
+        | Q(sender_id=F('conversation__candidate_id'), id__lte=F('conversation__recruiter_last_read_message_id'))
+    ).order_by('id')
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(archivable[:batch_size])
+            if not batch:
+                break
+            ArchivedMessage.objects.bulk_create([
+                ArchivedMessage(
+                    id=message.id,
+                    conversation_id=message.conversation_id,
+                    sender_id=message.sender_id,
+                    content=message.content,
+                    created_at=message.created_at,
+                    read_at=message.read_at
+                )
+                for message in batch
+            ], ignore_conflicts=True)
+            Message.objects.filter(id__in=[message.id for message in batch]).delete()
+
+            archived_ids = {}
+            for message in batch:
+                archived_ids[message.conversation_id] = max(archived_ids.get(message.conversation_id, 0), message.id)
+            for conversation_id, message_id in archived_ids.items():
+                Conversation.objects.filter(
+                    id=conversation_id, archived_message_id__lt=message_id
+                ).update(archived_message_id=message_id)
+        archived += len(batch)
+        print(f"📦 Archived {archived} messages")
+    return archived
+
+
+def rebuild_conversation_summary(conversation):
+    """Recompute the denormalized summary of a conversation from its messages."""
+    last_message = conversation.messages.order_by('-created_at', '-id').first()
+    # Messages marked read one by one (read_at) before read marks existed move the marks forward
+    legacy_read = conversation.messages.filter(read_at__isnull=False).values('sender_id').annotate(last_id=Max('id'))
+    legacy_read = {row['sender_id']: row['last_id'] for row in legacy_read}
+    conversation.recruiter_last_read_message_id = max(
+        conversation.recruiter_last_read_message_id, legacy_read.get(conversation.candidate_id, 0)
+    )
+    conversation.candidate_last_read_message_id = max(
+        conversation.candidate_last_read_message_id, legacy_read.get(conversation.recruiter_id, 0)
+    )
+
+    conversation.last_message = last_message
+    conversation.last_message_preview = last_message.content[:Conversation.PREVIEW_LENGTH] if last_message else ''
+    conversation.last_message_at = last_message.created_at if last_message else None
+    conversation.recruiter_unread_count = conversation.get_unread_count(conversation.recruiter)
+    conversation.candidate_unread_count = conversation.get_unread_count(conversation.candidate)
+    # Queryset update keeps updated_at (auto_now) unchanged
+    Conversation.objects.filter(id=conversation.id).update(
+        last_message=conversation.last_message,
+        last_message_preview=conversation.last_message_preview,
+        last_message_at=conversation.last_message_at,
+        recruiter_last_read_message_id=conversation.recruiter_last_read_message_id,
+        candidate_last_read_message_id=conversation.candidate_last_read_message_id,
+        recruiter_unread_count=conversation.recruiter_unread_count,
+        candidate_unread_count=conversation.candidate_unread_count
+    )
@@ -1,16 +1,63 @@
 import json
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.http import JsonResponse, StreamingHttpResponse, HttpResponseNotAllowed
+from django.views.decorators.http import require_http_methods, condition
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
+from django.db.models import Q
 from .models import Conversation, Message
 from jobs.models import JobListing
 from users.models import AppUser
+from users.photos import profile_photo_url, LIST_THUMBNAIL_SIZE
+from .utils import (
+    RECRUITER_SIDE, CANDIDATE_SIDE, side_for_role, get_unread_total, bump_unread_total, clear_unread_total,
+    create_message, mark_conversation_messages_read, mark_conversations_read, get_message_page, make_etag, inbox_version,
+    conversation_version
+)
+from .events import event_stream, notify_message_sent, notify_conversation_read
 
 # Create your views here.
 
+# ETags of the polled endpoints. They are computed before the view runs, so an
+# unchanged poll is answered with 304 Not Modified without reading any messages.
+# Errors fall back to a regular response.
+
+def conversations_etag(request):
+    try:
+        return make_etag('conversations', request.user.id, inbox_version(request.user))
+    except Exception as e:
+        print(f"⚠️ Could not compute conversations ETag: {str(e)}")
+        return None
+
+def messages_etag(request, conversation_id):
+    try:
+        conversation = Conversation.objects.only(
+            'recruiter_id', 'candidate_id', 'last_message_id', 'recruiter_last_read_message_id',
+            'candidate_last_read_message_id'
+        ).filter(id=conversation_id).first()
+        # No ETag for outsiders, so they always get the 403 and never a 304
+        if conversation is None or request.user.id not in (conversation.recruiter_id, conversation.candidate_id):
+            return None
+        return make_etag(
+            'messages', request.user.id, conversation.id, conversation_version(conversation), request.GET.urlencode()
+        )
+    except Exception as e:
+        print(f"⚠️ Could not compute messages ETag: {str(e)}")
+        return None
+
+def notifications_etag(request):
+    try:
+        total_unread = get_unread_total(request.user, side_for_role(request.user.appuser.role))
+        return make_etag('notifications', request.user.id, total_unread)
+    except Exception as e:
+        print(f"⚠️ Could not compute notifications ETag: {str(e)}")
+        return None
+
 @login_required
 def index(request):
     return render(request, 'messages/index.html')
@@ -133,17 +180,17 @@ def send_message(request):
                 'message': 'You are not authorized to send messages in this conversation'
             }, status=403)
         
-        # Create the message
-        message = Message.objects.create(
-            conversation=conversation,
-            sender=current_user,
-            content=content,
-            created_at=timezone.now()
-        )
+        # Create the message and update the conversation summary
+        message = create_message(conversation, current_user, content)
         
-        # Update conversation's updated_at timestamp
-        conversation.updated_at = timezone.now()
-        conversation.save()
+        # The recipient has one more unread message
+        if current_user == conversation.recruiter:
+            bump_unread_total(conversation.candidate_id, CANDIDATE_SIDE)
+        else:
+            bump_unread_total(conversation.recruiter_id, RECRUITER_SIDE)
+        
+        # Push the message to open chat tabs of both participants
+        notify_message_sent(conversation, message)
         
         return JsonResponse({
             'status': 'success',
@@ -176,56 +223,25 @@ def send_message(request):
 
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=conversations_etag)
 def get_conversations(request):
     """
     Get all conversations for the current user (both as recruiter and candidate).
     """
     try:
-        # Get conversations where user is recruiter
-        recruiter_conversations = Conversation.objects.filter(recruiter=request.user)
-        
-        # Get conversations where user is candidate
-        candidate_conversations = Conversation.objects.filter(candidate=request.user)
+        # One query over the denormalized conversation summaries, most recent first
+        conversations = Conversation.objects.filter(
+            Q(recruiter=request.user) | Q(candidate=request.user)
+        ).select_related(
+            'job_listing__location', 'recruiter__appuser', 'candidate__appuser', 'last_message'
+        ).order_by('-updated_at')
         
-        # Combine and serialize conversations
         conversations_data = []
-        
-        for conversation in recruiter_conversations:
-            last_message = conversation.get_last_message()
-            # Get profile photo for the candidate
-            from jobs.views import get_profile_photo
-            profile_photo = get_profile_photo(conversation.candidate.id)
-            
-            conversations_data.append({
-                'id': conversation.id,
-                'job_listing': {
-                    'id': conversation.job_listing.id,
-                    'title': conversation.job_listing.job_title,
-                    'company': conversation.job_listing.company_name,
-                    'location': str(conversation.job_listing.location) if conversation.job_listing.location else None,
-                    'job_model': conversation.job_listing.job_model
-                },
-                'other_user': {
-                    'id': conversation.candidate.id,
-                    'name': f"{conversation.candidate.first_name} {conversation.candidate.last_name}",
-                    'position': getattr(conversation.candidate.appuser, 'position', ''),
-                    'profile_photo': profile_photo
-                },
-                'last_message': {
-                    'content': last_message.content if last_message else '',
-                    'created_at': last_message.created_at.isoformat() if last_message else None,
-                    'sender_id': last_message.sender.id if last_message else None
-                },
-                'unread_count': conversation.get_unread_count(request.user),
-                'updated_at': conversation.updated_at.isoformat(),
-                'role': 'recruiter'
-            })
-        
-        for conversation in candidate_conversations:
-            last_message = conversation.get_last_message()
-            # Get profile photo for the recruiter
-            from jobs.views import get_profile_photo
-            profile_photo = get_profile_photo(conversation.recruiter.id)
+        for conversation in conversations:
+            is_recruiter = conversation.recruiter_id == request.user.id
+            other_user = conversation.candidate if is_recruiter else conversation.recruiter
+            last_message = conversation.last_message
             
             conversations_data.append({
                 'id': conversation.id,
@@ -237,24 +253,21 @@ def get_conversations(request):
                     'job_model': conversation.job_listing.job_model
                 },
                 'other_user': {
-                    'id': conversation.recruiter.id,
-                    'name': f"{conversation.recruiter.first_name} {conversation.recruiter.last_name}",
-                    'position': getattr(conversation.recruiter.appuser, 'position', ''),
-                    'profile_photo': profile_photo
+                    'id': other_user.id,
+                    'name': f"{other_user.first_name} {other_user.last_name}",
+                    'position': getattr(other_user.appuser, 'position', ''),
+                    'profile_photo': profile_photo_url(other_user.appuser, LIST_THUMBNAIL_SIZE)
                 },
                 'last_message': {
-                    'content': last_message.content if last_message else '',
-                    'created_at': last_message.created_at.isoformat() if last_message else None,
-                    'sender_id': last_message.sender.id if last_message else None
+                    'content': conversation.last_message_preview,
+                    'created_at': conversation.last_message_at.isoformat() if conversation.last_message_at else None,
+                    'sender_id': last_message.sender_id if last_message else None
                 },
-                'unread_count': conversation.get_unread_count(request.user),
+                'unread_count': conversation.recruiter_unread_count if is_recruiter else conversation.candidate_unread_count,
                 'updated_at': conversation.updated_at.isoformat(),
-                'role': 'candidate'
+                'role': 'recruiter' if is_recruiter else 'candidate'
             })
         
-        # Sort by updated_at (most recent first)
-        conversations_data.sort(key=lambda x: x['updated_at'], reverse=True)
-        
         return JsonResponse({
             'status': 'success',
             'data': conversations_data
@@ -268,26 +281,16 @@ def get_conversations(request):
 
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=notifications_etag)
 def get_notifications(request):
     """
     Get notification data for the current user (unread message count).
     """
     try:
-        # Get user role to determine which conversations to check
+        # Only conversations on the side of the user's role count
         user_role = request.user.appuser.role
-        
-        total_unread = 0
-        
-        if user_role == 'recruiter':
-            # Recruiter: check conversations where they are the recruiter
-            conversations = Conversation.objects.filter(recruiter=request.user)
-        elif user_role == 'worker':
-            # Worker: check conversations where they are the candidate
-            conversations = Conversation.objects.filter(candidate=request.user)
-        
-        # Count unread messages in relevant conversations
-        for conversation in conversations:
-            total_unread += conversation.get_unread_count(request.user)
+        total_unread = get_unread_total(request.user, side_for_role(user_role))
         
         return JsonResponse({
             'status': 'success',
@@ -305,42 +308,70 @@ def get_notifications(request):
 
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=messages_etag)
 def get_messages(request, conversation_id):
     """
-    Get all messages for a specific conversation.
+    Get one page of messages for a specific conversation, oldest first.
+    Without parameters the latest page is returned. ?after_id=<id> returns only the
+    messages newer than <id> (polling); ?before_id=<id> returns the page before <id>
+    (scrolling back). ?limit= sets the page size.
     """
     try:
         # Get the conversation
-        conversation = get_object_or_404(Conversation, id=conversation_id)
+        conversation = get_object_or_404(
+            Conversation.objects.only(
+                'id', 'recruiter_id', 'candidate_id', 'recruiter_last_read_message_id', 'candidate_last_read_message_id',
+                'recruiter_last_read_at', 'candidate_last_read_at', 'archived_message_id'
+            ),
+            id=conversation_id
+        )
         
         # Verify user is part of this conversation
         current_user = request.user
-        if current_user not in [conversation.recruiter, conversation.candidate]:
+        if current_user.id not in [conversation.recruiter_id, conversation.candidate_id]:
             return JsonResponse({
                 'status': 'error',
                 'message': 'You are not authorized to view messages in this conversation'
             }, status=403)
         
-        # Get all messages for this conversation
-        messages = conversation.messages.all()
+        try:
+            after_id = int(request.GET['after_id']) if request.GET.get('after_id') else None
+            before_id = int(request.GET['before_id']) if request.GET.get('before_id') else None
+            limit = int(request.GET['limit']) if request.GET.get('limit') else settings.CHAT_MESSAGES_PAGE_SIZE
+        except ValueError:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'after_id, before_id and limit must be integers'
+            }, status=400)
+        if after_id is not None and before_id is not None:
+            return JsonResponse({
+                'status': 'error',
+                'message': 'Use either after_id or before_id'
+            }, status=400)
+        limit = max(1, min(limit, settings.CHAT_MESSAGES_MAX_PAGE_SIZE))
+        
+        messages, has_more = get_message_page(conversation, after_id=after_id, before_id=before_id, limit=limit)
         
         # Serialize messages
         messages_data = []
         for message in messages:
+            read_at = conversation.message_read_at(message)
             messages_data.append({
                 'id': message.id,
                 'content': message.content,
-                'sender_id': message.sender.id,
-                'is_sent_by_me': message.sender == current_user,
+                'sender_id': message.sender_id,
+                'is_sent_by_me': message.sender_id == current_user.id,
                 'created_at': message.created_at.isoformat(),
-                'read_at': message.read_at.isoformat() if message.read_at else None
+                'read_at': read_at.isoformat() if read_at else None
             })
         
         return JsonResponse({
             'status': 'success',
             'data': {
                 'conversation_id': conversation.id,
-                'messages': messages_data
+                'messages': messages_data,
+                'has_more': has_more
             }
         }, status=200)
         
@@ -356,6 +387,76 @@ def get_messages(request, conversation_id):
             'message': f'An error occurred: {str(e)}'
         }, status=500)
 
+@login_required
+@require_http_methods(["POST"])
+def mark_read(request):
+    """
+    Mark several conversations as read for the current user in one request.
+    Body: {"conversations": [{"conversation_id": 1, "last_read_message_id": 42}, ...]}.
+    Messages up to last_read_message_id are marked read; without it, all messages are.
+    """
+    try:
+        data = json.loads(request.body)
+        marks = data.get('conversations')
+        
+        # Validate required fields
+        if not isinstance(marks, list) or not all(isinstance(mark, dict) and mark.get('conversation_id') for mark in marks):
+            return JsonResponse({
+                'status': 'error',
+                'message': 'conversations must be a list of {conversation_id, last_read_message_id}'
+            }, status=400)
+        try:
+            read_marks = {}
+            for mark in marks:
+                last_read_message_id = mark.get('last_read_message_id')
+                read_marks[int(mark['conversation_id'])] = (
+                    None if last_read_message_id is None else int(last_read_message_id)
+                )
+        except (TypeError, ValueError):
+            return JsonResponse({
+                'status': 'error',
+                'message': 'conversation_id and last_read_message_id must be integers'
+            }, status=400)
+        
+        # Conversations the user is not part of are skipped
+        current_user = request.user
+        newly_read = mark_conversations_read(current_user, read_marks)
+        
+        # Every moved mark clears the cached total, even with nothing counted as newly read:
+        # the denormalized counters may have drifted from the marks
+        for side in {RECRUITER_SIDE if conversation.recruiter_id == current_user.id else CANDIDATE_SIDE
+                     for conversation in newly_read}:
+            clear_unread_total(current_user.id, side)
+        for conversation in newly_read:
+            notify_conversation_read(conversation, current_user)
+        
+        return JsonResponse({
+            'status': 'success',
+            'message': f'Marked {sum(newly_read.values())} messages as read',
+            'data': {
+                'conversations': [
+                    {
+                        'conversation_id': conversation.id,
+                        'last_read_message_id': getattr(conversation, conversation.last_read_field(current_user)),
+                        'messages_marked': count
+                    }
+                    for conversation, count in newly_read.items()
+                ]
+            }
+        }, status=200)
+        
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid JSON data'
+        }, status=400)
+        
+    except Exception as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'An error occurred: {str(e)}'
+        }, status=500)
+
 @login_required
 @require_http_methods(["POST"])
 def mark_conversation_read(request, conversation_id):
@@ -375,13 +476,14 @@ def mark_conversation_read(request, conversation_id):
             }, status=403)
         
         # Mark all unread messages as read
-        unread_messages = conversation.messages.exclude(
-            sender=current_user  # Messages from the other person
-        ).filter(
-            read_at__isnull=True
-        )
-        
-        updated_count = unread_messages.update(read_at=timezone.now())
+        read_field = conversation.last_read_field(current_user)
+        previous_mark = getattr(conversation, read_field)
+        updated_count = mark_conversation_messages_read(conversation, current_user)
+        # Clear the cached total whenever the mark moved, even if the (possibly drifted) counter said 0
+        if getattr(conversation, read_field) != previous_mark:
+            side = RECRUITER_SIDE if current_user == conversation.recruiter else CANDIDATE_SIDE
+            clear_unread_total(current_user.id, side)
+            notify_conversation_read(conversation, current_user)
         
         return JsonResponse({
             'status': 'success',
@@ -403,3 +505,55 @@ def mark_conversation_read(request, conversation_id):
             'status': 'error',
             'message': f'An error occurred: {str(e)}'
         }, status=500)
+
+async def events(request):
+    """
+    Server-Sent Events stream of chat events for the current user:
+    'message' (new message in one of the user's conversations), 'read'
+    (the other participant read a conversation) and 'unread' (new unread total).
+    Only served under ASGI (jobit/asgi.py); clients fall back to polling otherwise.
+    """
+    # login_required and require_http_methods do not support async views in Django 4.2
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    def get_user_and_unread():
+        user = request.user
+        if not user.is_authenticated:
+            return None, None
+        total = get_unread_total(user, side_for_role(user.appuser.role))
+        return user, total
+    
+    try:
+        user, total_unread = await sync_to_async(get_user_and_unread)()
+    except Exception as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'An error occurred: {str(e)}'
+        }, status=500)
+    
+    if user is None:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Authentication required'
+        }, status=401)
+    
+    # A WSGI worker would be tied up for the whole stream
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Event stream is only available when served over ASGI'
+        }, status=503)
+    
+    initial_events = [{
+        'type': 'unread',
+        'data': {
+            'unread_messages_count': total_unread,
+            'has_unread_messages': total_unread > 0
+        }
+    }]
+    response = StreamingHttpResponse(event_stream(user.id, initial_events), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events are delivered immediately
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -158,6 +158,20 @@ else:
     }
 
 
+# Cache
+# Defaults to a per-process in-memory cache; point CACHE_BACKEND/CACHE_LOCATION at a
+# shared cache (e.g. Redis or Memcached) when running several worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'jobit'),
+    }
+}
+
+# Seconds a serialized candidate card stays cached on the recruiter dashboard
+CANDIDATE_CARD_CACHE_TIMEOUT = int(os.environ.get('CANDIDATE_CARD_CACHE_TIMEOUT', '600'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -215,7 +229,7 @@ if not DEBUG and not IS_BUILD_CONTEXT:
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI functionality!")
 
-    if not AZURE_STORAGE_CONNECTION_STRING:
+    if not AZURE_STORAGE_CONNECTION_STRING and not USE_LOCAL_STORAGE:
         raise ValueError("AZURE_STORAGE_CONNECTION_STRING environment variable is required for Azure Storage functionality!")
 
     if not SECRET_KEY:
@@ -263,6 +277,70 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = 'login'
 
+# Profile photo storage: 'azure', 'local' (files in PHOTO_STORAGE_LOCAL_DIR), 'memory',
+# or a dotted path to a users.storage.PhotoStorage subclass
+PHOTO_STORAGE_BACKEND = os.environ.get('PHOTO_STORAGE_BACKEND', 'local' if USE_LOCAL_STORAGE else 'azure')
+PHOTO_STORAGE_LOCAL_DIR = os.environ.get('PHOTO_STORAGE_LOCAL_DIR', str(MEDIA_ROOT / 'profile-photos'))
+PROFILE_PHOTOS_CONTAINER = os.environ.get('PROFILE_PHOTOS_CONTAINER', 'profile-photos')
+PHOTO_STORAGE_POOL_SIZE = int(os.environ.get('PHOTO_STORAGE_POOL_SIZE', '16'))
+PHOTO_STORAGE_CONNECT_TIMEOUT = int(os.environ.get('PHOTO_STORAGE_CONNECT_TIMEOUT', '5'))
+PHOTO_STORAGE_READ_TIMEOUT = int(os.environ.get('PHOTO_STORAGE_READ_TIMEOUT', '10'))
+PHOTO_STORAGE_RETRIES = int(os.environ.get('PHOTO_STORAGE_RETRIES', '2'))
+
+# Threads and time budget (seconds) for fetching many profile photos at once
+PHOTO_FETCH_WORKERS = int(os.environ.get('PHOTO_FETCH_WORKERS', '8'))
+PHOTO_FETCH_DEADLINE = float(os.environ.get('PHOTO_FETCH_DEADLINE', '2.0'))
+
+# Local disk cache of profile photos served by /profile-photo/<id>/
+PROFILE_PHOTO_CACHE_DIR = os.environ.get('PROFILE_PHOTO_CACHE_DIR', str(BASE_DIR / 'cache' / 'profile_photos'))
+PROFILE_PHOTO_CACHE_MAX_BYTES = int(os.environ.get('PROFILE_PHOTO_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Browser cache lifetime of profile photo responses (URLs change on every upload)
+PROFILE_PHOTO_MAX_AGE = int(os.environ.get('PROFILE_PHOTO_MAX_AGE', str(7 * 24 * 60 * 60)))
+
+# Upper bound (seconds) on how long a cached chat unread counter may be served
+CHAT_UNREAD_CACHE_TIMEOUT = int(os.environ.get('CHAT_UNREAD_CACHE_TIMEOUT', '60'))
+
+# Messages per page returned by the conversation messages endpoint (?limit= is capped at the maximum)
+CHAT_MESSAGES_PAGE_SIZE = int(os.environ.get('CHAT_MESSAGES_PAGE_SIZE', '50'))
+CHAT_MESSAGES_MAX_PAGE_SIZE = int(os.environ.get('CHAT_MESSAGES_MAX_PAGE_SIZE', '200'))
+# Read messages older than this many days are moved to the archive table by archive_messages
+CHAT_ARCHIVE_AFTER_DAYS = int(os.environ.get('CHAT_ARCHIVE_AFTER_DAYS', '180'))
+CHAT_ARCHIVE_BATCH_SIZE = int(os.environ.get('CHAT_ARCHIVE_BATCH_SIZE', '1000'))
+
+# Chat server push (/messages/events/, needs ASGI). 'memory' only reaches streams held by
+# the same process; use 'redis' (CHAT_EVENT_REDIS_URL) when running several workers.
+CHAT_EVENT_BROKER = os.environ.get('CHAT_EVENT_BROKER', 'memory')
+CHAT_EVENT_REDIS_URL = os.environ.get('CHAT_EVENT_REDIS_URL', 'redis://localhost:6379/0')
+# Per-stream buffer of undelivered events
+CHAT_EVENT_QUEUE_SIZE = int(os.environ.get('CHAT_EVENT_QUEUE_SIZE', '100'))
+# Seconds between keep-alive comments and before a stream is closed for the browser to reconnect
+CHAT_EVENT_HEARTBEAT = float(os.environ.get('CHAT_EVENT_HEARTBEAT', '20'))
+CHAT_EVENT_STREAM_TIMEOUT = float(os.environ.get('CHAT_EVENT_STREAM_TIMEOUT', '300'))
+# Reconnect delay suggested to browsers
+CHAT_EVENT_RETRY_MS = int(os.environ.get('CHAT_EVENT_RETRY_MS', '3000'))
+
+# Seconds after which the in-memory job skill index used for matching is fully reloaded
+MATCHING_INDEX_TTL = int(os.environ.get('MATCHING_INDEX_TTL', '300'))
+
+# Seconds after which the in-memory skill catalog is reloaded (changes made by other processes)
+SKILL_CATALOG_TTL = int(os.environ.get('SKILL_CATALOG_TTL', '300'))
+# Browser cache lifetime of the versioned skill list (get_skills?v=<version>)
+SKILL_CATALOG_MAX_AGE = int(os.environ.get('SKILL_CATALOG_MAX_AGE', str(365 * 24 * 60 * 60)))
+# Job search results per page (and per "load more")
+JOB_SEARCH_PAGE_SIZE = int(os.environ.get('JOB_SEARCH_PAGE_SIZE', '20'))
+JOB_SEARCH_MAX_PAGE_SIZE = int(os.environ.get('JOB_SEARCH_MAX_PAGE_SIZE', '100'))
+# Answer worker searches without a text query from the in-memory filter index of active listings
+JOB_FILTER_INDEX_ENABLED = os.environ.get('JOB_FILTER_INDEX_ENABLED', 'true').lower() == 'true'
+# Seconds after which the filter index is fully reloaded (changes made by other processes)
+JOB_FILTER_INDEX_TTL = int(os.environ.get('JOB_FILTER_INDEX_TTL', '300'))
+
+# Most job listings the AI assistant's search_jobs tool returns
+JOB_SEARCH_TOOL_MAX_RESULTS = int(os.environ.get('JOB_SEARCH_TOOL_MAX_RESULTS', '20'))
+
+# Number of skills returned by the typeahead by default and at most
+SKILL_SEARCH_LIMIT = int(os.environ.get('SKILL_SEARCH_LIMIT', '10'))
+SKILL_SEARCH_MAX_LIMIT = int(os.environ.get('SKILL_SEARCH_MAX_LIMIT', '50'))
+
 # Logging Configuration for Production Debugging
 LOGGING = {
     'version': 1,
@@ -1,6 +1,38 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete, post_migrate
 
 
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from users.models import AppUser, UserSkill, Skill
+        from .models import JobListing, JobListingSkill
+        from .search import create_search_index
+        from .signals import (
+            invalidate_app_user_card, invalidate_user_skill_card, invalidate_user_card,
+            refresh_listing_search_document, refresh_listing_skill_search_document, refresh_skill_search_documents,
+            invalidate_listing_filters, invalidate_listing_skill_filters
+        )
+
+        # Keep cached candidate cards of the recruiter dashboard up to date
+        post_save.connect(invalidate_app_user_card, sender=AppUser, dispatch_uid='jobs_app_user_card_saved')
+        post_delete.connect(invalidate_app_user_card, sender=AppUser, dispatch_uid='jobs_app_user_card_deleted')
+        post_save.connect(invalidate_user_skill_card, sender=UserSkill, dispatch_uid='jobs_user_skill_card_saved')
+        post_delete.connect(invalidate_user_skill_card, sender=UserSkill, dispatch_uid='jobs_user_skill_card_deleted')
+        post_save.connect(invalidate_user_card, sender=User, dispatch_uid='jobs_user_card_saved')
+
+        # Keep the full-text search documents of listings up to date
+        post_save.connect(refresh_listing_search_document, sender=JobListing, dispatch_uid='jobs_listing_search_saved')
+        post_save.connect(refresh_listing_skill_search_document, sender=JobListingSkill, dispatch_uid='jobs_listing_skill_search_saved')
+        post_delete.connect(refresh_listing_skill_search_document, sender=JobListingSkill, dispatch_uid='jobs_listing_skill_search_deleted')
+        post_save.connect(refresh_skill_search_documents, sender=Skill, dispatch_uid='jobs_skill_search_saved')
+        # Keep the in-memory filter index of active listings up to date
+        post_save.connect(invalidate_listing_filters, sender=JobListing, dispatch_uid='jobs_listing_filters_saved')
+        post_delete.connect(invalidate_listing_filters, sender=JobListing, dispatch_uid='jobs_listing_filters_deleted')
+        post_save.connect(invalidate_listing_skill_filters, sender=JobListingSkill, dispatch_uid='jobs_listing_skill_filters_saved')
+        post_delete.connect(invalidate_listing_skill_filters, sender=JobListingSkill, dispatch_uid='jobs_listing_skill_filters_deleted')
+        # Full-text index structures that models cannot express (FTS5 table, GIN indexes)
+        post_migrate.connect(create_search_index, sender=self, dispatch_uid='jobs_create_search_index')
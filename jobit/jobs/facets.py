@@ -0,0 +1,91 @@
+from django.db.models import Count, Q
+from jobs.models import JobListing, JobListingSkill
+from users.skills import get_skill_catalog
+
+# Salary bands of the salary facet as (salary_min, salary_max) filter values, None meaning open-ended
+SALARY_BANDS = [
+    (None, 5000),
+    (5000, 10000),
+    (10000, 20000),
+    (20000, None),
+]
+
+
+def salary_band_label(low, high):
+    if low is None:
+        return f"up to {high}"
+    if high is None:
+        return f"{low}+"
+    return f"{low} - {high}"
+
+
+def salary_band_condition(low, high):
+    """Listings the salary filters select for a band (see search_job_listings)."""
+    condition = Q()
+    if low is not None:
+        condition &= Q(salary_min__gte=low)
+    if high is not None:
+        condition &= Q(salary_max__lte=high)
+    return condition
+
+
+def listing_facets(job_listings, top=10):
+    """
+    Number of listings of a search result per value of each filter, so users
+    can see how a filter narrows the results before applying it.
+
+    Returns {'job_model', 'currency', 'salary', 'location', 'skills'}, each a
+    list of {'value', 'label', 'count'}. Job models, currencies and salary
+    bands are counted in one pass with conditional aggregates; the ``top``
+    locations and skills with one grouped query each. Values with no listings
+    are left out. Three queries, whatever the number of values.
+    """
+    results = job_listings.order_by()
+    result_ids = results.values('id')
+
+    fixed_facets = {
+        'job_model': [(value, label, Q(job_model=value)) for value, label in JobListing.JOB_MODELS],
+        'currency': [(value, label, Q(salary_currency=value)) for value, label in JobListing.CURRENCY_CHOICES],
+        'salary': [
+            ((low, high), salary_band_label(low, high), salary_band_condition(low, high))
+            for low, high in SALARY_BANDS
+        ],
+    }
+    aggregates = {
+        f"{name}_{position}": Count('id', filter=condition)
+        for name, values in fixed_facets.items()
+        for position, (_, _, condition) in enumerate(values)
+    }
+    counts = JobListing.objects.filter(id__in=result_ids).aggregate(**aggregates)
+
+    facets = {
+        name: [
+            {'value': value, 'label': label, 'count': counts[f"{name}_{position}"]}
+            for position, (value, label, _) in enumerate(values)
+            if counts[f"{name}_{position}"]
+        ]
+        for name, values in fixed_facets.items()
+    }
+
+    locations = JobListing.objects.filter(id__in=result_ids, location__isnull=False).values(
+        'location_id', 'location__city', 'location__country'
+    ).annotate(count=Count('id')).order_by('-count', 'location_id')[:top]
+    facets['location'] = [
+        {
+            'value': location['location_id'],
+            'label': f"{location['location__city']}, {location['location__country']}",
+            'count': location['count']
+        }
+        for location in locations
+    ]
+
+    skills = list(
+        JobListingSkill.objects.filter(job_listing_id__in=result_ids).values('skill_id')
+        .annotate(count=Count('job_listing_id')).order_by('-count', 'skill_id')[:top]
+    )
+    names = get_skill_catalog().names(skill['skill_id'] for skill in skills)
+    facets['skills'] = [
+        {'value': names[skill['skill_id']], 'label': names[skill['skill_id']], 'count': skill['count']}
+        for skill in skills if skill['skill_id'] in names
+    ]
+    return facets
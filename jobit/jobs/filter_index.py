@@ -0,0 +1,294 @@
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from jobs.facets import SALARY_BANDS, salary_band_label
+
+
+class ListingRow(NamedTuple):
+    job_model: str
+    salary_currency: str
+    location_id: Optional[int]
+    salary_min: Optional[int]
+    salary_max: Optional[int]
+    skill_ids: frozenset
+
+
+class CompiledListingFilters(NamedTuple):
+    """
+    Column-wise form of the index: listing ids in ascending order and one
+    boolean array per (filter, value), aligned with the ids.
+    """
+    listing_ids: np.ndarray
+    # ('job_model' | 'currency' | 'location' | 'skill', value) -> bool array
+    bitmaps: Dict[Tuple[str, Any], np.ndarray]
+    # Salaries as floats, NaN when not specified
+    salary_min: np.ndarray
+    salary_max: np.ndarray
+    # location_id -> "City, Country"
+    location_labels: Dict[int, str]
+
+    def bitmap(self, name, value):
+        bitmap = self.bitmaps.get((name, value))
+        return bitmap if bitmap is not None else np.zeros(len(self.listing_ids), dtype=bool)
+
+    def values(self, name):
+        return [value for bitmap_name, value in self.bitmaps if bitmap_name == name]
+
+    def salary_mask(self, salary_min=None, salary_max=None):
+        """Listings the salary filters select (comparisons with NaN are False, like NULL in SQL)."""
+        mask = np.ones(len(self.listing_ids), dtype=bool)
+        if salary_min is not None:
+            mask &= self.salary_min >= salary_min
+        if salary_max is not None:
+            mask &= self.salary_max <= salary_max
+        return mask
+
+
+class ListingFilterIndex:
+    """
+    Process-wide bitmap index of the filterable fields of ACTIVE job listings:
+    job model, currency, location and skills as one boolean array per value,
+    and the salaries as float arrays. Filters are answered by AND-ing arrays,
+    without a database query.
+
+    Like matching.index.SkillIndex, the index is loaded lazily, signal
+    handlers mark changed listings as stale so they are re-read in one query
+    on the next lookup, and the whole index is reloaded once it is older than
+    ``JOB_FILTER_INDEX_TTL`` seconds to pick up changes made by other processes.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._rows: Dict[int, ListingRow] = {}
+        self._location_labels: Dict[int, str] = {}
+        self._stale_ids = set()
+        self._loaded_at = None
+        self._compiled: Optional[CompiledListingFilters] = None
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'JOB_FILTER_INDEX_TTL', 300)
+
+    def clear(self):
+        """Drop all rows; the index is reloaded on next use."""
+        with self._lock:
+            self._clear()
+
+    def invalidate(self, listing_id: int):
+        """Mark a listing as changed so it is re-read lazily."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._stale_ids.add(listing_id)
+                self._compiled = None
+
+    def _read_rows(self, listing_ids: Optional[List[int]] = None):
+        from jobs.models import JobListing, JobListingSkill
+
+        listings = JobListing.objects.filter(status='ACTIVE')
+        listing_skills = JobListingSkill.objects.filter(job_listing__status='ACTIVE')
+        if listing_ids is not None:
+            listings = listings.filter(id__in=listing_ids)
+            listing_skills = listing_skills.filter(job_listing_id__in=listing_ids)
+
+        skill_ids = {}
+        for listing_id, skill_id in listing_skills.values_list('job_listing_id', 'skill_id'):
+            skill_ids.setdefault(listing_id, set()).add(skill_id)
+
+        rows = {}
+        location_labels = {}
+        for listing in listings.values(
+            'id', 'job_model', 'salary_currency', 'location_id', 'salary_min', 'salary_max',
+            'location__city', 'location__country'
+        ):
+            rows[listing['id']] = ListingRow(
+                listing['job_model'], listing['salary_currency'], listing['location_id'],
+                listing['salary_min'], listing['salary_max'], frozenset(skill_ids.get(listing['id'], ()))
+            )
+            if listing['location_id'] is not None:
+                location_labels[listing['location_id']] = f"{listing['location__city']}, {listing['location__country']}"
+        return rows, location_labels
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.ttl:
+            self._rows, self._location_labels = self._read_rows()
+            self._stale_ids = set()
+            self._loaded_at = now
+            self._compiled = None
+        elif self._stale_ids:
+            stale_ids = self._stale_ids
+            self._stale_ids = set()
+            fresh_rows, location_labels = self._read_rows(list(stale_ids))
+            for listing_id in stale_ids:
+                self._rows.pop(listing_id, None)
+            self._rows.update(fresh_rows)
+            self._location_labels.update(location_labels)
+            self._compiled = None
+
+        if self._compiled is None:
+            self._compile()
+
+    def _compile(self):
+        """Build the arrays from the in-memory rows."""
+        listing_ids = sorted(self._rows)
+        size = len(listing_ids)
+        bitmaps = {}
+        salary_min = np.full(size, np.nan)
+        salary_max = np.full(size, np.nan)
+        for position, listing_id in enumerate(listing_ids):
+            row = self._rows[listing_id]
+            keys = [('job_model', row.job_model), ('currency', row.salary_currency)]
+            if row.location_id is not None:
+                keys.append(('location', row.location_id))
+            keys.extend(('skill', skill_id) for skill_id in row.skill_ids)
+            for key in keys:
+                bitmap = bitmaps.get(key)
+                if bitmap is None:
+                    bitmap = bitmaps[key] = np.zeros(size, dtype=bool)
+                bitmap[position] = True
+            if row.salary_min is not None:
+                salary_min[position] = row.salary_min
+            if row.salary_max is not None:
+                salary_max[position] = row.salary_max
+
+        self._compiled = CompiledListingFilters(
+            np.asarray(listing_ids, dtype=np.int64), bitmaps, salary_min, salary_max, dict(self._location_labels)
+        )
+
+    def snapshot(self) -> CompiledListingFilters:
+        with self._lock:
+            self._refresh()
+            return self._compiled
+
+    def __len__(self):
+        return len(self.snapshot().listing_ids)
+
+
+listing_filter_index = ListingFilterIndex()
+
+
+def get_listing_filter_index() -> ListingFilterIndex:
+    return listing_filter_index
+
+
+def optional_number(value, convert=float):
+    """Filter values from a query string: empty means no filter."""
+    if value in (None, ''):
+        return None
+    return convert(value)
+
+
+def match_filters(compiled, filters):
+    """
+    The listings matching search filters (see jobs.views.get_search_filters),
+    as ``(mask, matching_skills_count)`` arrays aligned with the listing ids.
+    As in search_job_listings, listings requiring none of the requested
+    skills are left out. Raises ValueError for malformed numbers.
+    """
+    from jobs.search import skill_ids_for_names
+
+    mask = compiled.salary_mask(
+        optional_number(filters.get('salary_min')), optional_number(filters.get('salary_max'))
+    )
+    if filters.get('job_model'):
+        mask &= compiled.bitmap('job_model', filters['job_model'])
+    if filters.get('currency'):
+        mask &= compiled.bitmap('currency', filters['currency'])
+    location_id = optional_number(filters.get('location_id'), int)
+    if location_id is not None:
+        mask &= compiled.bitmap('location', location_id)
+
+    matching_skills_count = np.zeros(len(compiled.listing_ids), dtype=np.int64)
+    if filters.get('skills'):
+        for skill_id in skill_ids_for_names(filters['skills']):
+            matching_skills_count += compiled.bitmap('skill', skill_id)
+        mask &= matching_skills_count > 0
+    return mask, matching_skills_count
+
+
+def search_listing_ids(filters, sort_keys, after=None, limit=20):
+    """
+    One page of the ids of ACTIVE listings matching the filters, ordered like
+    search_job_listings without a text query (matching skills, then newest).
+    Returns ``(listing_ids, matching_skills_counts, next_values)`` with the
+    same cursor values as jobs.search.keyset_page.
+    """
+    compiled = get_listing_filter_index().snapshot()
+    mask, matching_skills_count = match_filters(compiled, filters)
+    columns = {'matching_skills_count': matching_skills_count[mask], 'id': compiled.listing_ids[mask]}
+
+    # Rows strictly after the cursor in (descending) sort key order
+    if after is not None:
+        after_mask = np.zeros(len(columns['id']), dtype=bool)
+        equal = np.ones(len(columns['id']), dtype=bool)
+        for key, value in zip(sort_keys, after):
+            after_mask |= equal & (columns[key] < value)
+            equal &= columns[key] == value
+        columns = {key: column[after_mask] for key, column in columns.items()}
+
+    # np.lexsort sorts by the last key first
+    order = np.lexsort([-columns[key] for key in reversed(sort_keys)])[:limit + 1]
+    listing_ids = columns['id'][order].tolist()
+    counts = columns['matching_skills_count'][order].tolist()
+    if len(listing_ids) <= limit:
+        return listing_ids, counts, None
+    listing_ids, counts = listing_ids[:limit], counts[:limit]
+    values = {'matching_skills_count': counts[-1], 'id': listing_ids[-1]}
+    return listing_ids, counts, [values[key] for key in sort_keys]
+
+
+def filter_index_facets(filters, top=10):
+    """
+    The facets of jobs.facets.listing_facets for the ACTIVE listings matching
+    the filters, counted from the index instead of with three queries.
+    """
+    compiled = get_listing_filter_index().snapshot()
+    mask, _ = match_filters(compiled, filters)
+
+    def count(bitmap):
+        return int(np.count_nonzero(mask & bitmap))
+
+    from jobs.models import JobListing
+    fixed_facets = {
+        'job_model': [
+            (value, label, count(compiled.bitmap('job_model', value))) for value, label in JobListing.JOB_MODELS
+        ],
+        'currency': [
+            (value, label, count(compiled.bitmap('currency', value))) for value, label in JobListing.CURRENCY_CHOICES
+        ],
+        'salary': [
+            ((low, high), salary_band_label(low, high), count(compiled.salary_mask(low, high)))
+            for low, high in SALARY_BANDS
+        ],
+    }
+    facets = {
+        name: [{'value': value, 'label': label, 'count': total} for value, label, total in values if total]
+        for name, values in fixed_facets.items()
+    }
+
+    def top_values(name):
+        counts = [(count(compiled.bitmap(name, value)), value) for value in compiled.values(name)]
+        # Same order as the grouped queries: most listings first, then by id
+        return sorted((item for item in counts if item[0]), key=lambda item: (-item[0], item[1]))[:top]
+
+    facets['location'] = [
+        {'value': location_id, 'label': compiled.location_labels.get(location_id, ''), 'count': count}
+        for count, location_id in top_values('location')
+    ]
+    from users.skills import get_skill_catalog
+    skills = top_values('skill')
+    names = get_skill_catalog().names(skill_id for _, skill_id in skills)
+    facets['skills'] = [
+        {'value': names[skill_id], 'label': names[skill_id], 'count': count}
+        for count, skill_id in skills if skill_id in names
+    ]
+    return facets
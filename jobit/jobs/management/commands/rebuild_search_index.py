@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from jobs.models import JobListing
+from jobs.search import SQLITE_FTS_TABLE, create_search_index, refresh_search_documents, sqlite_fts_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search documents of all job listings and their index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        create_search_index(using=connection.alias)
+
+        listing_ids = list(JobListing.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        updated = 0
+        for start in range(0, len(listing_ids), batch_size):
+            updated += refresh_search_documents(listing_ids[start:start + batch_size])
+
+        if connection.vendor == 'sqlite' and sqlite_fts_available():
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated {updated} of {len(listing_ids)} search documents.')
+        )
@@ -33,6 +33,8 @@ class JobListing(models.Model):
     job_model = models.CharField(max_length=10, choices=JOB_MODELS, default="STATIONARY")
     owner = models.ForeignKey(AppUser, on_delete=models.CASCADE, null=True, blank=True)
     status = models.CharField(max_length=10, choices=LISTING_STATUSES, default="ACTIVE")
+    # Skill names and description, kept up to date for full-text search (see jobs.search)
+    search_document = models.TextField(blank=True, default="", editable=False)
 
     def __str__(self):
         return f"{self.job_title} at {self.company_name}"
@@ -0,0 +1,306 @@
+import re
+from collections import defaultdict
+
+from django.db import connection, connections
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+from users.skills import get_skill_catalog
+
+# Words of a search query; everything else (quotes, operators...) is dropped
+QUERY_WORD = re.compile(r'\w+')
+
+SQLITE_FTS_TABLE = 'jobs_joblisting_fts'
+# bm25 weights of the FTS5 columns: job_title, company_name, search_document
+SQLITE_FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+SQLITE_FTS_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        job_title, company_name, search_document,
+        content='jobs_joblisting', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_insert AFTER INSERT ON jobs_joblisting BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, job_title, company_name, search_document)
+        VALUES (new.id, new.job_title, new.company_name, new.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_delete AFTER DELETE ON jobs_joblisting BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, job_title, company_name, search_document)
+        VALUES ('delete', old.id, old.job_title, old.company_name, old.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_update AFTER UPDATE ON jobs_joblisting BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, job_title, company_name, search_document)
+        VALUES ('delete', old.id, old.job_title, old.company_name, old.search_document);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, job_title, company_name, search_document)
+        VALUES (new.id, new.job_title, new.company_name, new.search_document);
+    END""",
+]
+
+# The expression of the GIN index must be the one SearchVector(*POSTGRES_VECTOR_FIELDS, config='simple') compiles to
+POSTGRES_VECTOR_FIELDS = ('job_title', 'company_name', 'search_document')
+POSTGRES_SEARCH_SQL = [
+    """CREATE INDEX IF NOT EXISTS jobs_listing_search ON jobs_joblisting USING GIN ((
+        to_tsvector('simple'::regconfig,
+            COALESCE(job_title, '') || ' ' || COALESCE(company_name, '') || ' ' || COALESCE(search_document, ''))
+    ))""",
+]
+# Substring matches on the title and company (the old icontains search) use trigram indexes
+POSTGRES_TRIGRAM_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS jobs_listing_title_trgm ON jobs_joblisting USING GIN (UPPER(job_title) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS jobs_listing_company_trgm ON jobs_joblisting USING GIN (UPPER(company_name) gin_trgm_ops)",
+]
+
+
+def build_search_document(job_listing, skill_names):
+    """
+    Searchable text of a listing besides its title and company name, which
+    are indexed from their own columns: the skill names and the description.
+    """
+    return '\n'.join([' '.join(skill_names), job_listing.job_description or ''])
+
+
+def refresh_search_documents(listing_ids):
+    """
+    Rebuild the search_document of the given listings. The full-text indexes
+    follow the column (triggers on SQLite, an expression index on PostgreSQL).
+    """
+    from jobs.models import JobListing, JobListingSkill
+
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return 0
+    listing_skills = list(
+        JobListingSkill.objects.filter(job_listing_id__in=listing_ids).values_list('job_listing_id', 'skill_id')
+    )
+    names = get_skill_catalog().names(skill_id for _, skill_id in listing_skills)
+    skill_names = defaultdict(list)
+    for listing_id, skill_id in listing_skills:
+        if skill_id in names:
+            skill_names[listing_id].append(names[skill_id])
+
+    listings = []
+    for listing in JobListing.objects.filter(id__in=listing_ids).only('id', 'job_description', 'search_document'):
+        document = build_search_document(listing, sorted(skill_names[listing.id]))
+        if document != listing.search_document:
+            listing.search_document = document
+            listings.append(listing)
+    # bulk_update sends no post_save, so this does not trigger itself
+    JobListing.objects.bulk_update(listings, ['search_document'])
+    return len(listings)
+
+
+def query_words(query):
+    return QUERY_WORD.findall(query or '')
+
+
+def sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def search_listings(job_listings, query):
+    """
+    Filter a JobListing queryset to the listings matching a search query and
+    annotate them with ``search_rank`` (higher is better). Every word of the
+    query must match the start of a word of the title, company name, skill
+    names or description; title and company matches rank higher.
+
+    PostgreSQL uses a GIN-indexed tsvector, plus trigram-indexed substring
+    matches on the title and company; SQLite uses an FTS5 table ranked with
+    bm25. Other databases fall back to unranked substring matching.
+    """
+    words = query_words(query)
+    if not words:
+        return job_listings.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        search_query = SearchQuery(' & '.join(f"{word}:*" for word in words), config='simple', search_type='raw')
+        vector = SearchVector(*POSTGRES_VECTOR_FIELDS, config='simple')
+        weighted_vector = (
+            SearchVector('job_title', config='simple', weight='A')
+            + SearchVector('company_name', config='simple', weight='B')
+            + SearchVector('search_document', config='simple', weight='D')
+        )
+        return job_listings.alias(search_vector=vector).filter(
+            Q(search_vector=search_query)
+            | Q(job_title__icontains=query)
+            | Q(company_name__icontains=query)
+        # ts_rank is a real; as a double it survives the round trip through search cursors
+        ).annotate(search_rank=Cast(SearchRank(weighted_vector, search_query), FloatField()))
+
+    if connection.vendor == 'sqlite' and sqlite_fts_available():
+        fts_query = ' '.join(f'"{word}"*' for word in words)
+        weights = ', '.join(str(weight) for weight in SQLITE_FTS_WEIGHTS)
+        # bm25() is lower for better matches
+        return job_listings.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s", [fts_query])
+        ).annotate(search_rank=RawSQL(
+            f"SELECT -bm25({SQLITE_FTS_TABLE}, {weights}) FROM {SQLITE_FTS_TABLE} "
+            f"WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = jobs_joblisting.id",
+            [fts_query], output_field=FloatField()
+        ))
+
+    condition = Q()
+    for word in words:
+        condition &= (
+            Q(job_title__icontains=word) | Q(company_name__icontains=word) | Q(search_document__icontains=word)
+        )
+    return job_listings.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def skill_ids_for_names(skill_names):
+    """Catalog ids of skill names (case-insensitive, aliases allowed); unknown names are left out."""
+    catalog = get_skill_catalog()
+    skill_ids = (catalog.get_id(name) for name in skill_names or ())
+    return list(dict.fromkeys(skill_id for skill_id in skill_ids if skill_id is not None))
+
+
+def annotate_matching_skills(job_listings, skill_ids):
+    """
+    Annotate ``matching_skills_count``: how many of the given skills a listing
+    requires, counted by a correlated subquery so it composes with other
+    aggregates (with_tile_data) without multiplying their joins.
+    """
+    from jobs.models import JobListingSkill
+
+    matching = JobListingSkill.objects.filter(
+        job_listing=OuterRef('pk'), skill_id__in=skill_ids
+    ).order_by().values('job_listing').annotate(count=Count('id')).values('count')
+    return job_listings.annotate(
+        matching_skills_count=Coalesce(Subquery(matching, output_field=IntegerField()), 0)
+    )
+
+
+def search_job_listings(job_listings, search_query=None, job_model=None, salary_min=None, salary_max=None,
+                        currency=None, skills=None, location=None, location_id=None, company_name=None):
+    """
+    The job search shared by the search page and the AI assistant's search_jobs tool.
+
+    Narrows a JobListing queryset with the given filters (empty values are
+    ignored) and returns it ordered best first, without evaluating it:
+    listings requiring more of ``skills`` (names) first, then by full-text
+    rank (see search_listings), then newest. When skills are given, listings
+    requiring none of them are left out. Callers slice the queryset to limit
+    the rows loaded.
+    """
+    if search_query:
+        job_listings = search_listings(job_listings, search_query)
+
+    if job_model:
+        job_listings = job_listings.filter(job_model=job_model)
+    if salary_min not in (None, ''):
+        job_listings = job_listings.filter(salary_min__gte=salary_min)
+    if salary_max not in (None, ''):
+        job_listings = job_listings.filter(salary_max__lte=salary_max)
+    if currency:
+        job_listings = job_listings.filter(salary_currency=currency)
+    if company_name:
+        job_listings = job_listings.filter(company_name__icontains=company_name)
+
+    if location_id:
+        job_listings = job_listings.filter(location_id=location_id)
+    if location:
+        # "Country, City" matches either part
+        location_parts = location.split(', ', 1)
+        country, city = location_parts if len(location_parts) == 2 else (location, location)
+        job_listings = job_listings.filter(
+            Q(location__country__icontains=country) | Q(location__city__icontains=city)
+        )
+
+    if skills:
+        job_listings = annotate_matching_skills(job_listings, skill_ids_for_names(skills)).filter(
+            matching_skills_count__gt=0
+        )
+    else:
+        job_listings = job_listings.annotate(matching_skills_count=Value(0, output_field=IntegerField()))
+    return job_listings.order_by(*(f'-{key}' for key in search_sort_keys(search_query, skills)))
+
+
+# Type of every value search results can be ordered by, to parse cursors
+SEARCH_SORT_KEY_TYPES = {'matching_skills_count': int, 'search_rank': float, 'id': int}
+
+
+def search_sort_keys(search_query=None, skills=None):
+    """The (descending) keys search_job_listings orders its results by for these filters."""
+    keys = []
+    if skills:
+        keys.append('matching_skills_count')
+    if search_query:
+        keys.append('search_rank')
+    keys.append('id')
+    return keys
+
+
+def encode_search_cursor(values):
+    if values is None:
+        return None
+    # repr() of a float parses back to the same float
+    return ':'.join(repr(value) for value in values)
+
+
+def decode_search_cursor(value, sort_keys):
+    """Parse a cursor of the given sort keys; raises ValueError if malformed."""
+    parts = value.split(':')
+    if len(parts) != len(sort_keys):
+        raise ValueError(f"Expected {len(sort_keys)} cursor values, got {len(parts)}")
+    return [SEARCH_SORT_KEY_TYPES[key](part) for key, part in zip(sort_keys, parts)]
+
+
+def keyset_page(job_listings, sort_keys, after=None, limit=20):
+    """
+    One page of a queryset ordered by ``sort_keys`` (all descending, the last
+    one unique), starting after the row whose sort values are ``after``.
+    Returns ``(rows, next_values)``; next_values is None on the last page.
+    Only limit + 1 rows are read, however deep the page is.
+    """
+    if after is not None:
+        # (k1, k2, k3) < (a1, a2, a3), spelled out for databases without row comparisons
+        condition = Q()
+        for position, key in enumerate(sort_keys):
+            term = Q(**{f'{key}__lt': after[position]})
+            for previous_key, previous_value in zip(sort_keys[:position], after):
+                term &= Q(**{previous_key: previous_value})
+            condition |= term
+        job_listings = job_listings.filter(condition)
+
+    rows = list(job_listings[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, [getattr(rows[-1], key) for key in sort_keys]
+
+
+def create_search_index(**kwargs):
+    """
+    Create the full-text search structures that Django models cannot express,
+    after migrations (post_migrate). Safe to run repeatedly.
+    """
+    db = connections[kwargs.get('using', 'default')]
+    try:
+        with db.cursor() as cursor:
+            if db.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_FTS_TABLE])
+                created = cursor.fetchone() is None
+                for sql in SQLITE_FTS_SQL:
+                    cursor.execute(sql)
+                if created:
+                    # Index the listings that existed before the table
+                    cursor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+            elif db.vendor == 'postgresql':
+                for sql in POSTGRES_SEARCH_SQL:
+                    cursor.execute(sql)
+    except Exception as e:
+        print(f"❌ Error creating the job search index: {str(e)}")
+        return
+
+    if db.vendor == 'postgresql':
+        try:
+            with db.cursor() as cursor:
+                for sql in POSTGRES_TRIGRAM_SQL:
+                    cursor.execute(sql)
+        except Exception as e:
+            # pg_trgm may need a superuser; substring matches then scan the table
+            print(f"⚠️ Trigram indexes for job search not created: {str(e)}")
@@ -0,0 +1,51 @@
+from users.models import AppUser
+from .filter_index import get_listing_filter_index
+from .search import refresh_search_documents
+from .utils import invalidate_candidate_card
+
+
+def invalidate_app_user_card(sender, instance, **kwargs):
+    """Profile changes (position, location, about me...) invalidate the candidate card."""
+    invalidate_candidate_card(instance.pk)
+
+
+def invalidate_user_skill_card(sender, instance, **kwargs):
+    """Skill changes invalidate the candidate card."""
+    invalidate_candidate_card(instance.user_id)
+
+
+def invalidate_user_card(sender, instance, update_fields=None, **kwargs):
+    """Name changes on the auth user invalidate the candidate card."""
+    # Logins only touch last_login, which is not part of the card
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    for candidate_id in AppUser.objects.filter(user_id=instance.pk).values_list('id', flat=True):
+        invalidate_candidate_card(candidate_id)
+
+
+def refresh_listing_search_document(sender, instance, **kwargs):
+    """Description changes are reflected in the listing's search document."""
+    refresh_search_documents([instance.pk])
+
+
+def refresh_listing_skill_search_document(sender, instance, **kwargs):
+    """Skill changes of a listing are reflected in its search document."""
+    refresh_search_documents([instance.job_listing_id])
+
+
+def refresh_skill_search_documents(sender, instance, **kwargs):
+    """A renamed skill is renamed in the search documents of its listings."""
+    from .models import JobListingSkill
+    refresh_search_documents(
+        JobListingSkill.objects.filter(skill_id=instance.pk).values_list('job_listing_id', flat=True)
+    )
+
+
+def invalidate_listing_filters(sender, instance, **kwargs):
+    """Status, salary, location... changes are re-read into the filter index."""
+    get_listing_filter_index().invalidate(instance.pk)
+
+
+def invalidate_listing_skill_filters(sender, instance, **kwargs):
+    """Skill changes of a listing are re-read into the filter index."""
+    get_listing_filter_index().invalidate(instance.job_listing_id)
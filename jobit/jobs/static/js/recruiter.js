@@ -1,4 +1,5 @@
-let SKILLS_URL = "http://127.0.0.1:8000/get_skills";
+// Versioned skill list URL set by the page (see users.skills.skills_url)
+let SKILLS_URL = window.SKILLS_URL || "/get_skills";
 let SKILLS_IN_LISTING = [];
 
 document.addEventListener("DOMContentLoaded", function () {
@@ -1,4 +1,7 @@
-let SKILLS_URL = "http://127.0.0.1:8000/get_skills";
+// Versioned skill typeahead URL set by the page (see users.skills.skill_search_url)
+let SKILL_SEARCH_URL = window.SKILL_SEARCH_URL || "/skills/search";
+const SKILL_SEARCH_DELAY_MS = 150;
+let latestSkillSearch = 0;
 
 document.addEventListener("DOMContentLoaded", function () {
     addSkillModalFormLogic();
@@ -11,23 +14,21 @@ function addSkillModalFormLogic() {
     const searchInput = document.getElementById("searchSkillInput");
     const skillSelect = document.getElementById("skillNameSelect");
     let isOptionSelected = false;
+    let searchTimeout = null;
 
     searchInput.addEventListener("focus", () => {
         skillSelect.style.display = "block";
     });
 
     searchInput.addEventListener("input", function () {
-        const filter = this.value.toLowerCase();
-        const options = skillSelect.querySelectorAll("option");
+        const query = this.value;
 
         isOptionSelected = false;
-        options.forEach(option => {
-            if (option.textContent.toLowerCase().includes(filter)) {
-                option.style.display = "";
-            } else {
-                option.style.display = "none";
-            }
-        });
+        // Matching runs on the server; only search once the user pauses typing
+        clearTimeout(searchTimeout);
+        searchTimeout = setTimeout(() => {
+            searchSkills(query).catch(error => console.error("Error while searching skills:", error));
+        }, SKILL_SEARCH_DELAY_MS);
     });
 
     document.addEventListener("click", function (event) {
@@ -119,8 +120,10 @@ function hideError(fieldId) {
     errorMessage.style.display = 'none';
 }
 
-function fetchSkills(endpointUrl) {
-    return fetch(endpointUrl)
+function searchSkills(query) {
+    const searchId = ++latestSkillSearch;
+    const separator = SKILL_SEARCH_URL.includes("?") ? "&" : "?";
+    return fetch(`${SKILL_SEARCH_URL}${separator}q=${encodeURIComponent(query)}`)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! Status: ${response.status} - ${response.statusText}`);
@@ -128,11 +131,15 @@ function fetchSkills(endpointUrl) {
             return response.json();
         })
         .then(data => {
+            // A slower, older search must not overwrite newer results
+            if (searchId !== latestSkillSearch) {
+                return data;
+            }
             // Clear existing options first
             const selectElement = document.getElementById('skillNameSelect');
             selectElement.innerHTML = '';
             
-            // Load the skills into the dropdown
+            // Load the matching skills into the dropdown
             loadSkills(data);
             return data;
         })
@@ -253,10 +260,7 @@ function modalVisibilityLogic() {
 
     skillModal.addEventListener("shown.bs.modal", function () {
         console.log("Modal opened.");
-        fetchSkills(SKILLS_URL)
-            .then(skills => {
-                loadSkills(skills);
-            })
+        searchSkills("")
             .catch(error => console.error("Error while loading skills:", error));
     });
 
@@ -1,15 +1,23 @@
 import pytest
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from unittest.mock import patch, MagicMock
+import io
 import json
+from django.core.management import call_command
 
 from jobs.models import JobListing, JobListingSkill
-from users.models import AppUser, Location, Skill
+from users.models import AppUser, Location, Skill, UserSkill
 from jobs.forms import JobListingForm
+from jobs.facets import listing_facets
+from jobs.search import (
+    search_listings, search_job_listings, search_sort_keys, keyset_page, encode_search_cursor, decode_search_cursor
+)
+from jobs.filter_index import listing_filter_index, search_listing_ids, filter_index_facets
+from users.skills import skill_catalog
 
 
 class JobListingModelTest(TestCase):
@@ -314,6 +322,28 @@ class JobViewsTest(TestCase):
         # Check if job listing was created
         self.assertTrue(JobListing.objects.filter(job_title='New Job').exists())
     
+    def test_add_skills_to_job_listing(self):
+        """Test that listing skills are inserted together and reach the matching index"""
+        from jobs.views import add_skills_to_job_listing
+        from matching.index import get_job_skill_index
+
+        django = Skill.objects.create(name="Django")
+        index = get_job_skill_index()
+        index.clear()
+        len(index)  # load the index before the skills are added
+        add_skills_to_job_listing(self.job_listing, [
+            {'id': self.skill.id, 'level': 3}, {'id': str(django.id), 'level': 1}, {'id': None, 'level': 2}
+        ])
+        self.assertEqual(
+            set(self.job_listing.joblistingskill_set.values_list('skill_id', 'level')),
+            {(self.skill.id, 3), (django.id, 1)}
+        )
+        row_ids, _, similarities = index.score([(self.skill.id, 1.0)])
+        self.assertGreater(similarities[list(row_ids).index(self.job_listing.id)], 0)
+
+        with self.assertRaises(ValueError):
+            add_skills_to_job_listing(self.job_listing, [{'id': 999999, 'level': 1}])
+
     def test_search_results_view(self):
         """Test search results view"""
         response = self.client.get(reverse('search_results'))
@@ -340,6 +370,129 @@ class JobViewsTest(TestCase):
         self.assertTemplateUsed(response, 'jobs/worker_profile.html')
 
 
+class CandidateFeedTest(TestCase):
+    """Test the cached, cursor-paginated recruiter candidate feed"""
+
+    def setUp(self):
+        """Set up a recruiter with one active listing and three matching workers"""
+        from django.core.cache import cache
+        from matching.index import candidate_skill_index
+        cache.clear()
+        candidate_skill_index.clear()
+
+        self.client = Client()
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="testpass123"
+        )
+        self.recruiter = AppUser.objects.create(user=self.recruiter_user, role=AppUser.RECRUITER)
+        self.skill = Skill.objects.create(name="Python")
+        self.job_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter,
+            status='ACTIVE'
+        )
+        JobListingSkill.objects.create(job_listing=self.job_listing, skill=self.skill, level=3)
+
+        self.workers = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f"worker{i}",
+                email=f"worker{i}@example.com",
+                password="testpass123",
+                first_name=f"Worker{i}"
+            )
+            worker = AppUser.objects.create(user=user, role=AppUser.WORKER)
+            UserSkill.objects.create(user=worker, skill=self.skill, level=3)
+            self.workers.append(worker)
+
+    def tearDown(self):
+        from django.core.cache import cache
+        from matching.index import candidate_skill_index
+        cache.clear()
+        candidate_skill_index.clear()
+
+    def test_cards_are_cached(self):
+        """Test that a second lookup serves candidate cards from the cache"""
+        from jobs.views import get_candidates
+        ids = [worker.id for worker in self.workers]
+
+        first = get_candidates(ids)
+        with self.assertNumQueries(0):
+            second = get_candidates(ids)
+
+        self.assertEqual(first, second)
+        self.assertEqual([card['id'] for card in second], ids)
+
+    def test_skill_change_invalidates_card(self):
+        """Test that saving a candidate's skill drops the cached card"""
+        from jobs.views import get_candidates
+        worker = self.workers[0]
+        get_candidates([worker.id])
+
+        java = Skill.objects.create(name="Java")
+        UserSkill.objects.create(user=worker, skill=java, level=1)
+
+        card = get_candidates([worker.id])[0]
+        self.assertIn('Java', [skill['name'] for skill in card['skills']])
+
+    def test_profile_change_invalidates_card(self):
+        """Test that saving a candidate's profile drops the cached card"""
+        from jobs.views import get_candidates
+        worker = self.workers[0]
+        get_candidates([worker.id])
+
+        worker.position = "Data Engineer"
+        worker.save()
+
+        self.assertEqual(get_candidates([worker.id])[0]['position'], "Data Engineer")
+
+    def test_feed_cursor_pagination(self):
+        """Test that following next_cursor walks every candidate exactly once"""
+        self.client.force_login(self.recruiter_user)
+
+        response = self.client.get(reverse('candidate_feed'), {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(len(data['candidates']), 2)
+        self.assertIsNotNone(data['next_cursor'])
+
+        response = self.client.get(
+            reverse('candidate_feed'), {'limit': 2, 'cursor': data['next_cursor']}
+        )
+        last_page = response.json()
+        self.assertEqual(len(last_page['candidates']), 1)
+        self.assertIsNone(last_page['next_cursor'])
+
+        seen = [c['id'] for c in data['candidates'] + last_page['candidates']]
+        self.assertEqual(sorted(seen), sorted(worker.id for worker in self.workers))
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_feed_html_format(self):
+        """Test that format=html returns rendered table rows"""
+        self.client.force_login(self.recruiter_user)
+        response = self.client.get(reverse('candidate_feed'), {'format': 'html'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Worker0', response.json()['html'])
+
+    def test_feed_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        self.client.force_login(self.recruiter_user)
+        response = self.client.get(reverse('candidate_feed'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_forbidden_for_workers(self):
+        """Test that workers cannot browse the candidate feed"""
+        self.client.force_login(self.workers[0].user)
+        response = self.client.get(reverse('candidate_feed'))
+        self.assertEqual(response.status_code, 403)
+
+
 class JobFormsTest(TestCase):
     """Test job forms functionality"""
     
@@ -491,6 +644,523 @@ class JobUtilsTest(TestCase):
         self.assertEqual(krakow_jobs.first(), krakow_job)
 
 
+class ListingTilesTest(TestCase):
+    """Test building listing tiles in a constant number of queries"""
+
+    def setUp(self):
+        """Set up listings with skills and applications"""
+        from applications.models import Application
+        self.location = Location.objects.create(
+            country="Poland",
+            city=f"Warsaw-{self.__class__.__name__}"
+        )
+        self.skills = [Skill.objects.create(name=name) for name in ("Python", "Django", "SQL")]
+        self.listings = []
+        for i in range(5):
+            listing = JobListing.objects.create(
+                job_title=f"Developer {i}",
+                company_name="Tech Corp",
+                about_company="About company",
+                job_description="Job description",
+                location=self.location,
+                job_model='REMOTE' if i % 2 else 'STATIONARY'
+            )
+            for level, skill in enumerate(self.skills, start=1):
+                JobListingSkill.objects.create(job_listing=listing, skill=skill, level=level)
+            for j in range(i):
+                user = User.objects.create_user(username=f"applicant{i}-{j}", password="testpass123")
+                Application.objects.create(job_listing=listing, candidate=AppUser.objects.create(user=user))
+            self.listings.append(listing)
+
+    def test_tiles_use_constant_queries(self):
+        """Test that tiles for any number of listings take two queries"""
+        from jobs.utils import get_listings_tiles
+        with self.assertNumQueries(2):
+            tiles = get_listings_tiles(JobListing.objects.order_by('id'), 2)
+
+        self.assertEqual([tile['id'] for tile in tiles], [listing.id for listing in self.listings])
+        self.assertEqual([tile['applications_count'] for tile in tiles], [0, 1, 2, 3, 4])
+        self.assertEqual(tiles[0]['job_location'], str(self.location))
+        # Skills are the best ones first, as in get_listing_skills
+        self.assertEqual([skill['name'] for skill in tiles[0]['skills']], ["SQL", "Django"])
+
+    def test_tiles_match_get_listing_skills(self):
+        """Test that tile skills are the same as get_listing_skills"""
+        from jobs.utils import get_listings_tiles, get_listing_skills
+        tiles = get_listings_tiles(JobListing.objects.filter(id=self.listings[0].id))
+        self.assertEqual(tiles[0]['skills'], get_listing_skills(self.listings[0]))
+
+    def test_worker_index_queries_do_not_grow_with_listings(self):
+        """Test that the worker home page does not query per listing"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        user = User.objects.create_user(username="worker", password="testpass123")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+
+        with override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'):
+            # Warm up the matching index and per-user caches (e.g. the unread message counter)
+            self.client.get('/')
+            with CaptureQueriesContext(connection) as few_listings:
+                self.client.get('/')
+            for i in range(5):
+                JobListing.objects.create(
+                    job_title=f"Extra {i}", company_name="Corp", about_company="About", job_description="Desc"
+                )
+            # Let the matching index pick up the new listings
+            self.client.get('/')
+            with CaptureQueriesContext(connection) as more_listings:
+                response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(more_listings), len(few_listings))
+
+
+
+class ListingSearchTest(TestCase):
+    """Test full-text search over job listings"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        self.python = Skill.objects.create(name="Python")
+        self.django = Skill.objects.create(name="Django")
+
+        def listing(title, company, description, skills=()):
+            job_listing = JobListing.objects.create(
+                job_title=title, company_name=company, about_company="About", job_description=description
+            )
+            for skill in skills:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=skill, level=2)
+            return job_listing
+
+        self.developer = listing("Senior Python Developer", "Acme", "Build APIs")
+        self.backend = listing("Backend Engineer", "Globex", "Work on our python services", [self.django])
+        self.designer = listing("Designer", "Initech", "Figma mockups", [self.python])
+        self.cafe = listing("Café Manager", "Bistro", "Coffee")
+
+    def tearDown(self):
+        skill_catalog.clear()
+
+    def search(self, query):
+        return list(
+            search_listings(JobListing.objects.all(), query).order_by('-search_rank', '-id').values_list('id', flat=True)
+        )
+
+    def test_search_document_follows_skills_and_description(self):
+        """Test that the search document holds skill names and the description"""
+        self.designer.refresh_from_db()
+        self.assertIn("Python", self.designer.search_document)
+        self.assertIn("Figma mockups", self.designer.search_document)
+
+        self.python.name = "Python 3"
+        self.python.save()
+        self.designer.refresh_from_db()
+        self.assertIn("Python 3", self.designer.search_document)
+
+        JobListingSkill.objects.filter(job_listing=self.designer).delete()
+        self.designer.refresh_from_db()
+        self.assertNotIn("Python", self.designer.search_document)
+
+    def test_matches_title_company_skills_and_description(self):
+        """Test which fields are searched, with title matches ranked first"""
+        results = self.search("python")
+        self.assertEqual(results[0], self.developer.id)
+        self.assertEqual(set(results), {self.developer.id, self.backend.id, self.designer.id})
+        self.assertEqual(self.search("django"), [self.backend.id])
+        self.assertEqual(self.search("globex"), [self.backend.id])
+
+    def test_prefix_accents_and_all_words(self):
+        """Test prefix matching, accent folding and that every word must match"""
+        self.assertEqual(self.search("dev"), [self.developer.id])
+        self.assertEqual(self.search("cafe"), [self.cafe.id])
+        self.assertEqual(self.search("python senior"), [self.developer.id])
+        self.assertEqual(self.search('"python" OR'), [])
+        self.assertEqual(len(self.search("")), 4)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_search_results_view_ranks_matches(self):
+        """Test that the search page lists the best matches first"""
+        user = User.objects.create_user(username="searcher", email="searcher@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+        response = self.client.get(reverse('search_results'), {'q': 'python'})
+        self.assertEqual(
+            [tile['id'] for tile in response.context['job_listings']][0], self.developer.id
+        )
+        self.assertEqual(len(response.context['job_listings']), 3)
+
+    def test_rebuild_search_index_command(self):
+        """Test rebuilding the search documents of existing listings"""
+        JobListing.objects.filter(id=self.designer.id).update(search_document="")
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn("Updated 1 of 4", out.getvalue())
+        self.assertEqual(self.search("figma"), [self.designer.id])
+
+
+
+class JobSearchEngineTest(TestCase):
+    """Test the job search shared by the search page and the search_jobs tool"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+        self.python = Skill.objects.create(name="Python")
+        self.django = Skill.objects.create(name="Django")
+        self.javascript = Skill.objects.create(name="JavaScript")
+        self.location, _ = Location.objects.get_or_create(country="Poland", city="Gdansk")
+
+        def listing(title, skills, **fields):
+            job_listing = JobListing.objects.create(
+                job_title=title, company_name="Company", about_company="About", job_description="Description",
+                **fields
+            )
+            for skill in skills:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=skill, level=2)
+            return job_listing
+
+        self.full_stack = listing("Full Stack", [self.python, self.django, self.javascript], job_model="REMOTE")
+        self.backend = listing("Backend", [self.python], salary_min=10000, salary_max=15000, location=self.location)
+        self.frontend = listing("Frontend", [self.javascript], salary_currency="EUR")
+        self.no_skills = listing("Manager", [])
+        skill_catalog.compiled()
+
+    def tearDown(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+
+    def search(self, **filters):
+        return list(search_job_listings(JobListing.objects.all(), **filters).values_list('id', flat=True))
+
+    def test_listings_are_ranked_by_matching_skills(self):
+        """Test that skill matches are counted and ordered in the database"""
+        self.assertEqual(self.search(skills=["Python", "Django"]), [self.full_stack.id, self.backend.id])
+        listings = search_job_listings(JobListing.objects.all(), skills=["python", "JS", "Cobol"])
+        self.assertEqual(
+            {listing.id: listing.matching_skills_count for listing in listings},
+            {self.full_stack.id: 2, self.backend.id: 1, self.frontend.id: 1}
+        )
+        self.assertEqual(self.search(skills=["Cobol"]), [])
+
+    def test_filters(self):
+        """Test the field filters, with newest listings first"""
+        self.assertEqual(len(self.search()), 4)
+        self.assertEqual(self.search()[0], self.no_skills.id)
+        self.assertEqual(self.search(job_model="REMOTE"), [self.full_stack.id])
+        self.assertEqual(self.search(salary_min=9000, salary_max="16000"), [self.backend.id])
+        self.assertEqual(self.search(currency="EUR"), [self.frontend.id])
+        self.assertEqual(self.search(location="Gdansk"), [self.backend.id])
+        self.assertEqual(self.search(location="Poland, Gdansk"), [self.backend.id])
+
+    def test_search_jobs_tool_loads_only_the_limit(self):
+        """Test that the tool applies the limit in SQL and loads tiles in two queries"""
+        from jobs.tools import search_jobs
+
+        with self.assertNumQueries(2):
+            results = search_jobs(skills=["Python", "Django", "JavaScript"], limit=2)
+        self.assertEqual([job['id'] for job in results], [self.full_stack.id, self.frontend.id])
+        self.assertEqual(results[0]['matching_skills_count'], 3)
+        self.assertEqual(len(results[0]['skills']), 3)
+        self.assertTrue(results[0]['is_remote'])
+
+        with override_settings(JOB_SEARCH_TOOL_MAX_RESULTS=3):
+            self.assertEqual(len(search_jobs()), 3)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_search_results_view_uses_skill_ranking(self):
+        """Test the search page with a skills filter"""
+        user = User.objects.create_user(username="skills", email="skills@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+        response = self.client.get(reverse('search_results'), {'skills': ["Python", "Django"]})
+        tiles = response.context['job_listings']
+        self.assertEqual([tile['id'] for tile in tiles], [self.full_stack.id, self.backend.id])
+        self.assertEqual([tile['matching_skills_count'] for tile in tiles], [2, 1])
+
+
+
+@override_settings(JOB_SEARCH_PAGE_SIZE=4, JOB_SEARCH_MAX_PAGE_SIZE=6)
+class SearchPaginationTest(TestCase):
+    """Test keyset pagination of search results"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+        self.python = Skill.objects.create(name="Python")
+        self.listings = []
+        for number in range(10):
+            job_listing = JobListing.objects.create(
+                job_title="Python Developer" if number % 2 else "Developer",
+                company_name="Company", about_company="About", job_description="Description"
+            )
+            if number % 3 == 0:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=self.python, level=2)
+            self.listings.append(job_listing)
+        user = User.objects.create_user(username="pager", email="pager@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+
+    def tearDown(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+
+    def walk(self, **filters):
+        """All pages of a search, followed through the cursors."""
+        job_listings = search_job_listings(JobListing.objects.all(), **filters)
+        sort_keys = search_sort_keys(filters.get('search_query'), filters.get('skills'))
+        ids, after = [], None
+        while True:
+            rows, next_values = keyset_page(job_listings, sort_keys, after, limit=3)
+            ids.extend(row.id for row in rows)
+            if next_values is None:
+                return ids
+            after = decode_search_cursor(encode_search_cursor(next_values), sort_keys)
+
+    def test_pages_follow_the_search_order(self):
+        """Test that walking the pages yields the unpaginated results, in order"""
+        for filters in [{}, {'search_query': 'python developer'}, {'search_query': 'dev'},
+                        {'skills': ['Python']}, {'search_query': 'developer', 'skills': ['Python']}]:
+            expected = list(search_job_listings(JobListing.objects.all(), **filters).values_list('id', flat=True))
+            self.assertEqual(self.walk(**filters), expected, filters)
+
+    def test_cursor_must_match_the_sort_keys(self):
+        """Test that malformed cursors are rejected"""
+        self.assertEqual(decode_search_cursor('2:1.5:7', ['matching_skills_count', 'search_rank', 'id']), [2, 1.5, 7])
+        with self.assertRaises(ValueError):
+            decode_search_cursor('1.5:7', ['id'])
+        with self.assertRaises(ValueError):
+            decode_search_cursor('x', ['id'])
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_search_page_renders_the_first_page(self):
+        """Test that the search page only renders JOB_SEARCH_PAGE_SIZE tiles"""
+        response = self.client.get(reverse('search_results'), {'q': 'developer'})
+        self.assertEqual(len(response.context['job_listings']), 4)
+        self.assertIsNotNone(response.context['next_cursor'])
+        self.assertContains(response, 'id="loadMoreResults"')
+
+    def test_load_more(self):
+        """Test the load more endpoint in JSON and HTML"""
+        url = reverse('search_results_more')
+        response = self.client.get(url, {'skills': 'Python', 'limit': 100})
+        data = response.json()
+        self.assertEqual(len(data['listings']), 4)
+        self.assertIsNone(data['next_cursor'])
+
+        ids, cursor = [], None
+        while True:
+            params = {'q': 'developer', 'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            ids.extend(tile['id'] for tile in data['listings'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(sorted(ids), sorted(listing.id for listing in self.listings))
+
+        response = self.client.get(url, {'q': 'developer', 'format': 'html'})
+        self.assertEqual(response.json()['html'].count('job-tile'), 4)
+
+        self.assertEqual(self.client.get(url, {'cursor': '1:2'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': '0'}).status_code, 400)
+
+
+
+class SearchFacetsTest(TestCase):
+    """Test the facet counts of search results"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+        self.python = Skill.objects.create(name="Python")
+        self.django = Skill.objects.create(name="Django")
+        self.gdansk, _ = Location.objects.get_or_create(country="Poland", city="Gdansk")
+        self.berlin, _ = Location.objects.get_or_create(country="Germany", city="Berlin")
+
+        def listing(job_model, currency, salary, location, skills):
+            job_listing = JobListing.objects.create(
+                job_title="Developer", company_name="Company", about_company="About", job_description="Description",
+                job_model=job_model, salary_currency=currency, salary_min=salary[0], salary_max=salary[1],
+                location=location
+            )
+            for skill in skills:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=skill, level=2)
+
+        listing("REMOTE", "PLN", (6000, 9000), self.gdansk, [self.python, self.django])
+        listing("REMOTE", "EUR", (3000, 4000), self.berlin, [self.python])
+        listing("HYBRID", "PLN", (12000, 18000), self.gdansk, [])
+        listing("STATIONARY", "PLN", (None, None), None, [self.django])
+        skill_catalog.compiled()
+
+    def tearDown(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+
+    def counts(self, facets, name):
+        return {facet['value']: facet['count'] for facet in facets[name]}
+
+    def test_facets_are_counted_in_three_queries(self):
+        """Test the counts of every facet over all results"""
+        with self.assertNumQueries(3):
+            facets = listing_facets(search_job_listings(JobListing.objects.all()))
+        self.assertEqual(self.counts(facets, 'job_model'), {'REMOTE': 2, 'HYBRID': 1, 'STATIONARY': 1})
+        self.assertEqual(self.counts(facets, 'currency'), {'PLN': 3, 'EUR': 1})
+        self.assertEqual(self.counts(facets, 'salary'), {(None, 5000): 1, (5000, 10000): 1, (10000, 20000): 1})
+        self.assertEqual(self.counts(facets, 'location'), {self.gdansk.id: 2, self.berlin.id: 1})
+        self.assertEqual(facets['location'][0]['label'], "Gdansk, Poland")
+        self.assertEqual(self.counts(facets, 'skills'), {'Python': 2, 'Django': 2})
+
+    def test_facets_follow_the_current_search(self):
+        """Test that facets only count the listings matching the filters"""
+        facets = listing_facets(search_job_listings(JobListing.objects.all(), skills=["Django"]))
+        self.assertEqual(self.counts(facets, 'job_model'), {'REMOTE': 1, 'STATIONARY': 1})
+        facets = listing_facets(search_job_listings(JobListing.objects.all(), currency="EUR"))
+        self.assertEqual(self.counts(facets, 'location'), {self.berlin.id: 1})
+        facets = listing_facets(search_job_listings(JobListing.objects.all(), search_query="dev", skills=["Python"]))
+        self.assertEqual(self.counts(facets, 'currency'), {'PLN': 1, 'EUR': 1})
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_search_page_links_facets(self):
+        """Test facet links on the search page"""
+        user = User.objects.create_user(username="facets", email="facets@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+        response = self.client.get(reverse('search_results'), {'model': 'REMOTE'})
+        facets = response.context['facets']
+        remote = facets['job_model'][0]
+        self.assertTrue(remote['selected'])
+        self.assertEqual(self.counts(facets, 'job_model'), {'REMOTE': 2})
+
+        gdansk = next(facet for facet in facets['location'] if facet['value'] == self.gdansk.id)
+        self.assertIn(f"location_id={self.gdansk.id}", gdansk['url'])
+        self.assertIn("model=REMOTE", gdansk['url'])
+        response = self.client.get(gdansk['url'])
+        self.assertEqual(len(response.context['job_listings']), 1)
+        self.assertContains(response, 'id="searchFacets"')
+
+
+class ListingFilterIndexTest(TestCase):
+    """Test the in-memory filter index of active listings"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+        self.python = Skill.objects.create(name="Python")
+        self.django = Skill.objects.create(name="Django")
+        self.gdansk, _ = Location.objects.get_or_create(country="Poland", city="Gdansk")
+        self.listings = []
+        for number in range(8):
+            job_listing = JobListing.objects.create(
+                job_title="Developer", company_name="Company", about_company="About", job_description="Description",
+                job_model="REMOTE" if number % 2 else "HYBRID", salary_currency="PLN" if number < 5 else "EUR",
+                salary_min=1000 * number, salary_max=2000 * number if number else None,
+                location=self.gdansk if number % 3 == 0 else None,
+                status="CLOSED" if number == 7 else "ACTIVE"
+            )
+            if number % 2 == 0:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=self.python, level=2)
+            if number % 4 == 0:
+                JobListingSkill.objects.create(job_listing=job_listing, skill=self.django, level=2)
+            self.listings.append(job_listing)
+        self.active = JobListing.objects.filter(status='ACTIVE')
+
+    def tearDown(self):
+        skill_catalog.clear()
+        listing_filter_index.clear()
+
+    def search(self, **filters):
+        filters.setdefault('skills', [])
+        sort_keys = search_sort_keys(None, filters['skills'])
+        return search_listing_ids(filters, sort_keys, limit=100)
+
+    def test_index_matches_the_database_search(self):
+        """Test that the index returns the database search results, in the same order"""
+        for filters in [{}, {'job_model': 'REMOTE'}, {'currency': 'EUR', 'salary_min': '5000'},
+                        {'salary_max': '8000'}, {'location_id': str(self.gdansk.id)},
+                        {'skills': ['Python', 'Django']}, {'skills': ['Django'], 'job_model': 'HYBRID'}]:
+            expected = search_job_listings(self.active, **filters)
+            listing_ids, counts, next_values = self.search(**filters)
+            self.assertEqual(listing_ids, list(expected.values_list('id', flat=True)), filters)
+            self.assertEqual(counts, list(expected.values_list('matching_skills_count', flat=True)), filters)
+            self.assertIsNone(next_values)
+
+    def test_filters_without_queries(self):
+        """Test that a warm index answers searches and facets without the database"""
+        listing_filter_index.snapshot()
+        skill_catalog.compiled()
+        with self.assertNumQueries(0):
+            self.search(job_model='REMOTE', skills=['Python'])
+            filter_index_facets({'currency': 'PLN', 'skills': []})
+
+    def test_pages_follow_the_cursor(self):
+        """Test that walking the pages yields all results"""
+        sort_keys = search_sort_keys(None, ['Python'])
+        ids, after = [], None
+        while True:
+            page, _, after = search_listing_ids({'skills': ['Python']}, sort_keys, after, limit=2)
+            ids.extend(page)
+            if after is None:
+                break
+        expected = search_job_listings(self.active, skills=['Python'])
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_index_follows_listing_changes(self):
+        """Test that saved listings and skills are re-read into the index"""
+        from jobs.views import add_skills_to_job_listing
+        first, closed = self.listings[1], self.listings[7]
+        self.assertNotIn(closed.id, self.search()[0])
+
+        first.status = 'CLOSED'
+        first.save()
+        closed.status = 'ACTIVE'
+        closed.save()
+        JobListingSkill.objects.create(job_listing=closed, skill=self.django, level=1)
+        listing_ids = self.search(skills=['Django'])[0]
+        self.assertIn(closed.id, listing_ids)
+        self.assertNotIn(first.id, self.search()[0])
+
+        JobListingSkill.objects.filter(job_listing=closed).delete()
+        self.assertNotIn(closed.id, self.search(skills=['Django'])[0])
+
+        add_skills_to_job_listing(closed, [{'id': self.python.id, 'level': 3}])
+        self.assertIn(closed.id, self.search(skills=['Python'])[0])
+
+    def test_facets_match_the_database(self):
+        """Test that facets counted from the index equal the database counts"""
+        for filters in [{}, {'skills': ['Python']}, {'currency': 'EUR'}]:
+            expected = listing_facets(search_job_listings(self.active, **filters))
+            facets = filter_index_facets({'skills': [], **filters})
+            self.assertEqual(facets, expected, filters)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_worker_search_page_uses_the_index(self):
+        """Test that the search page shows the indexed results of workers"""
+        user = User.objects.create_user(username="indexed", email="indexed@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+        response = self.client.get(f"{reverse('search_results')}?skills=Python&skills=Django")
+        expected = search_job_listings(self.active, skills=['Python', 'Django'])
+        self.assertEqual(
+            [tile['id'] for tile in response.context['job_listings']], list(expected.values_list('id', flat=True))
+        )
+        self.assertEqual(response.context['job_listings'][0]['matching_skills_count'], 2)
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_malformed_number_filters_are_ignored(self):
+        """Test that malformed salary and location filters are ignored by both search views"""
+        user = User.objects.create_user(username="malformed", email="malformed@example.com", password="pass")
+        AppUser.objects.create(user=user, role=AppUser.WORKER)
+        self.client.force_login(user)
+        for query in ["location_id=abc", "salary_min=lots&salary_max=1e3", "q=developer&location_id=abc"]:
+            response = self.client.get(f"{reverse('search_results')}?{query}")
+            self.assertEqual(response.status_code, 200, query)
+            self.assertEqual(len(response.context['job_listings']), self.active.count(), query)
+            response = self.client.get(f"{reverse('search_results_more')}?{query}")
+            self.assertEqual(response.status_code, 200, query)
+            self.assertEqual(len(response.json()['listings']), self.active.count(), query)
+
+
 @pytest.mark.django_db
 class TestJobModels:
     """Pytest-style tests for job models"""
@@ -8,6 +8,7 @@ urlpatterns = [
     path("worker_profile", views.worker_profile, name="worker_profile"),
     path("settings", views.view_settings, name="settings"),
     path("get_skills", views.get_skills, name="get_skills"),
+    path("skills/search", views.search_skills, name="search_skills"),
     path("add_skill", views.add_skill, name="add_skill"),
     path("listings", views.listings_view, name="listings"),
     path("listings/add_listing", views.add_listing_view, name="add_listing"),
@@ -24,4 +25,6 @@ urlpatterns = [
     path('update_mobile', views.update_mobile, name='update_mobile'),
     path('update_starts_in', views.update_starts_in, name='update_starts_in'),
     path('search', views.search_results_view, name='search_results'),
+    path('search/more', views.search_results_more, name='search_results_more'),
+    path('candidates/feed', views.candidate_feed, name='candidate_feed'),
 ]
\ No newline at end of file
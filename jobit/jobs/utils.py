@@ -1,13 +1,77 @@
+from django.core.cache import cache
+from django.db.models import Count, Prefetch, QuerySet
 from jobs.models import JobListingSkill
+from users.skills import get_skill_catalog
 
 def get_listing_skills(job_listing):
-    job_listing_skills = JobListingSkill.objects.filter(job_listing=job_listing)
+    job_listing_skills = list(
+        JobListingSkill.objects.filter(job_listing=job_listing).values_list('skill_id', 'level')
+    )
+    # Names come from the in-memory skill catalog instead of a join
+    names = get_skill_catalog().names(skill_id for skill_id, _ in job_listing_skills)
     skills = []
-    for job_listing_skill in job_listing_skills:
-        skills.append({"name": job_listing_skill.skill.name, "level": job_listing_skill.level, "id": job_listing_skill.skill.id})
+    for skill_id, level in job_listing_skills:
+        skills.append({"name": names.get(skill_id), "level": level, "id": skill_id})
 
     def level(e):
         return e['level']
     skills.sort(key=level, reverse=True)
 
-    return skills
\ No newline at end of file
+    return skills
+
+
+def with_tile_data(job_listings):
+    """
+    Load everything a listing tile needs with the listings themselves: the location,
+    the number of applications and the skills (best first, as in get_listing_skills).
+    Evaluating the queryset takes two queries regardless of the number of listings.
+    """
+    return job_listings.select_related('location').annotate(
+        applications_count=Count('application')
+    ).prefetch_related(
+        Prefetch(
+            'joblistingskill_set',
+            queryset=JobListingSkill.objects.select_related('skill').order_by('-level', 'id'),
+            to_attr='tile_skills'
+        )
+    )
+
+
+def get_listings_tiles(job_listings, number_of_skills_per_tile=None):
+    """
+    Tile data for job listings, in the given order.
+    Accepts a queryset, or listings already loaded through with_tile_data.
+    """
+    if isinstance(job_listings, QuerySet):
+        job_listings = with_tile_data(job_listings)
+
+    result = []
+    for job_listing in job_listings:
+        skills = [
+            {"name": listing_skill.skill.name, "level": listing_skill.level, "id": listing_skill.skill.id}
+            for listing_skill in job_listing.tile_skills
+        ][:number_of_skills_per_tile]
+        result.append({
+            "id": job_listing.id,
+            "job_title": job_listing.job_title,
+            "job_location": str(job_listing.location) if job_listing.location else "",
+            "company_name": job_listing.company_name,
+            "salary_min": job_listing.salary_min,
+            "salary_max": job_listing.salary_max,
+            "salary_currency": job_listing.salary_currency,
+            "skills": skills,
+            "is_remote": job_listing.job_model == 'REMOTE',
+            "is_hybrid": job_listing.job_model == 'HYBRID',
+            "status": job_listing.status,
+            "applications_count": job_listing.applications_count
+        })
+    return result
+
+
+def candidate_card_cache_key(candidate_id):
+    return f"candidate_card:{candidate_id}"
+
+
+def invalidate_candidate_card(candidate_id):
+    """Drop the cached recruiter dashboard card of a candidate (AppUser id)."""
+    cache.delete(candidate_card_cache_key(candidate_id))
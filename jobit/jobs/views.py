@@ -2,13 +2,24 @@ import json
 import re
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseRedirect, JsonResponse
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.views.decorators.http import require_http_methods
-from jobs.utils import get_listing_skills
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from jobs.utils import get_listing_skills, get_listings_tiles, with_tile_data, candidate_card_cache_key
 from jobs.forms import JobListingForm
+from jobs.facets import listing_facets
+from jobs.filter_index import get_listing_filter_index, search_listing_ids, filter_index_facets
+from jobs.search import (
+    search_job_listings, search_sort_keys, keyset_page, encode_search_cursor, decode_search_cursor,
+    refresh_search_documents
+)
 from users.models import Skill, UserSkill, AppUser, User, Location
-from users.views import get_user_role, get_user, get_user_skills, get_profile_photo
+from users.views import get_user_role, get_user, get_user_skills
+from users.photos import profile_photo_url, LIST_THUMBNAIL_SIZE, PROFILE_THUMBNAIL_SIZE
+from users.skills import get_skill_catalog, skills_url, skill_search_url
 from django.contrib.auth import logout
 from users.views import get_user
 from .models import JobListing, JobListingSkill
@@ -16,8 +27,15 @@ from applications.models import Application
 from django.db.utils import IntegrityError
 from users.locations import LOCATIONS
 from applications.utils import get_job_listing_applications
+from matching.utils import recommend_candidates, find_job_matches, KNN_MATCHES_LIMIT, CANDIDATES_PER_PAGE
+from matching.index import get_job_skill_index
+from django.db.models import Prefetch
+from django.core.cache import cache
+from django.conf import settings
+from django.template.loader import render_to_string
 ROLE_WORKER = "worker"
 ROLE_RECRUITER = "recruiter"
+MAX_CANDIDATES_PER_PAGE = 100
 
 
 @login_required
@@ -29,8 +47,7 @@ def index(request):
         all_tiles = get_listings_tiles(job_listings, 4)
 
         # Filter remote offers only
-        remote_job_listings = [job for job in job_listings if job.job_model == 'REMOTE']
-        remote_tiles = get_listings_tiles(remote_job_listings, 4)
+        remote_tiles = [tile for tile in all_tiles if tile['is_remote']]
         
         # Get KNN matched jobs and convert to tiles
         knn_matched_jobs = get_knn_matches(request)
@@ -47,97 +64,194 @@ def index(request):
         active_listings = recruiter_listings.filter(status='ACTIVE')
         listings_tiles = get_listings_tiles(active_listings, 3)
         
-        # Get all workers/candidates
-        all_candidates = get_all_candidates()
+        # Get the first page of candidates ranked against the active listings;
+        # further pages are loaded from candidate_feed
+        recommendations = recommend_candidates(active_listings)
+        candidates = get_recommended_candidates(recommendations['candidates'], active_listings)
         
         return render(request, 'jobs/index_recruiter.html', {
             "listings_tiles": listings_tiles,
-            "candidates": all_candidates
+            "candidates": candidates,
+            "candidates_total": recommendations['total'],
+            "next_cursor": encode_candidate_cursor(recommendations['next_cursor'])
         })
 
 
-@login_required
-def search_results_view(request):
-    search_query = request.GET.get('q', '').strip()
-    job_model = request.GET.get('model', '')
-    salary_min = request.GET.get('salary_min')
-    salary_max = request.GET.get('salary_max')
-    currency = request.GET.get('currency', '')
-    skills = request.GET.getlist('skills')  # Get list of skills from query params
-    user_role = get_user_role(request.user)
+def parse_filter_number(value):
+    """Numeric filter from the query string; empty or malformed values mean no filter."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_search_filters(request):
+    """Search filters from the query string of the search page."""
+    return {
+        'search_query': request.GET.get('q', '').strip(),
+        'job_model': request.GET.get('model', ''),
+        'salary_min': parse_filter_number(request.GET.get('salary_min')),
+        'salary_max': parse_filter_number(request.GET.get('salary_max')),
+        'currency': request.GET.get('currency', ''),
+        'location_id': parse_filter_number(request.GET.get('location_id')),
+        'skills': request.GET.getlist('skills'),  # Get list of skills from query params
+    }
+
 
+def get_search_listings(request, filters):
+    """The listings the user may search, narrowed by the filters and ordered best first."""
     # Start with appropriate job listings based on user role
-    if user_role == ROLE_RECRUITER:
+    if get_user_role(request.user) == ROLE_RECRUITER:
         # Recruiters can only search their own listings
         job_listings = get_recruiter_listings(request.user)
     else:
         # Workers can search all active listings
         job_listings = JobListing.objects.filter(status='ACTIVE')
 
-    # Apply search query filter
-    if search_query:
-        job_listings = job_listings.filter(
-            job_title__icontains=search_query
-        ) | job_listings.filter(
-            company_name__icontains=search_query
-        )
+    # Filtering, skill matching and ranking all run in the database (see jobs.search)
+    return search_job_listings(job_listings, **filters)
+
+
+def get_search_results_page(job_listings, filters, cursor=None, limit=None):
+    """
+    One page of search result tiles, best first, and the cursor of the next page.
+    Raises ValueError for a malformed cursor.
+    """
+    sort_keys = search_sort_keys(filters['search_query'], filters['skills'])
+    after = decode_search_cursor(cursor, sort_keys) if cursor else None
+    listings, next_values = keyset_page(
+        with_tile_data(job_listings), sort_keys, after, limit or settings.JOB_SEARCH_PAGE_SIZE
+    )
+
+    tiles = get_listings_tiles(listings)
+    for tile, listing in zip(tiles, listings):
+        tile['matching_skills_count'] = listing.matching_skills_count
+    return tiles, encode_search_cursor(next_values)
+
+
+def uses_filter_index(request, filters):
+    """
+    Worker searches without a text query only filter active listings, which
+    the in-memory filter index answers without the database (see jobs.filter_index).
+    """
+    return (
+        settings.JOB_FILTER_INDEX_ENABLED and not filters['search_query']
+        and get_user_role(request.user) != ROLE_RECRUITER
+    )
+
+
+def get_indexed_results_page(filters, cursor=None, limit=None):
+    """
+    Like get_search_results_page, with the ids of the page taken from the
+    filter index: only the tiles of the page itself are read from the database.
+    """
+    sort_keys = search_sort_keys(None, filters['skills'])
+    after = decode_search_cursor(cursor, sort_keys) if cursor else None
+    listing_ids, counts, next_values = search_listing_ids(
+        filters, sort_keys, after, limit or settings.JOB_SEARCH_PAGE_SIZE
+    )
+
+    # The index may lag behind other processes for up to JOB_FILTER_INDEX_TTL; drop listings closed meanwhile
+    listings = with_tile_data(JobListing.objects.filter(status='ACTIVE')).in_bulk(listing_ids)
+    page = [(listings[listing_id], count) for listing_id, count in zip(listing_ids, counts) if listing_id in listings]
+
+    tiles = get_listings_tiles([listing for listing, _ in page])
+    for tile, (_, count) in zip(tiles, page):
+        tile['matching_skills_count'] = count
+    return tiles, encode_search_cursor(next_values)
+
+
+# Query parameter of the search page each single-valued facet sets
+FACET_PARAMS = {'job_model': 'model', 'currency': 'currency', 'location': 'location_id'}
+
+
+def add_facet_links(request, facets):
+    """Add to every facet value the URL of the current search narrowed by it, and whether it is applied."""
+    for name, values in facets.items():
+        for facet in values:
+            params = request.GET.copy()
+            params.pop('cursor', None)
+            if name == 'skills':
+                facet['selected'] = facet['value'] in params.getlist('skills')
+                if not facet['selected']:
+                    params.appendlist('skills', facet['value'])
+            elif name == 'salary':
+                bounds = {'salary_min': facet['value'][0], 'salary_max': facet['value'][1]}
+                facet['selected'] = all(
+                    params.get(param, '') == ('' if bound is None else str(bound)) for param, bound in bounds.items()
+                )
+                for param, bound in bounds.items():
+                    if bound is None:
+                        params.pop(param, None)
+                    else:
+                        params[param] = bound
+            else:
+                param = FACET_PARAMS[name]
+                facet['selected'] = params.get(param) == str(facet['value'])
+                params[param] = facet['value']
+            facet['url'] = f"{reverse('search_results')}?{params.urlencode()}"
+    return facets
 
-    # Apply job model filter
-    if job_model:
-        job_listings = job_listings.filter(job_model=job_model)
-
-    # Apply salary range filter
-    if salary_min:
-        job_listings = job_listings.filter(salary_min__gte=salary_min)
-    if salary_max:
-        job_listings = job_listings.filter(salary_max__lte=salary_max)
-
-    # Apply currency filter
-    if currency:
-        job_listings = job_listings.filter(salary_currency=currency)
-
-    # Convert to list format for template and apply skill-based ranking
-    job_list = []
-    for job in job_listings:
-        job_skills = get_listing_skills(job)
-        job_skill_names = {skill['name'] for skill in job_skills}
-        
-        # Count how many requested skills this job has
-        matching_skills = sum(1 for skill in skills if skill in job_skill_names)
-        
-        # Only include jobs that have at least one matching skill if skills were specified
-        if not skills or matching_skills > 0:
-            job_list.append({
-                'id': job.id,
-                'job_title': job.job_title,
-                'job_location': str(job.location) if job.location else "",
-                'company_name': job.company_name,
-                'salary_min': job.salary_min,
-                'salary_max': job.salary_max,
-                'salary_currency': job.salary_currency,
-                'skills': job_skills,
-                'is_remote': job.job_model == 'REMOTE',
-                'is_hybrid': job.job_model == 'HYBRID',
-                'matching_skills_count': matching_skills  # Add this for sorting
-            })
-
-    # Sort jobs by number of matching skills (descending)
-    if skills:  # Only sort by matching skills if skills were specified
-        job_list.sort(key=lambda x: x['matching_skills_count'], reverse=True)
+
+@login_required
+def search_results_view(request):
+    filters = get_search_filters(request)
+    if uses_filter_index(request, filters):
+        job_list, next_cursor = get_indexed_results_page(filters)
+        facets = filter_index_facets(filters)
+    else:
+        job_listings = get_search_listings(request, filters)
+        job_list, next_cursor = get_search_results_page(job_listings, filters)
+        facets = listing_facets(job_listings)
 
     return render(request, 'jobs/search_results.html', {
         'job_listings': job_list,
-        'search_query': search_query,
+        'next_cursor': next_cursor,
+        'facets': add_facet_links(request, facets),
+        'search_query': filters['search_query'],
         'filters': {
-            'model': job_model,
-            'salary_min': salary_min,
-            'salary_max': salary_max,
-            'currency': currency,
-            'skills': skills
+            'model': filters['job_model'],
+            'salary_min': filters['salary_min'],
+            'salary_max': filters['salary_max'],
+            'currency': filters['currency'],
+            'location_id': filters['location_id'],
+            'skills': filters['skills']
         }
     })
 
 
+@login_required
+@require_http_methods(["GET"])
+def search_results_more(request):
+    """
+    Next page of search results for the "load more" button: the same filters as
+    the search page plus ?cursor=. Returns the tiles (or rendered tiles with
+    ?format=html) and the next cursor.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', settings.JOB_SEARCH_PAGE_SIZE)), settings.JOB_SEARCH_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError(limit)
+        filters = get_search_filters(request)
+        if uses_filter_index(request, filters):
+            job_list, next_cursor = get_indexed_results_page(filters, request.GET.get('cursor'), limit)
+        else:
+            job_list, next_cursor = get_search_results_page(
+                get_search_listings(request, filters), filters, request.GET.get('cursor'), limit
+            )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+
+    response = {'next_cursor': next_cursor}
+    if request.GET.get('format') == 'html':
+        response['html'] = render_to_string(
+            'jobs/components/search_result_tiles.html', {'job_listings': job_list}, request
+        )
+    else:
+        response['listings'] = job_list
+    return JsonResponse(response)
+
+
 @login_required
 def worker_profile(request):
     user = request.user
@@ -160,7 +274,7 @@ def worker_profile(request):
     }
     skills = get_user_skills(user)
     projects = profile.projects.all()  
-    profile_photo_b64 = get_profile_photo(user.id)
+    profile_photo = profile_photo_url(profile, PROFILE_THUMBNAIL_SIZE)
 
     projects_json = []
     for project in projects:
@@ -180,8 +294,8 @@ def worker_profile(request):
         "about_me": getattr(profile, "about_me", ""),
         "projects": projects,
         "projects_json": json.dumps(projects_json),
-        "profile_photo_b64": profile_photo_b64,
-        "skills_url": "/get_skills"
+        "profile_photo_url": profile_photo,
+        "skill_search_url": skill_search_url()
     }
     return render(request, 'jobs/worker_profile.html', context)
 
@@ -265,6 +379,7 @@ def add_listing_view(request):
             context = {
                 "form": form,
                 "locations_json": json.dumps(LOCATIONS),
+                "skills_url": skills_url(),
             }
             return render(request, "jobs/add_listing.html", context)
 
@@ -280,6 +395,7 @@ def add_listing_view(request):
             context = {
                 "form": form,
                 "locations_json": json.dumps(LOCATIONS),
+                "skills_url": skills_url(),
             }
             return render(request, "jobs/add_listing.html", context)
 
@@ -312,6 +428,7 @@ def add_listing_view(request):
     context = {
         "form": form,
         "locations_json": json.dumps(LOCATIONS),
+        "skills_url": skills_url(),
     }
     return render(request, "jobs/add_listing.html", context)
 
@@ -332,54 +449,160 @@ def parse_skills_from_form(skills_string):
 
 
 def add_skills_to_job_listing(job_listing, skills):
+    """
+    Attach the skills picked in the form to a listing. Skill ids are checked
+    against the skill catalog and all rows are inserted with one query.
+    """
     print(f"Adding {len(skills)} skills to job listing {job_listing.id}")
+    levels = {}
     for skill in skills:
-        print(f"Processing skill: {skill}")
+        skill_id = skill.get('id')
+        skill_level = skill.get('level')
+        if not skill_id or not skill_level:
+            print(f"Invalid skill data: {skill}")
+            continue
         try:
-            skill_id = skill.get('id')
-            skill_level = skill.get('level')
-            
-            if not skill_id or not skill_level:
-                print(f"Invalid skill data: {skill}")
-                continue
-                
-            skill_obj = get_skill_by_id(skill_id)
-            JobListingSkill.objects.create(job_listing=job_listing, skill=skill_obj, level=skill_level)
-            print(f"Successfully added skill {skill_obj.name} with level {skill_level}")
-        except Exception as e:
-            print(f"Error adding skill {skill}: {e}")
-            raise
-
-
-def get_all_candidates():
-    """Get all workers/candidates with their skills and profile information"""
-    candidates = AppUser.objects.filter(role='worker').select_related('user', 'location')
-    data = []
+            levels[int(skill_id)] = skill_level
+        except (TypeError, ValueError):
+            print(f"Invalid skill data: {skill}")
+
+    names = get_skill_catalog().names(levels)
+    missing = [skill_id for skill_id in levels if skill_id not in names]
+    if missing:
+        print(f"Error adding skills {missing}: not found")
+        raise ValueError(f"Skill with id {missing[0]} not found")
+
+    try:
+        JobListingSkill.objects.bulk_create([
+            JobListingSkill(job_listing=job_listing, skill_id=skill_id, level=level)
+            for skill_id, level in levels.items()
+        ])
+    except Exception as e:
+        print(f"Error adding skills {skills}: {e}")
+        raise
+    # bulk_create sends no post_save, so refresh the listing's index rows and search document here
+    get_job_skill_index().invalidate(job_listing.id)
+    get_listing_filter_index().invalidate(job_listing.id)
+    refresh_search_documents([job_listing.id])
+    print(f"Successfully added skills {', '.join(names.values())}")
+
+
+def encode_candidate_cursor(cursor):
+    if cursor is None:
+        return None
+    match_score, candidate_id = cursor
+    return f"{match_score!r}:{candidate_id}"
+
+
+def decode_candidate_cursor(value):
+    """Parse a 'match_score:candidate_id' cursor; raises ValueError if malformed."""
+    match_score, candidate_id = value.split(':')
+    return float(match_score), int(candidate_id)
+
+
+@login_required
+@require_http_methods(["GET"])
+def candidate_feed(request):
+    """
+    Cursor-paginated feed of candidates recommended for the recruiter's active listings.
+    Returns the serialized cards (or rendered table rows with ?format=html) and the next cursor.
+    """
+    if get_user_role(request.user) != ROLE_RECRUITER:
+        return JsonResponse({'error': 'Only recruiters can browse candidates'}, status=403)
+    
+    try:
+        cursor = request.GET.get('cursor')
+        after = decode_candidate_cursor(cursor) if cursor else None
+        limit = min(int(request.GET.get('limit', CANDIDATES_PER_PAGE)), MAX_CANDIDATES_PER_PAGE)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit'}, status=400)
+    if limit < 1:
+        return JsonResponse({'error': 'Limit must be positive'}, status=400)
+    
+    active_listings = get_recruiter_listings(request.user).filter(status='ACTIVE')
+    recommendations = recommend_candidates(active_listings, limit, after)
+    candidates = get_recommended_candidates(recommendations['candidates'], active_listings)
+    
+    response = {
+        'next_cursor': encode_candidate_cursor(recommendations['next_cursor']),
+        'total': recommendations['total']
+    }
+    if request.GET.get('format') == 'html':
+        response['html'] = render_to_string('jobs/components/candidate_rows.html', {'candidates': candidates}, request)
+    else:
+        response['candidates'] = candidates
+    return JsonResponse(response)
+
+
+def get_candidates(candidate_ids):
+    """
+    Get workers/candidates with their skills and profile information, in the given order.
+    Serialized cards are cached per candidate and invalidated by jobs.signals.
+    """
+    cache_keys = {candidate_id: candidate_card_cache_key(candidate_id) for candidate_id in candidate_ids}
+    cached_cards = cache.get_many(list(cache_keys.values()))
+    cards = {
+        candidate_id: cached_cards[key]
+        for candidate_id, key in cache_keys.items() if key in cached_cards
+    }
+    
+    missing_ids = [candidate_id for candidate_id in candidate_ids if candidate_id not in cards]
+    if missing_ids:
+        built_cards = build_candidate_cards(missing_ids)
+        cache.set_many(
+            {cache_keys[candidate_id]: card for candidate_id, card in built_cards.items()},
+            settings.CANDIDATE_CARD_CACHE_TIMEOUT
+        )
+        cards.update(built_cards)
+    
+    return [dict(cards[candidate_id]) for candidate_id in candidate_ids if candidate_id in cards]
+
+
+def build_candidate_cards(candidate_ids):
+    """Serialize the given workers into {candidate_id: card} using a constant number of queries"""
+    candidates = AppUser.objects.filter(id__in=candidate_ids, role='worker').select_related(
+        'user', 'location'
+    ).prefetch_related(
+        Prefetch('userskill_set', queryset=UserSkill.objects.select_related('skill'))
+    )
+    data = {}
     
     for candidate in candidates:
         user = candidate.user
-        skills = candidate.userskill_set.select_related('skill').all()
+        skills = candidate.userskill_set.all()
         skills_data = sorted(
             [{'name': s.skill.name, 'level': s.level} for s in skills],
             key=lambda x: x['level'], reverse=True
         )
         
-        data.append({
+        data[candidate.id] = {
             'id': candidate.id,
             'name': f"{user.first_name} {user.last_name}",
             'position': candidate.position or "Not specified",
             'location': str(candidate.location) if candidate.location else "Not specified",
             'skills': skills_data,
-            'profile_photo': get_profile_photo(candidate.id),
+            'profile_photo': profile_photo_url(candidate, LIST_THUMBNAIL_SIZE),
             'about_me': candidate.about_me or "No description available",
             'is_remote': candidate.is_remote,
             'is_hybrid': candidate.is_hybrid,
             'starts_in': candidate.starts_in or "Not specified"
-        })
+        }
     
     return data
 
 
+def get_recommended_candidates(recommendations, job_listings):
+    """Candidate data for a page of recommend_candidates results, with the best matching listing"""
+    listing_titles = {listing.id: listing.job_title for listing in job_listings}
+    recommendations_by_id = {r['candidate_id']: r for r in recommendations}
+    candidates = get_candidates([r['candidate_id'] for r in recommendations])
+    for candidate in candidates:
+        recommendation = recommendations_by_id[candidate['id']]
+        candidate['match_percentage'] = int(round(recommendation['match_score']))
+        candidate['matched_listing'] = listing_titles.get(recommendation['listing_id'])
+    return candidates
+
+
 def get_recruiter_listings(email):
     try:
         recruiter = AppUser.objects.get(user=email)
@@ -389,29 +612,6 @@ def get_recruiter_listings(email):
         return JobListing.objects.none()
 
 
-def get_listings_tiles(job_listings, number_of_skills_per_tile):
-    result = []
-    for job_listing in job_listings:
-        skills = get_listing_skills(job_listing)[:number_of_skills_per_tile]
-        # Count applications for this job listing
-        applications_count = Application.objects.filter(job_listing=job_listing).count()
-        result.append({
-            "id": job_listing.id,
-            "job_title": job_listing.job_title,
-            "job_location": str(job_listing.location) if job_listing.location else "",
-            "company_name": job_listing.company_name,
-            "salary_min": job_listing.salary_min,
-            "salary_max": job_listing.salary_max,
-            "salary_currency": job_listing.salary_currency,
-            "skills": skills,
-            "is_remote": job_listing.job_model == 'REMOTE',
-            "is_hybrid": job_listing.job_model == 'HYBRID',
-            "status": job_listing.status,
-            "applications_count": applications_count
-        })
-    return result
-
-
 def get_all_listings():
     job_listings = JobListing.objects.all()
     return job_listings
@@ -426,18 +626,45 @@ def view_settings(request):
     return render(request, 'jobs/settings.html')
 
 
+def skill_catalog_response(request, build_content):
+    """
+    Response with content derived from the skill catalog, with the catalog
+    version as ETag. Requests carrying the current version (?v=, see
+    users.skills.skills_url) may be cached for SKILL_CATALOG_MAX_AGE,
+    anything else is revalidated with the ETag.
+    """
+    version = get_skill_catalog().version
+    etag = quote_etag(version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(build_content(), content_type='application/json')
+    response['ETag'] = etag
+    if request.GET.get('v') == version:
+        patch_cache_control(response, public=True, max_age=settings.SKILL_CATALOG_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
 def get_skills(request):
-    skills = Skill.objects.all().values("name", "id")
-    skills_list = list(skills)
-    print(f"DEBUG: Found {len(skills_list)} skills in database")
-    return JsonResponse(skills_list, safe=False)
+    """All skills as [{"name", "id"}], served from the in-memory skill catalog."""
+    return skill_catalog_response(request, lambda: get_skill_catalog().payload)
 
 
-def get_skill_by_id(skill_id):
-    skill = Skill.objects.filter(id=skill_id).first()
-    if not skill:
-        raise ValueError(f"Skill with id {skill_id} not found")
-    return skill
+def search_skills(request):
+    """
+    Typeahead for the add-skill modal: the best SKILL_SEARCH_LIMIT matches of
+    ?q= (a prefix of a skill name, alias or word of a name) as [{"id", "name"}].
+    """
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', settings.SKILL_SEARCH_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    limit = max(1, min(limit, settings.SKILL_SEARCH_MAX_LIMIT))
+    return skill_catalog_response(
+        request, lambda: json.dumps(get_skill_catalog().search(query, limit))
+    )
 
 
 def add_skill(request):
@@ -687,17 +914,14 @@ def update_starts_in(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
-def get_knn_matches(request):
-    from matching.views import knn_match
-    response = knn_match(request)
-    matches = json.loads(response.content)['matches']
+def get_knn_matches(request, n_neighbors=None):
+    matches = find_job_matches(request.user, n_neighbors or KNN_MATCHES_LIMIT)
     
-    # Get job listings for matched jobs
-    matched_jobs = []
-    for match in matches:
-        job = JobListing.objects.get(id=match['listing_id'])
-        matched_jobs.append(job)
-    print(matched_jobs)
+    # Get job listings (with their tile data) for matched jobs at once, keeping the match order
+    jobs_by_id = with_tile_data(JobListing.objects.all()).in_bulk(
+        [match['listing_id'] for match in matches]
+    )
+    matched_jobs = [jobs_by_id[match['listing_id']] for match in matches if match['listing_id'] in jobs_by_id]
     return matched_jobs
 
 
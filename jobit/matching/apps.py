@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class MatchingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matching'
+
+    def ready(self):
+        from jobs.models import JobListing, JobListingSkill
+        from users.models import AppUser, UserSkill
+        from .signals import (
+            invalidate_listing_row, invalidate_listing_skill_row,
+            invalidate_candidate_row, invalidate_candidate_skill_row
+        )
+
+        # Keep the in-memory skill indexes up to date
+        post_save.connect(invalidate_listing_row, sender=JobListing, dispatch_uid='matching_listing_saved')
+        post_delete.connect(invalidate_listing_row, sender=JobListing, dispatch_uid='matching_listing_deleted')
+        post_save.connect(invalidate_listing_skill_row, sender=JobListingSkill, dispatch_uid='matching_listing_skill_saved')
+        post_delete.connect(invalidate_listing_skill_row, sender=JobListingSkill, dispatch_uid='matching_listing_skill_deleted')
+        post_save.connect(invalidate_candidate_row, sender=AppUser, dispatch_uid='matching_candidate_saved')
+        post_delete.connect(invalidate_candidate_row, sender=AppUser, dispatch_uid='matching_candidate_deleted')
+        post_save.connect(invalidate_candidate_skill_row, sender=UserSkill, dispatch_uid='matching_candidate_skill_saved')
+        post_delete.connect(invalidate_candidate_skill_row, sender=UserSkill, dispatch_uid='matching_candidate_skill_deleted')
@@ -0,0 +1,214 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+
+
+def build_skill_matrix(rows: List[Dict[int, float]], n_columns: Optional[int] = None):
+    """
+    Build a CSR matrix from a list of {skill_id: level} rows.
+    Returns ``(matrix, row_norms)``; columns are indexed by skill id.
+    """
+    indptr = [0]
+    indices = []
+    data = []
+    for skills in rows:
+        for skill_id, level in skills.items():
+            indices.append(skill_id)
+            data.append(level)
+        indptr.append(len(indices))
+
+    if n_columns is None:
+        n_columns = max(indices) + 1 if indices else 1
+    matrix = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(rows), n_columns)
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return matrix, norms
+
+
+def skill_vector_dot(matrix, vector: List[Tuple[int, float]]):
+    """
+    Dot product of every matrix row with a [(skill_id, level), ...] vector.
+    Returns ``(dots, vector_norm)``; skills outside the matrix columns only
+    contribute to the norm.
+    """
+    dots = np.zeros(matrix.shape[0])
+    vector_norm = float(np.sqrt(sum(level * level for _, level in vector)))
+    columns = matrix.shape[1]
+    in_range = [(skill_id, level) for skill_id, level in vector if skill_id < columns]
+    if not in_range or not matrix.shape[0]:
+        return dots, vector_norm
+
+    array = np.zeros(columns)
+    for skill_id, level in in_range:
+        array[skill_id] = level
+    return matrix @ array, vector_norm
+
+
+class SkillIndex:
+    """
+    Process-wide sparse index of skill vectors.
+
+    Rows are entities (ordered by id), columns are skill ids and values are
+    normalized skill levels. Row norms are precomputed, so scoring a skill
+    vector against every row is a single sparse matrix-vector product.
+
+    The index is loaded lazily on first use. Changes are applied incrementally:
+    signal handlers mark a row as stale and the stale rows are re-read in one
+    query on the next lookup. Because signals only fire in the process that
+    made the change, the whole index is also reloaded once it is older than
+    ``MATCHING_INDEX_TTL`` seconds.
+
+    Subclasses implement ``_read_rows`` to load rows from the database.
+    """
+
+    def __init__(self, max_level: int = 3, ttl: Optional[int] = None):
+        self.max_level = max_level
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        # row_id -> (label, {skill_id: normalized_level})
+        self._rows: Dict[int, Tuple[str, Dict[int, float]]] = {}
+        self._stale_ids = set()
+        self._loaded_at = None
+        self._matrix = None
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._labels: List[str] = []
+        self._norms = np.empty(0)
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'MATCHING_INDEX_TTL', 300)
+
+    def clear(self):
+        """Drop all cached rows; the index is reloaded on next use."""
+        with self._lock:
+            self._clear()
+
+    def invalidate(self, row_id: int):
+        """Mark a single row as changed so it is re-read lazily."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._stale_ids.add(row_id)
+                self._matrix = None
+
+    def _normalize_level(self, level: int) -> float:
+        return level / self.max_level
+
+    def _read_rows(self, row_ids: Optional[List[int]] = None) -> Dict[int, Tuple[str, Dict[int, float]]]:
+        raise NotImplementedError
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self.ttl:
+            self._rows = self._read_rows()
+            self._stale_ids = set()
+            self._loaded_at = now
+            self._matrix = None
+        elif self._stale_ids:
+            stale_ids = self._stale_ids
+            self._stale_ids = set()
+            fresh_rows = self._read_rows(list(stale_ids))
+            for row_id in stale_ids:
+                self._rows.pop(row_id, None)
+            self._rows.update(fresh_rows)
+            self._matrix = None
+
+        if self._matrix is None:
+            self._compile()
+
+    def _compile(self):
+        """Build the CSR matrix and row norms from the in-memory rows."""
+        row_ids = sorted(self._rows)
+        self._matrix, self._norms = build_skill_matrix([self._rows[row_id][1] for row_id in row_ids])
+        self._row_ids = np.asarray(row_ids, dtype=np.int64)
+        self._labels = [self._rows[row_id][0] for row_id in row_ids]
+
+    def snapshot(self):
+        """Return ``(matrix, row_ids, labels, norms)`` for the current state."""
+        with self._lock:
+            self._refresh()
+            return self._matrix, self._row_ids, self._labels, self._norms
+
+    def score(self, vector: List[Tuple[int, float]]):
+        """
+        Cosine similarity between a skill vector and every indexed row.
+        Returns ``(row_ids, labels, similarities)`` aligned by position.
+        """
+        matrix, row_ids, labels, norms = self.snapshot()
+        similarities = np.zeros(len(row_ids))
+        if not vector or not len(row_ids):
+            return row_ids, labels, similarities
+
+        dots, vector_norm = skill_vector_dot(matrix, vector)
+        nonzero = norms > 0
+        if vector_norm:
+            similarities[nonzero] = dots[nonzero] / (norms[nonzero] * vector_norm)
+        return row_ids, labels, similarities
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._row_ids)
+
+
+class JobSkillIndex(SkillIndex):
+    """Skill vectors of all ACTIVE job listings, labelled with the job title."""
+
+    def _read_rows(self, row_ids=None):
+        from jobs.models import JobListing, JobListingSkill
+
+        listings = JobListing.objects.filter(status='ACTIVE')
+        listing_skills = JobListingSkill.objects.filter(job_listing__status='ACTIVE')
+        if row_ids is not None:
+            listings = listings.filter(id__in=row_ids)
+            listing_skills = listing_skills.filter(job_listing_id__in=row_ids)
+
+        rows = {
+            listing_id: (title, {})
+            for listing_id, title in listings.values_list('id', 'job_title')
+        }
+        for listing_id, skill_id, level in listing_skills.values_list('job_listing_id', 'skill_id', 'level'):
+            if listing_id in rows:
+                rows[listing_id][1][skill_id] = self._normalize_level(level)
+        return rows
+
+
+class CandidateSkillIndex(SkillIndex):
+    """Skill vectors of all workers (AppUser ids), used for reverse matching."""
+
+    def _read_rows(self, row_ids=None):
+        from users.models import AppUser, UserSkill
+
+        candidates = AppUser.objects.filter(role=AppUser.WORKER)
+        user_skills = UserSkill.objects.filter(user__role=AppUser.WORKER)
+        if row_ids is not None:
+            candidates = candidates.filter(id__in=row_ids)
+            user_skills = user_skills.filter(user_id__in=row_ids)
+
+        rows = {candidate_id: ('', {}) for candidate_id in candidates.values_list('id', flat=True)}
+        for user_id, skill_id, level in user_skills.values_list('user_id', 'skill_id', 'level'):
+            if user_id in rows:
+                rows[user_id][1][skill_id] = self._normalize_level(level)
+        return rows
+
+
+job_skill_index = JobSkillIndex()
+candidate_skill_index = CandidateSkillIndex()
+
+
+def get_job_skill_index() -> JobSkillIndex:
+    return job_skill_index
+
+
+def get_candidate_skill_index() -> CandidateSkillIndex:
+    return candidate_skill_index
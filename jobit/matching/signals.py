@@ -0,0 +1,21 @@
+from .index import job_skill_index, candidate_skill_index
+
+
+def invalidate_listing_row(sender, instance, **kwargs):
+    """Keep the job skill index in sync when a listing changes."""
+    job_skill_index.invalidate(instance.pk)
+
+
+def invalidate_listing_skill_row(sender, instance, **kwargs):
+    """Keep the job skill index in sync when a listing's skills change."""
+    job_skill_index.invalidate(instance.job_listing_id)
+
+
+def invalidate_candidate_row(sender, instance, **kwargs):
+    """Keep the candidate skill index in sync when a user profile changes."""
+    candidate_skill_index.invalidate(instance.pk)
+
+
+def invalidate_candidate_skill_row(sender, instance, **kwargs):
+    """Keep the candidate skill index in sync when a user's skills change."""
+    candidate_skill_index.invalidate(instance.user_id)
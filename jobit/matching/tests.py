@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from django.test import TestCase, Client
 from django.urls import reverse
@@ -11,6 +12,9 @@ from datetime import datetime
 from matching.models import Match
 from users.models import AppUser, Location, Skill, UserSkill
 from jobs.models import JobListing, JobListingSkill
+from matching.index import job_skill_index, candidate_skill_index
+from matching.utils import calculate_match_percentage, calculate_match_percentages, recommend_candidates
+from matching.vectorizer import JobMatchingVectorizer
 
 
 class MatchModelTest(TestCase):
@@ -436,6 +440,295 @@ class MatchingAlgorithmTest(TestCase):
         pass
 
 
+class JobSkillIndexTest(TestCase):
+    """Test the sparse job skill index used by knn_match"""
+    
+    def setUp(self):
+        """Set up test data"""
+        job_skill_index.clear()
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        self.recruiter_app_user = AppUser.objects.create(
+            user=self.recruiter_user,
+            role="recruiter"
+        )
+        
+        self.python_skill = Skill.objects.create(name="Python")
+        self.django_skill = Skill.objects.create(name="Django")
+        self.javascript_skill = Skill.objects.create(name="JavaScript")
+        
+        self.backend_listing = self._create_listing("Backend Developer", {
+            self.python_skill: 3,
+            self.django_skill: 2
+        })
+        self.frontend_listing = self._create_listing("Frontend Developer", {
+            self.javascript_skill: 3
+        })
+        self.closed_listing = self._create_listing("Closed Listing", {
+            self.python_skill: 3
+        }, status="CLOSED")
+    
+    def tearDown(self):
+        job_skill_index.clear()
+    
+    def _create_listing(self, title, skills, status="ACTIVE"):
+        listing = JobListing.objects.create(
+            job_title=title,
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter_app_user,
+            status=status
+        )
+        for skill, level in skills.items():
+            JobListingSkill.objects.create(job_listing=listing, skill=skill, level=level)
+        return listing
+    
+    def _user_vector(self, skills):
+        vectorizer = JobMatchingVectorizer()
+        return vectorizer.create_skill_vector([
+            {'id': skill.id, 'level': level} for skill, level in skills.items()
+        ])
+    
+    def test_index_contains_only_active_listings(self):
+        """Test that closed listings are not indexed"""
+        _, row_ids, _, _ = job_skill_index.snapshot()
+        self.assertEqual(
+            list(row_ids),
+            [self.backend_listing.id, self.frontend_listing.id]
+        )
+    
+    def test_index_scores_match_dense_scores(self):
+        """Test that index scoring gives the same result as find_matches"""
+        vectorizer = JobMatchingVectorizer()
+        user_vector = self._user_vector({self.python_skill: 3, self.javascript_skill: 1})
+        job_vectors = []
+        for listing in [self.backend_listing, self.frontend_listing]:
+            job_vectors.append({
+                'listing_id': listing.id,
+                'title': listing.job_title,
+                'vector': vectorizer.create_skill_vector([
+                    {'id': s.skill_id, 'level': s.level}
+                    for s in JobListingSkill.objects.filter(job_listing=listing)
+                ])
+            })
+        
+        dense_matches = vectorizer.find_matches(user_vector, job_vectors)
+        index_matches = vectorizer.find_index_matches(user_vector, job_skill_index)
+        
+        self.assertEqual(dense_matches, index_matches)
+        self.assertEqual(index_matches[0]['listing_id'], self.backend_listing.id)
+    
+    def test_top_k_matches(self):
+        """Test that only the n_neighbors best matches are returned, best first"""
+        user_vector = self._user_vector({self.javascript_skill: 3})
+        all_matches = JobMatchingVectorizer(n_neighbors=None).find_index_matches(user_vector, job_skill_index)
+        top_matches = JobMatchingVectorizer(n_neighbors=1).find_index_matches(user_vector, job_skill_index)
+        
+        self.assertEqual(len(all_matches), 2)
+        self.assertEqual(top_matches, all_matches[:1])
+        self.assertEqual(top_matches[0]['listing_id'], self.frontend_listing.id)
+    
+    def test_top_k_keeps_tie_order(self):
+        """Test that top-k selection breaks ties like a stable full sort"""
+        vectorizer = JobMatchingVectorizer(n_neighbors=3)
+        scores = np.array([10.0, 50.0, 10.0, 50.0, 10.0, 0.0])
+        self.assertEqual(list(vectorizer._top_k_indices(scores)), [1, 3, 0])
+    
+    def test_index_without_user_skills(self):
+        """Test that users without skills get a zero score for every listing"""
+        matches = JobMatchingVectorizer().find_index_matches([], job_skill_index)
+        self.assertEqual(len(matches), 2)
+        self.assertTrue(all(match['match_score'] == 0.0 for match in matches))
+    
+    def test_index_picks_up_listing_changes(self):
+        """Test that saved listings and skills are refreshed incrementally"""
+        self.assertEqual(len(job_skill_index), 2)
+        
+        self.closed_listing.status = "ACTIVE"
+        self.closed_listing.save()
+        self.assertEqual(len(job_skill_index), 3)
+        
+        JobListingSkill.objects.create(
+            job_listing=self.frontend_listing,
+            skill=self.python_skill,
+            level=3
+        )
+        user_vector = self._user_vector({self.python_skill: 3})
+        matches = JobMatchingVectorizer().find_index_matches(user_vector, job_skill_index)
+        scores = {match['listing_id']: match['match_score'] for match in matches}
+        self.assertGreater(scores[self.frontend_listing.id], 0)
+        
+        self.backend_listing.delete()
+        self.assertEqual(len(job_skill_index), 2)
+
+
+class BatchMatchPercentageTest(TestCase):
+    """Test batch scoring of candidates against a job listing"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        self.recruiter_app_user = AppUser.objects.create(
+            user=self.recruiter_user,
+            role="recruiter"
+        )
+        
+        self.job_listing = JobListing.objects.create(
+            job_title="Python Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter_app_user
+        )
+        
+        self.python_skill = Skill.objects.create(name="Python")
+        self.django_skill = Skill.objects.create(name="Django")
+        self.javascript_skill = Skill.objects.create(name="JavaScript")
+        
+        JobListingSkill.objects.create(job_listing=self.job_listing, skill=self.python_skill, level=3)
+        JobListingSkill.objects.create(job_listing=self.job_listing, skill=self.django_skill, level=2)
+        
+        self.candidates = []
+        candidate_skills = [
+            {self.python_skill: 3, self.django_skill: 2},
+            {self.python_skill: 1, self.javascript_skill: 3},
+            {self.javascript_skill: 2},
+            {},
+        ]
+        for i, skills in enumerate(candidate_skills):
+            user = User.objects.create_user(
+                username=f"candidate{i}",
+                email=f"candidate{i}@example.com",
+                password="testpass123"
+            )
+            candidate = AppUser.objects.create(user=user)
+            for skill, level in skills.items():
+                UserSkill.objects.create(user=candidate, skill=skill, level=level)
+            self.candidates.append(candidate)
+    
+    def test_batch_scores_match_single_scores(self):
+        """Test that batch scoring agrees with calculate_match_percentage"""
+        percentages = calculate_match_percentages(self.job_listing, self.candidates)
+        
+        for candidate in self.candidates:
+            self.assertEqual(
+                percentages[candidate.id],
+                calculate_match_percentage(self.job_listing, candidate)
+            )
+        self.assertEqual(percentages[self.candidates[0].id], 100)
+        self.assertEqual(percentages[self.candidates[3].id], 0)
+    
+    def test_batch_scoring_query_count(self):
+        """Test that batch scoring does not query per candidate"""
+        with self.assertNumQueries(2):
+            calculate_match_percentages(self.job_listing, self.candidates)
+    
+    def test_batch_scoring_uses_prefetched_skills(self):
+        """Test that skills prefetched by the caller are not queried again"""
+        from django.db.models import prefetch_related_objects
+        expected = calculate_match_percentages(self.job_listing, self.candidates)
+        prefetch_related_objects(self.candidates, 'userskill_set')
+        with self.assertNumQueries(1):
+            self.assertEqual(calculate_match_percentages(self.job_listing, self.candidates), expected)
+    
+    def test_batch_scoring_without_candidates(self):
+        """Test batch scoring with no candidates"""
+        self.assertEqual(calculate_match_percentages(self.job_listing, []), {})
+
+
+class RecommendCandidatesTest(TestCase):
+    """Test reverse matching of candidates to a recruiter's listings"""
+    
+    def setUp(self):
+        """Set up test data"""
+        candidate_skill_index.clear()
+        self.recruiter_user = User.objects.create_user(
+            username="recruiter",
+            email="recruiter@example.com",
+            password="recruiterpass123"
+        )
+        self.recruiter_app_user = AppUser.objects.create(
+            user=self.recruiter_user,
+            role="recruiter"
+        )
+        
+        self.python_skill = Skill.objects.create(name="Python")
+        self.javascript_skill = Skill.objects.create(name="JavaScript")
+        
+        self.backend_listing = JobListing.objects.create(
+            job_title="Backend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter_app_user
+        )
+        JobListingSkill.objects.create(job_listing=self.backend_listing, skill=self.python_skill, level=3)
+        self.frontend_listing = JobListing.objects.create(
+            job_title="Frontend Developer",
+            company_name="Tech Corp",
+            about_company="About company",
+            job_description="Job description",
+            owner=self.recruiter_app_user
+        )
+        JobListingSkill.objects.create(job_listing=self.frontend_listing, skill=self.javascript_skill, level=3)
+        
+        self.candidates = []
+        for i, skills in enumerate([{}, {self.javascript_skill: 2}, {self.python_skill: 3}]):
+            user = User.objects.create_user(
+                username=f"candidate{i}",
+                email=f"candidate{i}@example.com",
+                password="testpass123"
+            )
+            candidate = AppUser.objects.create(user=user, role="worker")
+            for skill, level in skills.items():
+                UserSkill.objects.create(user=candidate, skill=skill, level=level)
+            self.candidates.append(candidate)
+    
+    def tearDown(self):
+        candidate_skill_index.clear()
+    
+    def test_candidates_ranked_by_best_listing(self):
+        """Test that candidates are ranked by their best matching listing"""
+        result = recommend_candidates([self.backend_listing, self.frontend_listing])
+        
+        self.assertEqual(result['total'], 3)
+        self.assertIsNone(result['next_cursor'])
+        ranked = result['candidates']
+        self.assertEqual(
+            [r['candidate_id'] for r in ranked],
+            [self.candidates[1].id, self.candidates[2].id, self.candidates[0].id]
+        )
+        self.assertEqual(ranked[0]['listing_id'], self.frontend_listing.id)
+        self.assertEqual(ranked[1]['listing_id'], self.backend_listing.id)
+        self.assertEqual(ranked[2]['match_score'], 0.0)
+        self.assertIsNone(ranked[2]['listing_id'])
+    
+    def test_recruiters_are_not_recommended(self):
+        """Test that only workers are ranked"""
+        result = recommend_candidates([self.backend_listing])
+        ids = [r['candidate_id'] for r in result['candidates']]
+        self.assertNotIn(self.recruiter_app_user.id, ids)
+    
+    def test_cursor_pagination(self):
+        """Test that pages contain consecutive slices of the ranking"""
+        listings = [self.backend_listing, self.frontend_listing]
+        full = recommend_candidates(listings)['candidates']
+        first = recommend_candidates(listings, limit=2)
+        second = recommend_candidates(listings, limit=2, after=first['next_cursor'])
+        
+        self.assertEqual(first['next_cursor'], (full[1]['match_score'], full[1]['candidate_id']))
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(first['candidates'] + second['candidates'], full)
+
+
 # =============================================================================
 # PYTEST STYLE TESTS (for better test discovery and fixtures)
 # =============================================================================
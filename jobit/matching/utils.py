@@ -1,7 +1,30 @@
-from .vectorizer import JobMatchingVectorizer
+import numpy as np
+from scipy import sparse
+from .vectorizer import JobMatchingVectorizer, top_k_indices
+from .index import get_job_skill_index, get_candidate_skill_index, build_skill_matrix, skill_vector_dot
+from jobs.models import JobListingSkill
 from jobs.utils import get_listing_skills
+from users.models import UserSkill
 from users.views import get_user_skills
 
+# Number of matches shown in the "Jobs You Might Like" section
+KNN_MATCHES_LIMIT = 10
+
+# Number of recommended candidates shown per page on the recruiter dashboard
+CANDIDATES_PER_PAGE = 20
+
+
+def find_job_matches(user, n_neighbors=KNN_MATCHES_LIMIT):
+    """
+    Returns the n_neighbors best matching active listings for the given user,
+    as a list of {'listing_id', 'title', 'match_score'} dicts ordered best first.
+    """
+    user_skills = get_user_skills(user)
+    vectorizer = JobMatchingVectorizer(n_neighbors=n_neighbors)
+    user_vector = vectorizer.create_skill_vector(user_skills)
+    return vectorizer.find_index_matches(user_vector, get_job_skill_index())
+
+
 def calculate_match_percentage(job_listing, candidate):
     """
     Returns the percentage match (0-100) between a job listing and a candidate (AppUser instance)
@@ -24,4 +47,120 @@ def calculate_match_percentage(job_listing, candidate):
         percentage = int(round(matches[0]['match_score']))
     else:
         percentage = 0
-    return percentage 
\ No newline at end of file
+    return percentage
+
+
+def calculate_match_percentages(job_listing, candidates):
+    """
+    Batch version of calculate_match_percentage.
+    Returns a {candidate_id: percentage} dict for the given AppUser instances, loading
+    the listing's skills and all candidates' skills with one query each and scoring
+    every candidate with a single sparse matrix-vector product. Skills already
+    prefetched into ``userskill_set`` are used as they are, without a query.
+    """
+    candidate_ids = [candidate.id for candidate in candidates]
+    if not candidate_ids:
+        return {}
+
+    vectorizer = JobMatchingVectorizer()
+    job_vector = [
+        (skill_id, vectorizer._normalize_level(level))
+        for skill_id, level in JobListingSkill.objects.filter(job_listing=job_listing).values_list('skill_id', 'level')
+    ]
+
+    rows = {candidate_id: {} for candidate_id in candidate_ids}
+    user_skills = []
+    missing_ids = []
+    for candidate in candidates:
+        if 'userskill_set' in getattr(candidate, '_prefetched_objects_cache', {}):
+            user_skills.extend(
+                (candidate.id, user_skill.skill_id, user_skill.level) for user_skill in candidate.userskill_set.all()
+            )
+        else:
+            missing_ids.append(candidate.id)
+    if missing_ids:
+        user_skills.extend(
+            UserSkill.objects.filter(user_id__in=missing_ids).values_list('user_id', 'skill_id', 'level')
+        )
+    for user_id, skill_id, level in user_skills:
+        rows[user_id][skill_id] = vectorizer._normalize_level(level)
+
+    matrix, norms = build_skill_matrix([rows[candidate_id] for candidate_id in candidate_ids])
+    dots, job_norm = skill_vector_dot(matrix, job_vector)
+
+    percentages = {}
+    for position, candidate_id in enumerate(candidate_ids):
+        similarity = 0.0
+        if job_norm and norms[position]:
+            similarity = dots[position] / (norms[position] * job_norm)
+        # Same rounding as find_matches followed by calculate_match_percentage
+        match_score = round(float(max(0, similarity) * 100), 2)
+        percentages[candidate_id] = int(round(match_score))
+    return percentages
+
+
+def recommend_candidates(job_listings, limit=CANDIDATES_PER_PAGE, after=None):
+    """
+    Reverse matching: ranks workers for the given job listings using the precomputed
+    candidate skill matrix. A candidate's score is its best match across the listings.
+
+    Candidates are ordered by score (descending), then by id. ``after`` is a
+    (match_score, candidate_id) keyset cursor of the last candidate already shown.
+
+    Returns a dict with up to ``limit`` {'candidate_id', 'match_score', 'listing_id'}
+    entries (best first), the total number of candidates and the cursor of the
+    next page (None on the last page).
+    """
+    matrix, candidate_ids, _, candidate_norms = get_candidate_skill_index().snapshot()
+    listing_ids = [listing.id for listing in job_listings]
+    total = len(candidate_ids)
+
+    vectorizer = JobMatchingVectorizer()
+    rows = {listing_id: {} for listing_id in listing_ids}
+    listing_skills = JobListingSkill.objects.filter(job_listing_id__in=listing_ids).values_list('job_listing_id', 'skill_id', 'level')
+    for listing_id, skill_id, level in listing_skills:
+        rows[listing_id][skill_id] = vectorizer._normalize_level(level)
+
+    best_scores = np.zeros(total)
+    best_listings = np.full(total, -1, dtype=np.int64)
+    if total and listing_ids:
+        listing_matrix, listing_norms = build_skill_matrix([rows[listing_id] for listing_id in listing_ids])
+        n_columns = max(matrix.shape[1], listing_matrix.shape[1])
+        matrix = sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(total, n_columns))
+        listing_matrix = sparse.csr_matrix(
+            (listing_matrix.data, listing_matrix.indices, listing_matrix.indptr),
+            shape=(len(listing_ids), n_columns)
+        )
+
+        # Candidates x listings cosine similarities in one sparse product
+        dots = (matrix @ listing_matrix.T).toarray()
+        norms = np.outer(candidate_norms, listing_norms)
+        similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+        best = similarities.argmax(axis=1)
+        best_scores = np.round(np.maximum(similarities[np.arange(total), best], 0) * 100, 2)
+        best_listings = np.asarray(listing_ids, dtype=np.int64)[best]
+
+    # Candidate rows are ordered by id, so the keyset excludes everything up to the cursor
+    remaining = np.arange(total)
+    if after is not None:
+        after_score, after_id = after
+        remaining = np.flatnonzero(
+            (best_scores < after_score) | ((best_scores == after_score) & (candidate_ids > after_id))
+        )
+
+    order = remaining[top_k_indices(best_scores[remaining], limit)]
+    candidates = [{
+        'candidate_id': int(candidate_ids[idx]),
+        'match_score': float(best_scores[idx]),
+        'listing_id': int(best_listings[idx]) if best_scores[idx] > 0 else None
+    } for idx in order]
+
+    next_cursor = None
+    if candidates and len(remaining) > limit:
+        next_cursor = (candidates[-1]['match_score'], candidates[-1]['candidate_id'])
+    return {
+        'candidates': candidates,
+        'total': total,
+        'next_cursor': next_cursor
+    }
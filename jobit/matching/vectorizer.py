@@ -1,14 +1,31 @@
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from sklearn.neighbors import NearestNeighbors
+from typing import List, Dict, Any, Optional, Tuple
 from sklearn.metrics.pairwise import cosine_similarity
 
+def top_k_indices(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first (all of them if k is None).
+    Uses a partial partition so only the selected top-k are sorted; ties keep their
+    original order, exactly as a stable full sort truncated to k would.
+    """
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
 class JobMatchingVectorizer:
-    def __init__(self, n_neighbors: int = 5):
+    def __init__(self, n_neighbors: Optional[int] = 5):
         # Maximum skill level (assuming levels are 1-3)
         self.max_level = 3
-        # Initialize KNN model with cosine similarity
-        self.knn = NearestNeighbors(n_neighbors=n_neighbors, metric='cosine')
+        # Number of best matches returned by find_matches (None returns all)
+        self.n_neighbors = n_neighbors
 
     def _normalize_level(self, level: int) -> float:
         """Normalize skill level to range [0, 1]."""
@@ -30,23 +47,27 @@ class JobMatchingVectorizer:
             array[skill_id] = level
         return array
 
+    def _top_k_indices(self, scores: np.ndarray) -> np.ndarray:
+        """Indices of the n_neighbors highest scores, best first."""
+        return top_k_indices(scores, self.n_neighbors)
+
     def find_matches(self, user_vector: List[Tuple[int, float]], job_vectors: List[Dict]) -> List[Dict]:
         """
         Find best matching jobs using KNN with cosine similarity.
-        Returns list of jobs with their match scores, ordered from best to worst match.
-        If no matches are found, returns all jobs with 0 match score.
+        Returns the n_neighbors jobs with the best match scores, ordered from best to worst match.
+        If no matches are found, returns jobs with 0 match score.
         """
         # If no jobs, return empty list
         if not job_vectors:
             return []
 
-        # If no user skills, return all jobs with 0 match score
+        # If no user skills, return jobs with 0 match score
         if not user_vector:
             return [{
                 'listing_id': job['listing_id'],
                 'title': job['title'],
                 'match_score': 0.0
-            } for job in job_vectors]
+            } for job in job_vectors[:self.n_neighbors]]
 
         # Find maximum skill ID to determine vector size
         max_skill_id = max(
@@ -66,19 +87,26 @@ class JobMatchingVectorizer:
         # Calculate cosine similarity between user and all jobs
         similarities = cosine_similarity(user_array, job_arrays)[0]
 
-        # Create matches with similarity scores
-        matches = []
-        for idx, similarity in enumerate(similarities):
-            job = job_vectors[idx]
-            # Only consider positive similarities and scale to 0-100%
-            match_score = round(float(max(0, similarity) * 100), 2)
-            matches.append({
-                'listing_id': job['listing_id'],
-                'title': job['title'],
-                'match_score': match_score
-            })
+        # Only consider positive similarities and scale to 0-100%
+        scores = np.round(np.maximum(similarities, 0) * 100, 2)
+
+        # Create matches for the best scores (highest first)
+        return [{
+            'listing_id': job_vectors[idx]['listing_id'],
+            'title': job_vectors[idx]['title'],
+            'match_score': float(scores[idx])
+        } for idx in self._top_k_indices(scores)]
+
+    def find_index_matches(self, user_vector: List[Tuple[int, float]], index) -> List[Dict]:
+        """
+        Same as find_matches, but scores the user against a precomputed JobSkillIndex
+        with a single sparse matrix-vector product instead of building dense job arrays.
+        """
+        row_ids, titles, similarities = index.score(user_vector)
+        scores = np.round(np.maximum(similarities, 0) * 100, 2)
 
-        # Sort matches by score (highest first)
-        matches.sort(key=lambda x: x['match_score'], reverse=True)
-        
-        return matches
+        return [{
+            'listing_id': int(row_ids[idx]),
+            'title': titles[idx],
+            'match_score': float(scores[idx])
+        } for idx in self._top_k_indices(scores)]
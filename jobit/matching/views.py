@@ -1,11 +1,8 @@
 from django.shortcuts import render
 from django.http import JsonResponse
-from jobs.utils import get_listing_skills
-from users.views import get_user_skills
-from .vectorizer import JobMatchingVectorizer
+from .utils import find_job_matches, KNN_MATCHES_LIMIT
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from jobs.views import get_all_listings
 from openai import OpenAI
 import json
 import os
@@ -20,6 +17,9 @@ SYSTEM_PROMPT = (
     "you are not able to help with that."
 )
 
+# Upper bound for the n_neighbors query parameter of knn_match
+MAX_KNN_NEIGHBORS = 100
+
 def load_api_key():
     """
     Load OpenAI API key from environment variable or fallback to file.
@@ -41,26 +41,15 @@ def load_api_key():
 
 
 def knn_match(request):
-    listings = get_all_listings()
-    user_skills = get_user_skills(request.user)
-    vectorizer = JobMatchingVectorizer(n_neighbors=3)
-    
-    # Create normalized user skill vector
-    user_vector = vectorizer.create_skill_vector(user_skills)
-    
-    # Create normalized job skill vectors
-    job_vectors = []
-    for listing in listings:
-        job_skills = get_listing_skills(listing)
-        job_vector = vectorizer.create_skill_vector(job_skills)
-        job_vectors.append({
-            'listing_id': listing.id,
-            'title': listing.job_title,
-            'vector': job_vector
-        })
+    try:
+        n_neighbors = int(request.GET.get('n_neighbors', KNN_MATCHES_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'n_neighbors must be an integer'}, status=400)
+    if n_neighbors < 1:
+        return JsonResponse({'error': 'n_neighbors must be positive'}, status=400)
     
-    # Find best matches using KNN
-    matches = vectorizer.find_matches(user_vector, job_vectors)
+    # Only the top n_neighbors listings are selected and serialized
+    matches = find_job_matches(request.user, min(n_neighbors, MAX_KNN_NEIGHBORS))
     
     return JsonResponse({
         'matches': matches
@@ -149,7 +138,7 @@ def set_tools() -> List[Dict[str, Any]]:
                 "properties": {
                     "search_query": {
                         "type": ["string", "null"],
-                        "description": "Search in job title and company name"
+                        "description": "Words to search for in job titles, company names, skills and descriptions"
                     },
                     "job_model": {
                         "type": ["string", "null"],
@@ -33,6 +33,14 @@ ls -la /app/jobit/jobs/static/images/ || echo "Images directory not found"
 echo "📚 Initializing skills from CSV..."
 python jobit/manage.py init_skills
 
+# Mark users whose photo was uploaded before photo versions were tracked
+echo "🖼️ Syncing profile photos..."
+python jobit/manage.py sync_profile_photos || echo "Profile photo sync failed"
+
+# Fill in conversation summaries (last message, read marks, unread counters) of conversations from older versions
+echo "💬 Backfilling conversation summaries..."
+python jobit/manage.py rebuild_conversation_summaries
+
 # Skip sample data initialization for now
 echo "⏭️ Skipping sample data initialization"
 
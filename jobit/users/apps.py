@@ -2,7 +2,8 @@ import os
 import pandas as pd
 from django.apps import AppConfig
 from django.db.utils import OperationalError
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_migrate, post_save, post_delete
+from django.test.signals import setting_changed
 from .locations import LOCATIONS
 
 
@@ -41,6 +42,16 @@ class UsersConfig(AppConfig):
         # Don't run update_locations immediately during startup
         post_migrate.connect(update_locations, sender=self)
 
+        # Rebuild the shared photo storage client when tests override its settings
+        from .storage import reset_photo_storage_on_setting_change
+        setting_changed.connect(reset_photo_storage_on_setting_change, dispatch_uid='users_reset_photo_storage')
+
+        # Keep the in-memory skill catalog up to date
+        from .models import Skill
+        from .skills import invalidate_skill_catalog
+        post_save.connect(invalidate_skill_catalog, sender=Skill, dispatch_uid='users_skill_saved')
+        post_delete.connect(invalidate_skill_catalog, sender=Skill, dispatch_uid='users_skill_deleted')
+
 
 def init_skills_table():
     # Delayed import (after loading Django app)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from users.models import AppUser
+from users.storage import get_photo_storage
+
+
+class Command(BaseCommand):
+    help = 'Set profile_photo_updated_at for users whose photo already exists in the photo storage'
+
+    def handle(self, *args, **options):
+        # Originals are named <auth user id>.jpg, thumbnails <auth user id>_<size>.jpg
+        photos = {}
+        for name, last_modified in get_photo_storage().list():
+            user_id, _, extension = name.partition('.')
+            if extension == 'jpg' and user_id.isdigit():
+                photos[int(user_id)] = last_modified
+
+        updated = 0
+        for app_user in AppUser.objects.filter(user_id__in=photos.keys(), profile_photo_updated_at__isnull=True):
+            app_user.profile_photo_updated_at = photos[app_user.user_id]
+            app_user.save(update_fields=['profile_photo_updated_at'])
+            updated += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Marked {updated} users as having a profile photo.')
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from users.models import AppUser
+from users.photos import THUMBNAIL_SIZES, LIST_THUMBNAIL_SIZE, get_profile_photos
+
+
+class Command(BaseCommand):
+    help = 'Fill the local profile photo cache, e.g. after deploying to a fresh container'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, choices=THUMBNAIL_SIZES, default=LIST_THUMBNAIL_SIZE,
+                            help='Thumbnail size to cache')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--deadline', type=float, default=60.0,
+                            help='Seconds allowed per batch')
+
+    def handle(self, *args, **options):
+        user_ids = list(
+            AppUser.objects.filter(profile_photo_updated_at__isnull=False)
+            .order_by('user_id').values_list('user_id', flat=True)
+        )
+        batch_size = options['batch_size']
+        cached = 0
+        for start in range(0, len(user_ids), batch_size):
+            photos = get_profile_photos(
+                user_ids[start:start + batch_size], size=options['size'], deadline=options['deadline']
+            )
+            cached += sum(1 for content in photos.values() if content is not None)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Cached {cached} of {len(user_ids)} profile photos.')
+        )
@@ -25,6 +25,8 @@ class AppUser(models.Model):
     location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True)
     is_remote = models.BooleanField(default=False)
     is_hybrid = models.BooleanField(default=False)
+    # Set on every profile photo upload; None when the user has no photo
+    profile_photo_updated_at = models.DateTimeField(blank=True, null=True)
 
     STARTS_IN_CHOICES = [
         ('ASAP', 'ASAP'),
@@ -0,0 +1,283 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signing import Signer
+from django.urls import reverse
+from PIL import Image, ImageOps
+from users.storage import get_photo_storage
+
+# Square thumbnail variants (in pixels) generated on upload and stored next to the original
+THUMBNAIL_SIZES = (64, 128, 256)
+# Variant used by list views (candidate cards, applicants, conversations)
+LIST_THUMBNAIL_SIZE = 64
+# Variant used by profile pages
+PROFILE_THUMBNAIL_SIZE = 256
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def profile_photo_blob_name(user_id, size=None):
+    """Blob name of the profile photo of an auth user, or of one of its thumbnails."""
+    if size is None:
+        return f"{user_id}.jpg"
+    return f"{user_id}_{size}.jpg"
+
+
+def generate_thumbnails(image_bytes):
+    """
+    Build the square JPEG thumbnail variants of an uploaded photo.
+    Returns {size: jpeg_bytes} for every size in THUMBNAIL_SIZES.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        thumbnails = {}
+        for size in THUMBNAIL_SIZES:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            output = io.BytesIO()
+            thumbnail.save(output, format='JPEG', quality=THUMBNAIL_JPEG_QUALITY, optimize=True)
+            thumbnails[size] = output.getvalue()
+    return thumbnails
+
+
+def profile_photo_version(app_user):
+    """Version token of the current photo (None if the user has no photo)."""
+    if not app_user.profile_photo_updated_at:
+        return None
+    return str(int(app_user.profile_photo_updated_at.timestamp() * 1000))
+
+
+def profile_photo_signature(user_id, version):
+    """
+    Signature of a photo URL. Only pages showing the user hand out their photo
+    URL; the sequential user ids cannot be enumerated without it.
+    """
+    return Signer(salt='users.profile_photo').signature(f"{user_id}:{version}")
+
+
+def profile_photo_url(app_user, size=None):
+    """
+    URL of the profile photo served by users.views.serve_profile_photo, or None if the user has no photo.
+    The version query parameter changes on every upload, so browsers can cache the response;
+    the signature makes the URL unguessable.
+    Pass one of THUMBNAIL_SIZES as size to request a thumbnail instead of the original.
+    """
+    version = profile_photo_version(app_user)
+    if version is None:
+        return None
+    signature = profile_photo_signature(app_user.user_id, version)
+    url = f"{reverse('get_profile_photo', args=[app_user.user_id])}?v={version}&sig={signature}"
+    if size is not None:
+        url += f"&size={size}"
+    return url
+
+
+def upload_profile_photo(user_id, image_bytes):
+    """Store the original photo and all of its thumbnails."""
+    storage = get_photo_storage()
+    blobs = {profile_photo_blob_name(user_id): image_bytes}
+    for size, thumbnail in generate_thumbnails(image_bytes).items():
+        blobs[profile_photo_blob_name(user_id, size)] = thumbnail
+
+    for name, content in blobs.items():
+        print(f"🔍 Uploading to blob: {name}")
+        storage.write(name, content)
+    return storage.url(profile_photo_blob_name(user_id))
+
+
+def delete_profile_photo(user_id):
+    """Delete the original photo and its thumbnails (thumbnails may not exist for old uploads)."""
+    storage = get_photo_storage()
+    storage.delete(profile_photo_blob_name(user_id))
+    for size in THUMBNAIL_SIZES:
+        storage.delete(profile_photo_blob_name(user_id, size))
+
+
+def download_profile_photo(user_id, size=None):
+    """
+    Read the photo bytes from the photo storage; returns None if there is no photo.
+    Thumbnails missing for photos uploaded before they were generated are built from
+    the original and stored for the next request.
+    """
+    storage = get_photo_storage()
+    content = storage.read(profile_photo_blob_name(user_id, size))
+    if content is not None:
+        return content
+    if size is None:
+        print(f"⚠️ Profile photo not found for user {user_id}")
+        return None
+
+    original = download_profile_photo(user_id)
+    if original is None:
+        return None
+    thumbnail = generate_thumbnails(original)[size]
+    storage.write(profile_photo_blob_name(user_id, size), thumbnail)
+    return thumbnail
+
+
+class PhotoDiskCache:
+    """
+    Size-bounded LRU cache of photo files on local disk.
+
+    File access times are bumped on every hit and the least recently used
+    files are removed once the total size exceeds ``max_bytes``. Keys include
+    the photo version, so an upload never serves a stale file and old
+    versions simply age out.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    @property
+    def directory(self):
+        return Path(self._directory or settings.PROFILE_PHOTO_CACHE_DIR)
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return settings.PROFILE_PHOTO_CACHE_MAX_BYTES
+
+    def _path(self, key):
+        return self.directory / key
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.is_file()]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or evicted by another request while being read
+            return None
+        return content
+
+    def set(self, key, content):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Write to a temporary file first so readers never see a partial photo
+        tmp_path = path.with_name(f".{key}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+
+        with self._lock:
+            replaced_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            else:
+                self._size += len(content) - replaced_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete_prefix(self, prefix):
+        """Remove all cached files whose key starts with prefix."""
+        if not self.directory.exists():
+            return
+        with self._lock:
+            for entry in self._entries():
+                if entry.name.startswith(prefix):
+                    os.remove(entry.path)
+            self._size = None
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_atime)
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                size -= entry.stat().st_size
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        self._size = size
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+photo_disk_cache = PhotoDiskCache()
+
+
+def _cache_key(user_id, version, size=None):
+    if size is None:
+        return f"{user_id}-{version}.jpg"
+    return f"{user_id}-{version}_{size}.jpg"
+
+
+def get_profile_photo_content(user_id, version, size=None):
+    """Photo bytes for a user, version and thumbnail size, read through the local disk cache."""
+    key = _cache_key(user_id, version, size)
+    content = photo_disk_cache.get(key)
+    if content is None:
+        content = download_profile_photo(user_id, size)
+        if content is not None:
+            photo_disk_cache.set(key, content)
+    return content
+
+
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _get_fetch_executor():
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=settings.PHOTO_FETCH_WORKERS, thread_name_prefix='photo-fetch'
+                )
+    return _fetch_executor
+
+
+def get_profile_photos(user_ids, size=None, deadline=None):
+    """
+    Photo bytes for many auth users at once, as {user_id: bytes or None}.
+
+    Ids are deduplicated and users without a photo are answered from the
+    database without any storage I/O. The remaining photos are fetched in
+    parallel on a bounded thread pool (PHOTO_FETCH_WORKERS) through the disk
+    cache. Photos not fetched within ``deadline`` seconds (PHOTO_FETCH_DEADLINE
+    by default) are returned as None so one slow blob cannot stall the page.
+    """
+    from users.models import AppUser
+
+    user_ids = list(dict.fromkeys(user_ids))
+    photos = {user_id: None for user_id in user_ids}
+    app_users = AppUser.objects.filter(
+        user_id__in=user_ids, profile_photo_updated_at__isnull=False
+    ).only('user_id', 'profile_photo_updated_at')
+    if not app_users:
+        return photos
+
+    def fetch(app_user):
+        try:
+            return get_profile_photo_content(app_user.user_id, profile_photo_version(app_user), size)
+        except Exception as e:
+            print(f"❌ Error getting profile photo for user {app_user.user_id}: {str(e)}")
+            return None
+
+    executor = _get_fetch_executor()
+    futures = {executor.submit(fetch, app_user): app_user.user_id for app_user in app_users}
+    done, not_done = wait(futures, timeout=settings.PHOTO_FETCH_DEADLINE if deadline is None else deadline)
+    for future in done:
+        photos[futures[future]] = future.result()
+    for future in not_done:
+        future.cancel()
+        print(f"⚠️ Profile photo fetch for user {futures[future]} exceeded the deadline")
+    return photos
+
+
+def forget_profile_photo(user_id):
+    """Drop every cached version of a user's photo."""
+    photo_disk_cache.delete_prefix(f"{user_id}-")
@@ -0,0 +1,48 @@
+
+# Other names users type for a skill -> name of the skill in the catalog.
+# Aliases of skills that are not in the catalog are ignored.
+SKILL_ALIASES = {
+    'JS': 'JavaScript',
+    'ECMAScript': 'JavaScript',
+    'TS': 'TypeScript',
+    'Py': 'Python',
+    'Golang': 'Go',
+    'Node': 'Node.js',
+    'NodeJS': 'Node.js',
+    'ReactJS': 'React',
+    'React.js': 'React',
+    'AngularJS': 'Angular',
+    'Postgres': 'PostgreSQL',
+    'psql': 'PostgreSQL',
+    'Mongo': 'MongoDB',
+    'ES': 'Elasticsearch',
+    'K8s': 'Kubernetes',
+    'Amazon Web Services': 'AWS',
+    'Microsoft Azure': 'Azure',
+    'ML': 'Machine Learning',
+    'CV': 'Computer Vision',
+    'Natural Language Processing': 'NLP',
+    'Sklearn': 'Machine Learning',
+    'Airflow': 'Apache Airflow',
+    'PySpark': 'Spark',
+    'Spring': 'Spring Boot',
+    'Jira': 'JIRA',
+    'UX': 'UI/UX Design',
+    'UI': 'UI/UX Design',
+    'AR': 'Augmented Reality',
+    'VR': 'Virtual Reality',
+    'CI': 'Continuous Integration',
+    'CD': 'Continuous Deployment',
+    'CI/CD': 'Continuous Integration',
+    'DDD': 'Domain-Driven Design',
+    'RPA': 'Robotic Process Automation',
+    'Object-Oriented Programming': 'OOP',
+    'Test-Driven Development': 'TDD',
+    'Behavior-Driven Development': 'BDD',
+    'Sh': 'Shell Scripting',
+    'Infosec': 'Cybersecurity',
+    'Pentesting': 'Penetration Testing',
+    'E2E Testing': 'End-to-End Testing',
+    'a11y': 'Accessibility Testing',
+    'l10n': 'Localization Testing',
+}
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.urls import reverse
+from .skill_aliases import SKILL_ALIASES
+
+
+def normalize_skill_name(name: str) -> str:
+    """Lookup key of a skill name: case- and accent-insensitive, with whitespace collapsed."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(name.split()).casefold()
+
+
+class PrefixIndex(NamedTuple):
+    """Sorted lookup keys and the skill id of each key, searched with bisect."""
+    keys: List[str]
+    skill_ids: List[int]
+
+    @classmethod
+    def build(cls, entries):
+        entries = sorted(set(entries))
+        return cls([key for key, _ in entries], [skill_id for _, skill_id in entries])
+
+    def matches(self, prefix):
+        """Skill ids of the keys starting with prefix, in key order."""
+        position = bisect_left(self.keys, prefix)
+        while position < len(self.keys) and self.keys[position].startswith(prefix):
+            yield self.skill_ids[position]
+            position += 1
+
+
+class CompiledSkills(NamedTuple):
+    # skill_id -> name
+    names: Dict[int, str]
+    # normalized name or alias -> skill_id
+    ids: Dict[str, int]
+    # Typeahead indexes: whole names and aliases, then the other words of names
+    name_index: PrefixIndex
+    word_index: PrefixIndex
+    # Skill ids sorted by name
+    alphabetical: List[int]
+    # JSON body of the get_skills endpoint and its content hash
+    payload: bytes
+    version: str
+
+
+class SkillCatalog:
+    """
+    Process-wide, read-only copy of the Skill table.
+
+    Skills are seeded once (init_skills) and almost never change, so the table
+    is read in a single query on first use and kept compiled: id -> name,
+    normalized name (or alias, see SKILL_ALIASES) -> id, sorted prefix indexes
+    for typeahead search and the get_skills JSON payload, versioned by its
+    content hash. Skill signal handlers drop the copy in the process that made
+    the change; other processes reload it once it is older than
+    ``SKILL_CATALOG_TTL`` seconds.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._skills: Optional[CompiledSkills] = None
+        self._loaded_at = None
+
+    @property
+    def ttl(self) -> int:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'SKILL_CATALOG_TTL', 300)
+
+    def clear(self):
+        """Drop the compiled skills; they are reloaded on next use."""
+        with self._lock:
+            self._skills = None
+            self._loaded_at = None
+
+    def _load(self) -> CompiledSkills:
+        from users.models import Skill
+
+        rows = list(Skill.objects.order_by('id').values_list('id', 'name'))
+        ids = {}
+        words = []
+        for skill_id, name in rows:
+            key = normalize_skill_name(name)
+            ids.setdefault(key, skill_id)
+            # "rest" finds "Django REST Framework"
+            for position, char in enumerate(key):
+                if position and key[position - 1] in ' -/.' and char not in ' -/.':
+                    words.append((key[position:], skill_id))
+        for alias, name in SKILL_ALIASES.items():
+            skill_id = ids.get(normalize_skill_name(name))
+            if skill_id is not None:
+                ids.setdefault(normalize_skill_name(alias), skill_id)
+
+        payload = json.dumps([{'name': name, 'id': skill_id} for skill_id, name in rows]).encode()
+        version = hashlib.md5(payload).hexdigest()[:16]
+        return CompiledSkills(
+            dict(rows), ids, PrefixIndex.build(ids.items()), PrefixIndex.build(words),
+            [skill_id for skill_id, name in sorted(rows, key=lambda row: normalize_skill_name(row[1]))],
+            payload, version
+        )
+
+    def compiled(self) -> CompiledSkills:
+        with self._lock:
+            now = time.monotonic()
+            if self._skills is None or now - self._loaded_at > self.ttl:
+                self._skills = self._load()
+                self._loaded_at = now
+            return self._skills
+
+    @property
+    def version(self) -> str:
+        return self.compiled().version
+
+    @property
+    def payload(self) -> bytes:
+        return self.compiled().payload
+
+    def name(self, skill_id) -> Optional[str]:
+        return self.compiled().names.get(skill_id)
+
+    def names(self, skill_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Names of the given skills as {skill_id: name}. Skills missing from the
+        catalog (e.g. created by another process) are read in one query;
+        ids of skills that do not exist are left out.
+        """
+        from users.models import Skill
+
+        known = self.compiled().names
+        names = {}
+        missing = []
+        for skill_id in skill_ids:
+            if skill_id in known:
+                names[skill_id] = known[skill_id]
+            else:
+                missing.append(skill_id)
+        if missing:
+            names.update(Skill.objects.filter(id__in=missing).values_list('id', 'name'))
+        return names
+
+    def get_id(self, name: str) -> Optional[int]:
+        """Id of the skill with this name or alias, ignoring case, accents and extra whitespace."""
+        return self.compiled().ids.get(normalize_skill_name(name))
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Typeahead: up to ``limit`` skills as [{"id", "name"}] whose name, alias
+        or one of the words of the name starts with the query. Whole-name and
+        alias matches come first, each group in key order, so an exact match
+        leads. An empty query lists the first skills alphabetically.
+        """
+        skills = self.compiled()
+        prefix = normalize_skill_name(query)
+        if not prefix:
+            return [{'id': skill_id, 'name': skills.names[skill_id]} for skill_id in skills.alphabetical[:limit]]
+
+        results = {}
+        for index in (skills.name_index, skills.word_index):
+            for skill_id in index.matches(prefix):
+                if len(results) >= limit:
+                    break
+                results.setdefault(skill_id, skills.names[skill_id])
+        return [{'id': skill_id, 'name': name} for skill_id, name in results.items()]
+
+    def __contains__(self, skill_id):
+        return skill_id in self.compiled().names
+
+    def __len__(self):
+        return len(self.compiled().names)
+
+
+skill_catalog = SkillCatalog()
+
+
+def get_skill_catalog() -> SkillCatalog:
+    return skill_catalog
+
+
+def skills_url() -> str:
+    """
+    URL of the skill list with the catalog version in the query string; it
+    changes whenever a skill does, so browsers may cache the response for long.
+    """
+    return f"{reverse('get_skills')}?v={skill_catalog.version}"
+
+
+def skill_search_url() -> str:
+    """Versioned URL of the skill typeahead, like skills_url; clients append &q=."""
+    return f"{reverse('search_skills')}?v={skill_catalog.version}"
+
+
+def invalidate_skill_catalog(sender, **kwargs):
+    """Reload the skill catalog after a skill is added, renamed or deleted."""
+    skill_catalog.clear()
@@ -0,0 +1,220 @@
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class PhotoStorage:
+    """
+    Minimal blob store used for profile photos.
+
+    Names are flat file names such as ``42.jpg``. ``read`` returns None and
+    ``delete`` returns False when the name does not exist, so callers never
+    need a separate exists() round trip.
+    """
+
+    def read(self, name):
+        raise NotImplementedError
+
+    def write(self, name, content):
+        raise NotImplementedError
+
+    def delete(self, name):
+        raise NotImplementedError
+
+    def list(self):
+        """Yield ``(name, last_modified)`` for every stored photo."""
+        raise NotImplementedError
+
+    def url(self, name):
+        return None
+
+
+class AzureBlobPhotoStorage(PhotoStorage):
+    """
+    Azure Blob Storage backend sharing one BlobServiceClient per process.
+
+    The client keeps a pooled HTTP session, so TLS connections are reused
+    across requests. Timeouts and retries come from the PHOTO_STORAGE_*
+    settings. Connection strings for the Azurite emulator work as well; the
+    container is created on first write if it does not exist yet.
+    """
+
+    def __init__(self, connection_string=None, container=None):
+        self._connection_string = connection_string
+        self._container = container
+        self._container_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def container_client(self):
+        if self._container_client is None:
+            with self._lock:
+                if self._container_client is None:
+                    self._container_client = self._create_container_client()
+        return self._container_client
+
+    def _create_container_client(self):
+        import requests
+        from azure.core.pipeline.transport import RequestsTransport
+        from azure.storage.blob import BlobServiceClient, ExponentialRetry
+
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=settings.PHOTO_STORAGE_POOL_SIZE,
+            pool_maxsize=settings.PHOTO_STORAGE_POOL_SIZE
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        connection_string = (self._connection_string or settings.AZURE_STORAGE_CONNECTION_STRING).strip()
+        blob_service_client = BlobServiceClient.from_connection_string(
+            connection_string,
+            transport=RequestsTransport(session=session, session_owner=False),
+            connection_timeout=settings.PHOTO_STORAGE_CONNECT_TIMEOUT,
+            read_timeout=settings.PHOTO_STORAGE_READ_TIMEOUT,
+            retry_policy=ExponentialRetry(
+                initial_backoff=1,
+                increment_base=2,
+                retry_total=settings.PHOTO_STORAGE_RETRIES
+            )
+        )
+        return blob_service_client.get_container_client(self._container or settings.PROFILE_PHOTOS_CONTAINER)
+
+    def read(self, name):
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            return self.container_client.get_blob_client(name).download_blob().readall()
+        except ResourceNotFoundError:
+            return None
+
+    def write(self, name, content):
+        from azure.core.exceptions import ResourceNotFoundError
+        blob_client = self.container_client.get_blob_client(name)
+        try:
+            blob_client.upload_blob(content, overwrite=True)
+        except ResourceNotFoundError:
+            self.container_client.create_container()
+            blob_client.upload_blob(content, overwrite=True)
+
+    def delete(self, name):
+        from azure.core.exceptions import ResourceNotFoundError
+        try:
+            self.container_client.get_blob_client(name).delete_blob()
+        except ResourceNotFoundError:
+            return False
+        return True
+
+    def list(self):
+        for blob in self.container_client.list_blobs():
+            yield blob.name, blob.last_modified
+
+    def url(self, name):
+        return self.container_client.get_blob_client(name).url
+
+
+class LocalFilePhotoStorage(PhotoStorage):
+    """Stores photos as files in PHOTO_STORAGE_LOCAL_DIR (development and benchmarks)."""
+
+    def __init__(self, directory=None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        return Path(self._directory or settings.PHOTO_STORAGE_LOCAL_DIR)
+
+    def read(self, name):
+        try:
+            with open(self.directory / name, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def write(self, name, content):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / name
+        tmp_path = path.with_name(f".{name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def delete(self, name):
+        try:
+            os.remove(self.directory / name)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self):
+        if not self.directory.exists():
+            return
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                yield entry.name, datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+
+
+class InMemoryPhotoStorage(PhotoStorage):
+    """Process-local dictionary store (tests)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blobs = {}
+
+    def read(self, name):
+        with self._lock:
+            blob = self._blobs.get(name)
+        return blob[0] if blob else None
+
+    def write(self, name, content):
+        with self._lock:
+            self._blobs[name] = (bytes(content), datetime.now(timezone.utc))
+
+    def delete(self, name):
+        with self._lock:
+            return self._blobs.pop(name, None) is not None
+
+    def list(self):
+        with self._lock:
+            items = list(self._blobs.items())
+        for name, (_, last_modified) in items:
+            yield name, last_modified
+
+
+PHOTO_STORAGE_BACKENDS = {
+    'azure': AzureBlobPhotoStorage,
+    'local': LocalFilePhotoStorage,
+    'memory': InMemoryPhotoStorage,
+}
+
+_photo_storage = None
+_photo_storage_lock = threading.Lock()
+
+
+def get_photo_storage():
+    """
+    The process-wide photo storage selected by PHOTO_STORAGE_BACKEND
+    ('azure', 'local', 'memory' or a dotted path to a PhotoStorage subclass).
+    """
+    global _photo_storage
+    if _photo_storage is None:
+        with _photo_storage_lock:
+            if _photo_storage is None:
+                backend = settings.PHOTO_STORAGE_BACKEND
+                storage_class = PHOTO_STORAGE_BACKENDS.get(backend) or import_string(backend)
+                _photo_storage = storage_class()
+    return _photo_storage
+
+
+def reset_photo_storage():
+    """Drop the shared storage so it is rebuilt from the current settings."""
+    global _photo_storage
+    with _photo_storage_lock:
+        _photo_storage = None
+
+
+def reset_photo_storage_on_setting_change(setting, **kwargs):
+    if setting.startswith('PHOTO_STORAGE_') or setting in ('AZURE_STORAGE_CONNECTION_STRING', 'PROFILE_PHOTOS_CONTAINER'):
+        reset_photo_storage()
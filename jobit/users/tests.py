@@ -1,16 +1,23 @@
 import pytest
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
 from unittest.mock import patch, MagicMock
 import base64
 import io
+import tempfile
 
 from users.models import AppUser, Location, Skill, UserSkill, SocialLink, Project
 from users.views import register, add_profile_photo, get_profile_photo
 from users.forms import RegisterForm
+from users.skills import skill_catalog, skills_url, skill_search_url
+from users.storage import get_photo_storage, InMemoryPhotoStorage, LocalFilePhotoStorage
+from users.photos import (
+    PhotoDiskCache, profile_photo_url, generate_thumbnails, download_profile_photo, get_profile_photos, THUMBNAIL_SIZES
+)
 
 
 class LocationModelTest(TestCase):
@@ -467,45 +474,464 @@ class UserUtilsTest(TestCase):
         result = add_profile_photo(self.user.id, fake_image)
         self.assertFalse(result)
     
-    @patch('users.views.settings.AZURE_STORAGE_CONNECTION_STRING', 'fake_connection_string')
-    @patch('users.views.BlobServiceClient')
-    def test_get_profile_photo_success(self, mock_blob_service):
+    @override_settings(PHOTO_STORAGE_BACKEND='memory')
+    def test_get_profile_photo_success(self):
         """Test successful profile photo retrieval"""
-        # Mock Azure Blob Storage
-        mock_blob_client = MagicMock()
-        mock_blob_client.exists.return_value = True
-        mock_blob_client.download_blob.return_value.readall.return_value = b'fake_image_data'
-        
-        mock_blob_service.from_connection_string.return_value.get_container_client.return_value.get_blob_client.return_value = mock_blob_client
+        get_photo_storage().write(f"{self.user.id}.jpg", b'fake_image_data')
         
         result = get_profile_photo(self.user.id)
         self.assertIsNotNone(result)
         self.assertEqual(result, base64.b64encode(b'fake_image_data').decode('utf-8'))
     
-    @patch('users.views.settings.AZURE_STORAGE_CONNECTION_STRING', 'fake_connection_string')
-    @patch('users.views.BlobServiceClient')
-    def test_get_profile_photo_not_found(self, mock_blob_service):
+    @override_settings(PHOTO_STORAGE_BACKEND='memory')
+    def test_get_profile_photo_not_found(self):
         """Test profile photo retrieval when photo doesn't exist"""
-        # Mock Azure Blob Storage
-        mock_blob_client = MagicMock()
-        mock_blob_client.exists.return_value = False
-        
-        mock_blob_service.from_connection_string.return_value.get_container_client.return_value.get_blob_client.return_value = mock_blob_client
-        
         result = get_profile_photo(self.user.id)
         self.assertIsNone(result)
     
-    @patch('users.views.settings.AZURE_STORAGE_CONNECTION_STRING', 'fake_connection_string')
-    @patch('users.views.BlobServiceClient')
-    def test_get_profile_photo_failure(self, mock_blob_service):
+    @patch('users.photos.get_photo_storage')
+    def test_get_profile_photo_failure(self, mock_storage):
         """Test profile photo retrieval failure"""
-        # Mock Azure Blob Storage to raise an exception
-        mock_blob_service.from_connection_string.side_effect = Exception("Azure error")
+        # Mock the storage to raise an exception
+        mock_storage.return_value.read.side_effect = Exception("Azure error")
         
         result = get_profile_photo(self.user.id)
         self.assertIsNone(result)
 
 
+class ServeProfilePhotoTest(TestCase):
+    """Test profile photo URLs and the cached photo endpoint"""
+
+    def setUp(self):
+        """Set up a user with an uploaded photo and an isolated disk cache"""
+        from django.utils import timezone
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            PROFILE_PHOTO_CACHE_DIR=self.cache_dir.name,
+            STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage'
+        )
+        self.settings_override.enable()
+
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="photouser",
+            email="photo@example.com",
+            password="testpass123"
+        )
+        self.app_user = AppUser.objects.create(user=self.user, profile_photo_updated_at=timezone.now())
+        self.url = profile_photo_url(self.app_user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.cache_dir.cleanup()
+
+    def test_profile_photo_url(self):
+        """Test that the URL points at the auth user id and carries a version"""
+        self.assertTrue(self.url.startswith(f"/profile-photo/{self.user.id}/?v="))
+        self.app_user.profile_photo_updated_at = None
+        self.assertIsNone(profile_photo_url(self.app_user))
+
+    @patch('users.photos.download_profile_photo', return_value=b'photo-bytes')
+    def test_serve_photo_is_cached_on_disk(self, mock_download):
+        """Test that the blob is downloaded once and then served from disk"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response.content, b'photo-bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('max-age', response['Cache-Control'])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, b'photo-bytes')
+        mock_download.assert_called_once_with(self.user.id, None)
+
+    @patch('users.photos.download_profile_photo', return_value=b'photo-bytes')
+    def test_serve_photo_not_modified(self, mock_download):
+        """Test that a matching If-None-Match is answered without downloading"""
+        etag = self.client.get(self.url)['ETag']
+        mock_download.reset_mock()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        mock_download.assert_not_called()
+
+    @patch('users.photos.download_profile_photo')
+    def test_serve_photo_without_photo(self, mock_download):
+        """Test that users without a photo get a 404 without a blob lookup"""
+        self.app_user.profile_photo_updated_at = None
+        self.app_user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        mock_download.assert_not_called()
+
+    @patch('users.photos.download_profile_photo', return_value=b'photo-bytes')
+    def test_serve_photo_requires_signed_url(self, mock_download):
+        """Test that photos cannot be fetched by guessing user ids"""
+        unsigned = reverse('get_profile_photo', args=[self.user.id])
+        version = self.url.split('v=')[1].split('&')[0]
+        for url in [unsigned, f"{unsigned}?v={version}", f"{unsigned}?v={version}&sig=forged",
+                    self.url.replace(f"/{self.user.id}/", f"/{self.user.id + 1}/")]:
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+        mock_download.assert_not_called()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @patch('users.photos.download_profile_photo', return_value=b'thumbnail-bytes')
+    def test_serve_thumbnail(self, mock_download):
+        """Test that ?size= serves the requested thumbnail variant"""
+        response = self.client.get(profile_photo_url(self.app_user, 64))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'thumbnail-bytes')
+        mock_download.assert_called_once_with(self.user.id, 64)
+
+        original_etag = self.client.get(self.url)['ETag']
+        self.assertNotEqual(response['ETag'], original_etag)
+
+    def test_serve_unknown_thumbnail_size(self):
+        """Test that only the generated thumbnail sizes can be requested"""
+        response = self.client.get(f"{self.url}&size=1000")
+        self.assertEqual(response.status_code, 400)
+
+    def test_disk_cache_evicts_least_recently_used(self):
+        """Test that the disk cache stays under its size limit"""
+        import os
+        import time
+        disk_cache = PhotoDiskCache(directory=self.cache_dir.name, max_bytes=10)
+        disk_cache.set('a.jpg', b'12345')
+        disk_cache.set('b.jpg', b'12345')
+        # Make 'a.jpg' the least recently used entry
+        os.utime(os.path.join(self.cache_dir.name, 'a.jpg'), (time.time() - 60, time.time() - 60))
+        disk_cache.get('b.jpg')
+        disk_cache.set('c.jpg', b'12345')
+
+        self.assertIsNone(disk_cache.get('a.jpg'))
+        self.assertEqual(disk_cache.get('b.jpg'), b'12345')
+        self.assertEqual(disk_cache.get('c.jpg'), b'12345')
+
+    @patch('users.photos.download_profile_photo', return_value=b'photo-bytes')
+    def test_photo_evicted_while_read_is_a_miss(self, mock_download):
+        """Test that a cached file removed between the read and the access time update is downloaded again"""
+        import os
+        self.client.get(self.url)
+        with patch('users.photos.os.utime', side_effect=FileNotFoundError):
+            self.assertIsNone(PhotoDiskCache(directory=self.cache_dir.name).get(os.listdir(self.cache_dir.name)[0]))
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'photo-bytes')
+        self.assertEqual(mock_download.call_count, 2)
+
+
+def make_test_image(width=400, height=300):
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(output, format='PNG')
+    return output.getvalue()
+
+
+@override_settings(PHOTO_STORAGE_BACKEND='memory')
+class ProfilePhotoThumbnailTest(TestCase):
+    """Test upload-time thumbnail generation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username="thumbuser",
+            email="thumb@example.com",
+            password="testpass123"
+        )
+        self.app_user = AppUser.objects.create(user=self.user)
+
+    def test_generate_thumbnails(self):
+        """Test that every variant is a square JPEG of the configured size"""
+        from PIL import Image
+        thumbnails = generate_thumbnails(make_test_image())
+        self.assertEqual(sorted(thumbnails), sorted(THUMBNAIL_SIZES))
+        for size, content in thumbnails.items():
+            with Image.open(io.BytesIO(content)) as image:
+                self.assertEqual(image.format, 'JPEG')
+                self.assertEqual(image.size, (size, size))
+
+    def test_upload_stores_original_and_thumbnails(self):
+        """Test that the upload view stores every variant and records the photo version"""
+        self.client.force_login(self.user)
+        image = base64.b64encode(make_test_image()).decode()
+
+        response = self.client.post(reverse('add_profile_photo'), {'image': f"data:image/png;base64,{image}"})
+
+        self.assertTrue(response.json()['success'])
+        stored = [name for name, _ in get_photo_storage().list()]
+        self.assertIn(f"{self.user.id}.jpg", stored)
+        for size in THUMBNAIL_SIZES:
+            self.assertIn(f"{self.user.id}_{size}.jpg", stored)
+        self.app_user.refresh_from_db()
+        self.assertIsNotNone(self.app_user.profile_photo_updated_at)
+
+    def test_upload_rejects_invalid_image(self):
+        """Test that data which is not an image is not uploaded"""
+        self.client.force_login(self.user)
+        image = base64.b64encode(b'not an image').decode()
+
+        response = self.client.post(reverse('add_profile_photo'), {'image': image})
+
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(list(get_photo_storage().list()), [])
+
+    def test_remove_deletes_all_variants(self):
+        """Test that removing the photo deletes the original and its thumbnails"""
+        self.client.force_login(self.user)
+        image = base64.b64encode(make_test_image()).decode()
+        self.client.post(reverse('add_profile_photo'), {'image': image})
+
+        response = self.client.post(reverse('remove_profile_photo'))
+
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(list(get_photo_storage().list()), [])
+        self.app_user.refresh_from_db()
+        self.assertIsNone(self.app_user.profile_photo_updated_at)
+
+    def test_missing_thumbnail_is_built_from_original(self):
+        """Test that photos uploaded before thumbnails existed still get a thumbnail"""
+        original = make_test_image()
+        get_photo_storage().write(f"{self.user.id}.jpg", original)
+
+        thumbnail = download_profile_photo(self.user.id, 64)
+
+        self.assertEqual(thumbnail, generate_thumbnails(original)[64])
+        self.assertEqual(get_photo_storage().read(f"{self.user.id}_64.jpg"), thumbnail)
+
+
+class BulkProfilePhotoTest(TestCase):
+    """Test fetching many profile photos concurrently"""
+
+    def setUp(self):
+        """Set up two users with photos, one without, and an isolated disk cache"""
+        from django.utils import timezone
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            PROFILE_PHOTO_CACHE_DIR=self.cache_dir.name,
+            PHOTO_STORAGE_BACKEND='memory'
+        )
+        self.settings_override.enable()
+
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f"bulkuser{i}",
+                email=f"bulk{i}@example.com",
+                password="testpass123"
+            )
+            AppUser.objects.create(user=user, profile_photo_updated_at=timezone.now() if i < 2 else None)
+            self.users.append(user)
+        for user in self.users[:2]:
+            get_photo_storage().write(f"{user.id}.jpg", f"photo-{user.id}".encode())
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.cache_dir.cleanup()
+
+    def test_get_profile_photos(self):
+        """Test that photos are returned per user and duplicates are fetched once"""
+        ids = [user.id for user in self.users]
+        with patch('users.photos.download_profile_photo', wraps=download_profile_photo) as mock_download:
+            photos = get_profile_photos(ids + ids)
+
+        self.assertEqual(set(photos), set(ids))
+        self.assertEqual(photos[ids[0]], f"photo-{ids[0]}".encode())
+        self.assertEqual(photos[ids[1]], f"photo-{ids[1]}".encode())
+        self.assertIsNone(photos[ids[2]])
+        # The user without a photo never reaches the storage
+        self.assertEqual(mock_download.call_count, 2)
+
+    def test_slow_photo_does_not_block_the_rest(self):
+        """Test that photos missing the deadline are returned as None"""
+        import threading
+        slow_id = self.users[0].id
+        release = threading.Event()
+
+        def download(user_id, size=None):
+            if user_id == slow_id:
+                release.wait(5)
+            return b'photo'
+
+        with patch('users.photos.download_profile_photo', side_effect=download):
+            photos = get_profile_photos([user.id for user in self.users], deadline=0.2)
+        release.set()
+
+        self.assertIsNone(photos[slow_id])
+        self.assertEqual(photos[self.users[1].id], b'photo')
+
+
+class PhotoStorageTest(TestCase):
+    """Test the pluggable photo storage backends"""
+
+    def check_backend(self, storage):
+        self.assertIsNone(storage.read('1.jpg'))
+        storage.write('1.jpg', b'photo')
+        self.assertEqual(storage.read('1.jpg'), b'photo')
+        self.assertEqual([name for name, _ in storage.list()], ['1.jpg'])
+        self.assertTrue(storage.delete('1.jpg'))
+        self.assertFalse(storage.delete('1.jpg'))
+        self.assertIsNone(storage.read('1.jpg'))
+
+    def test_in_memory_storage(self):
+        """Test the in-memory backend"""
+        self.check_backend(InMemoryPhotoStorage())
+
+    def test_local_file_storage(self):
+        """Test the local filesystem backend"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_backend(LocalFilePhotoStorage(directory))
+
+    def test_storage_is_shared_and_follows_settings(self):
+        """Test that one storage instance is shared until its settings change"""
+        with override_settings(PHOTO_STORAGE_BACKEND='memory'):
+            storage = get_photo_storage()
+            self.assertIsInstance(storage, InMemoryPhotoStorage)
+            self.assertIs(get_photo_storage(), storage)
+        with override_settings(PHOTO_STORAGE_BACKEND='local'):
+            self.assertIsInstance(get_photo_storage(), LocalFilePhotoStorage)
+
+    def test_azure_client_is_created_once(self):
+        """Test that the Azure backend reuses a single client"""
+        from users.storage import AzureBlobPhotoStorage
+        connection_string = (
+            "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+            "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+            "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+        )
+        storage = AzureBlobPhotoStorage(connection_string=connection_string)
+        self.assertIs(storage.container_client, storage.container_client)
+        self.assertEqual(storage.container_client.container_name, 'profile-photos')
+
+
+
+class SkillCatalogTest(TestCase):
+    """Test the in-memory skill catalog and the cached skill list endpoint"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        self.python = Skill.objects.create(name='Python')
+        self.django = Skill.objects.create(name='Django REST  Framework')
+
+    def tearDown(self):
+        skill_catalog.clear()
+
+    def test_catalog_is_loaded_once(self):
+        """Test that lookups after the first one run no queries"""
+        with self.assertNumQueries(1):
+            self.assertEqual(skill_catalog.name(self.python.id), 'Python')
+        with self.assertNumQueries(0):
+            self.assertEqual(skill_catalog.names([self.python.id, self.django.id]), {
+                self.python.id: 'Python', self.django.id: 'Django REST  Framework'
+            })
+            self.assertIn(self.django.id, skill_catalog)
+
+    def test_lookup_by_normalized_name(self):
+        """Test that names are matched ignoring case and extra whitespace"""
+        self.assertEqual(skill_catalog.get_id(' python '), self.python.id)
+        self.assertEqual(skill_catalog.get_id('django rest framework'), self.django.id)
+        self.assertIsNone(skill_catalog.get_id('Cobol'))
+
+    def test_catalog_is_invalidated_on_skill_changes(self):
+        """Test that saving or deleting a skill reloads the catalog with a new version"""
+        version = skill_catalog.version
+        self.python.name = 'Python 3'
+        self.python.save()
+        self.assertEqual(skill_catalog.name(self.python.id), 'Python 3')
+        self.assertNotEqual(skill_catalog.version, version)
+
+        self.django.delete()
+        self.assertNotIn(self.django.id, skill_catalog)
+
+    def test_unknown_ids_are_read_through(self):
+        """Test that skills missing from the catalog are read from the database"""
+        skill_catalog.compiled()
+        Skill.objects.bulk_create([Skill(name='Rust')])  # no post_save signal
+        rust_id = Skill.objects.get(name='Rust').id
+        with self.assertNumQueries(1):
+            self.assertEqual(skill_catalog.names([self.python.id, rust_id, 0]), {
+                self.python.id: 'Python', rust_id: 'Rust'
+            })
+
+    def test_get_skills_is_cached_by_version(self):
+        """Test the skill list endpoint's ETag and cache headers"""
+        client = Client()
+        response = client.get(reverse('get_skills'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {'name': 'Python', 'id': self.python.id},
+            {'name': 'Django REST  Framework', 'id': self.django.id},
+        ])
+        self.assertIn('no-cache', response['Cache-Control'])
+        etag = response['ETag']
+
+        response = client.get(reverse('get_skills'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = client.get(skills_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn(f'max-age={settings.SKILL_CATALOG_MAX_AGE}', response['Cache-Control'])
+
+        Skill.objects.create(name='Go')
+        response = client.get(reverse('get_skills'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+
+class SkillSearchTest(TestCase):
+    """Test the typeahead search over the skill catalog"""
+
+    def setUp(self):
+        skill_catalog.clear()
+        self.skills = {
+            name: Skill.objects.create(name=name).id
+            for name in ['Java', 'JavaScript', 'Node.js', 'Django', 'Spring Boot', 'Jenkins', 'Café Ops']
+        }
+
+    def tearDown(self):
+        skill_catalog.clear()
+
+    def names(self, query, limit=10):
+        return [skill['name'] for skill in skill_catalog.search(query, limit)]
+
+    def test_prefix_search_is_case_and_accent_insensitive(self):
+        """Test prefix matching of skill names"""
+        self.assertEqual(self.names('JAVA'), ['Java', 'JavaScript'])
+        self.assertEqual(self.names('cafe'), ['Café Ops'])
+        self.assertEqual(self.names('j', limit=2), ['Java', 'JavaScript'])
+        self.assertEqual(self.names('cobol'), [])
+
+    def test_aliases_and_words_are_matched(self):
+        """Test that aliases and later words of a name are searchable"""
+        self.assertEqual(self.names('js'), ['JavaScript', 'Node.js'])
+        self.assertEqual(self.names('boot'), ['Spring Boot'])
+        self.assertEqual(skill_catalog.get_id('golang'), None)
+        self.assertEqual(skill_catalog.get_id('JS'), self.skills['JavaScript'])
+
+    def test_empty_query_lists_skills_alphabetically(self):
+        """Test the initial list of the add-skill modal"""
+        self.assertEqual(self.names('', limit=3), ['Café Ops', 'Django', 'Java'])
+
+    def test_search_endpoint(self):
+        """Test the search_skills view"""
+        client = Client()
+        response = client.get(reverse('search_skills'), {'q': 'node', 'limit': '5'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'id': self.skills['Node.js'], 'name': 'Node.js'}])
+
+        response = client.get(f"{skill_search_url()}&q=ja")
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(len(response.json()), 2)
+
+        response = client.get(reverse('search_skills'), {'q': 'ja', 'limit': 'all'})
+        self.assertEqual(response.status_code, 400)
+
+
 @pytest.mark.django_db
 class TestUserModels:
     """Pytest-style tests for user models"""
@@ -19,7 +19,7 @@ urlpatterns = [
     path('logout/', views.logout_user, name='logout'),
     path('profile-photo/remove/', views.remove_profile_photo, name='remove_profile_photo'),
     path('profile-photo/add/', views.add_profile_photo, name='add_profile_photo'),
-    path('profile-photo/<int:user_id>/', views.get_profile_photo, name='get_profile_photo'),
+    path('profile-photo/<int:user_id>/', views.serve_profile_photo, name='get_profile_photo'),
     path('profiles/<int:user_id>/', views.public_profile, name='public_profile'),
     path('password-reset/', views.password_reset_request, name='password_reset_request'),
     path('password-reset/done/', views.password_reset_done, name='password_reset_done'),
@@ -17,7 +17,6 @@ from django.contrib.auth.decorators import login_required
 from .locations import LOCATIONS
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from azure.storage.blob import BlobServiceClient
 import base64
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
@@ -25,10 +24,17 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.contrib.auth import get_user_model
 from .forms import PasswordResetForm
+from users.skills import get_skill_catalog
 from users.email_utils import send_password_reset_email, send_password_reset_success_email, generate_password_reset_url
-
-# Azure Storage configuration
-PROFILE_PHOTOS_CONTAINER = 'profile-photos'
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.crypto import constant_time_compare
+from users.photos import (
+    THUMBNAIL_SIZES, PROFILE_THUMBNAIL_SIZE, profile_photo_url, profile_photo_version, profile_photo_signature,
+    upload_profile_photo, delete_profile_photo, download_profile_photo, get_profile_photo_content, forget_profile_photo
+)
 
 def login_view(request):
     if request.method == 'POST':
@@ -150,10 +156,12 @@ def get_current_user(request):
 
 def get_user_skills(email):
     user = AppUser.objects.filter(user=email)[0]
-    user_skills = UserSkill.objects.filter(user=user)
+    user_skills = list(UserSkill.objects.filter(user=user).values_list('skill_id', 'level'))
+    # Names come from the in-memory skill catalog instead of one query per skill
+    names = get_skill_catalog().names(skill_id for skill_id, _ in user_skills)
     skills = []
-    for user_skill in user_skills:
-        skills.append({"name": user_skill.skill.name, "level": user_skill.level, "id": user_skill.skill.id})
+    for skill_id, level in user_skills:
+        skills.append({"name": names.get(skill_id), "level": level, "id": skill_id})
     
     def level(e):
         return e['level']
@@ -428,12 +436,9 @@ def update_project(request, project_id):
 def remove_profile_photo(request):
     if request.method == "POST":
         try:
-            filename = f"{request.user.id}.jpg"
-            connection_string = settings.AZURE_STORAGE_CONNECTION_STRING
-            blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-            container_client = blob_service_client.get_container_client(PROFILE_PHOTOS_CONTAINER)
-            blob_client = container_client.get_blob_client(filename)
-            blob_client.delete_blob()
+            delete_profile_photo(request.user.id)
+            set_profile_photo_updated_at(request.user, None)
+            forget_profile_photo(request.user.id)
             return JsonResponse({"success": True})
         except Exception as e:
             return JsonResponse({"success": False, "error": f"Failed to delete profile photo: {str(e)}"})
@@ -456,65 +461,82 @@ def add_profile_photo(request):
             # Decode the base64 data
             image_bytes = base64.b64decode(image_data)
 
-            # Generate a unique filename
-            filename = f"{request.user.id}.jpg"
-
-            # Get connection string and initialize the BlobServiceClient
-            connection_string = settings.AZURE_STORAGE_CONNECTION_STRING.strip()
-            print(f"🔍 Azure Storage connection string length: {len(connection_string)}")
-            
-            blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-            container_client = blob_service_client.get_container_client(PROFILE_PHOTOS_CONTAINER)
-            print(f"🔍 Container: {PROFILE_PHOTOS_CONTAINER}")
-            
-            # Upload the blob
-            blob_client = container_client.get_blob_client(filename)
-            print(f"🔍 Uploading to blob: {filename}")
-            blob_client.upload_blob(image_bytes, overwrite=True)
-            print(f"✅ Blob uploaded successfully")
-
-            # Get the blob URL
-            blob_url = blob_client.url
+            # Upload the original together with its thumbnail variants
+            upload_profile_photo(request.user.id, image_bytes)
+            print(f"✅ Profile photo and thumbnails uploaded successfully")
 
-            # Update user's profile photo URL in the database
-            request.user.profile_photo = blob_url
-            request.user.save()
+            # A new version changes the photo URL, so cached copies are never served
+            app_user = set_profile_photo_updated_at(request.user, timezone.now())
+            forget_profile_photo(request.user.id)
 
             return JsonResponse({
                 "success": True,
-                "photo_url": blob_url
+                "photo_url": profile_photo_url(app_user, PROFILE_THUMBNAIL_SIZE) if app_user else None
             })
         except Exception as e:
             return JsonResponse({"success": False, "error": str(e)})
     return JsonResponse({"success": False, "error": "Invalid request method"})
 
 
+def set_profile_photo_updated_at(user, updated_at):
+    """
+    Record the photo version of the user's profile.
+    Saving the AppUser also drops the cached candidate card (see jobs.signals).
+    """
+    app_user = get_user(user)
+    if app_user:
+        app_user.profile_photo_updated_at = updated_at
+        app_user.save(update_fields=['profile_photo_updated_at'])
+    return app_user
+
+
+@require_GET
+def serve_profile_photo(request, user_id):
+    """
+    Serve the profile photo of an auth user (or its ?size= thumbnail) from the local photo cache.
+    Responses carry an ETag/Last-Modified derived from the photo version, so
+    revalidation is answered with 304 without touching blob storage.
+    Only signed URLs from profile_photo_url are served; others get a 404.
+    """
+    signature = profile_photo_signature(user_id, request.GET.get('v', ''))
+    if not constant_time_compare(request.GET.get('sig', ''), signature):
+        raise Http404("No profile photo")
+
+    size = request.GET.get('size')
+    if size is not None:
+        if not size.isdigit() or int(size) not in THUMBNAIL_SIZES:
+            return HttpResponse(status=400)
+        size = int(size)
+
+    app_user = AppUser.objects.filter(user_id=user_id).only('user_id', 'profile_photo_updated_at').first()
+    if app_user is None or app_user.profile_photo_updated_at is None:
+        raise Http404("No profile photo")
+
+    version = profile_photo_version(app_user)
+    etag = f'"{user_id}-{version}-{size or "original"}"'
+    last_modified = int(app_user.profile_photo_updated_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content = get_profile_photo_content(user_id, version, size)
+        if content is None:
+            raise Http404("No profile photo")
+        response = HttpResponse(content, content_type='image/jpeg')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.PROFILE_PHOTO_MAX_AGE)
+    return response
+
+
 def get_profile_photo(user_id):
     """
-    Tries to retrieve the profile photo for the given user ID from Azure Blob Storage.
+    Tries to retrieve the profile photo for the given user ID from the photo storage.
     Returns the image as a base64-encoded string if found, otherwise returns None.
+    Pages should link to profile_photo_url instead of embedding the image.
     """
     try:
-        filename = f"{user_id}.jpg"
-        print(f"🔍 Looking for profile photo: {filename}")
-        
-        connection_string = settings.AZURE_STORAGE_CONNECTION_STRING.strip()
-        print(f"🔍 Azure Storage connection string length: {len(connection_string)}")
-        
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        container_client = blob_service_client.get_container_client(PROFILE_PHOTOS_CONTAINER)
-        print(f"🔍 Container: {PROFILE_PHOTOS_CONTAINER}")
-        
-        blob_client = container_client.get_blob_client(filename)
-        
-        # Check if blob exists before trying to download
-        if not blob_client.exists():
-            print(f"⚠️ Profile photo not found for user {user_id}: {filename}")
+        image_bytes = download_profile_photo(user_id)
+        if image_bytes is None:
             return None
-            
-        print(f"✅ Profile photo found for user {user_id}")
-        stream = blob_client.download_blob()
-        image_bytes = stream.readall()
         return base64.b64encode(image_bytes).decode('utf-8')
     except Exception as e:
         print(f"❌ Error getting profile photo for user {user_id}: {str(e)}")
@@ -546,11 +568,11 @@ def get_user_profile_context(app_user, read_only=False):
         "starts_in": getattr(app_user, "starts_in")
     }
     # Import here to avoid circular import
-    from users.views import get_user_skills, get_profile_photo
+    from users.views import get_user_skills
     from users.models import SocialLink
     skills = get_user_skills(user)
     projects = app_user.projects.all() if hasattr(app_user, 'projects') else []
-    profile_photo_b64 = get_profile_photo(user.id)
+    profile_photo = profile_photo_url(app_user, PROFILE_THUMBNAIL_SIZE)
     from users.locations import LOCATIONS
     social_links = list(SocialLink.objects.filter(user=app_user).values('platform', 'url', 'display_name'))
     context = {
@@ -559,7 +581,7 @@ def get_user_profile_context(app_user, read_only=False):
         "skills": skills,
         "about_me": getattr(app_user, "about_me", ""),
         "projects": projects,
-        "profile_photo_b64": profile_photo_b64,
+        "profile_photo_url": profile_photo,
         "read_only": read_only,
         "social_links": social_links
     }